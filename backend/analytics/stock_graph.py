@@ -12,6 +12,8 @@ try:
     import yfinance as yf
     from matplotlib.figure import Figure as MPLFigure
     from plotly.graph_objs import Figure as PlotlyFigure
+
+    from backend.utils import rate_limiter
 except ImportError as e:
     raise ImportError(f"failed to import libraries in {__file__}") from e
 
@@ -37,6 +39,7 @@ def graph_target_ticker_price_vol(
     else:
         return {}
 
+    rate_limiter.acquire("yfinance")
     df = yf.download(target_company_ticker, start=start, end=end)
 
     fig = go.Figure()
@@ -103,6 +106,7 @@ def graph_target_ticker_basic_stats(
     else:
         return {}
 
+    rate_limiter.acquire("yfinance")
     df = yf.download(target_company_ticker, start=start, end=end)
     target_company_stats = df["Close"].describe(percentiles=[0.1, 0.5, 0.9])
 
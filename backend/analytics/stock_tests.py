@@ -9,12 +9,13 @@ try:
     import numpy as np
     import pandas as pd
     import plotly.graph_objects as go
-    import requests
     import yfinance as yf
     from dotenv import load_dotenv
     from plotly.subplots import make_subplots
     from scipy.stats import gaussian_kde, norm
-    from utils.decorators import disk_cache
+
+    from backend.utils import http_client, rate_limiter
+    from backend.utils.decorators import disk_cache
 except ImportError as e:
     raise ImportError(f"failed to import dependencies in {__file__}") from e
 
@@ -53,6 +54,7 @@ def beta_corr(
         raise ValueError(f"Invalid timeframe: {timeframe}")
 
     tickers = [target_company_ticker, "^GSPC"]
+    rate_limiter.acquire("yfinance")
     df = yf.download(tickers, start=start, end=end)["Adj Close"]
     returns = df.pct_change().dropna()
 
@@ -152,6 +154,7 @@ def stock_return_stat_tests(
     else:
         raise ValueError(f"Invalid timeframe: {timeframe}")
 
+    rate_limiter.acquire("yfinance")
     df = yf.download(target_company_ticker, start=start, end=end)["Adj Close"]
     returns = df.pct_change().dropna()
 
@@ -243,7 +246,7 @@ def fetch_polygon_realized_vol(
         f"?timespan=day&window={rolling_window}&series_type=close&apiKey={api_key}"
     )
     try:
-        response = requests.get(url, timeout=10)
+        response = http_client.get(url)
         response.raise_for_status()
         data = response.json()
 
@@ -297,6 +300,7 @@ def rolling_and_implied_vol(
     else:
         raise ValueError(f"Invalid timeframe: {timeframe}")
 
+    rate_limiter.acquire("yfinance")
     df = yf.download(target_company_ticker, start=start, end=end)["Adj Close"]
     returns = df.pct_change().dropna()
 
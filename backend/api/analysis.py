@@ -0,0 +1,67 @@
+"""
+file that manages the AI analysis route, the answer is streamed with server-sent events
+(event 'status' while the run's statements are gathered, unnamed events carry the
+answer text as it is generated, then 'done' or 'error').
+"""
+
+from typing import Iterator, List, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from backend.ingest.fetch import (
+    create_financial_data,
+    normalize_statements,
+    stream_ai_analysis,
+)
+from backend.ingest.statement_store import StatementStore
+
+router = APIRouter(prefix="/analysis")
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+def sse_event(data: str, event: Optional[str] = None) -> str:
+    """One server-sent event, multi-line data split over several data fields"""
+    lines = [f"event: {event}"] if event else []
+    lines += [f"data: {line}" for line in data.split("\n")]
+    return "\n".join(lines) + "\n\n"
+
+
+def analysis_events(
+    tickers: List[str], prompt: str, use_cache: bool, chunked: Optional[bool]
+) -> Iterator[str]:
+    """Server-sent events of one analysis run, tickers[0] being the target"""
+    yield sse_event("fetching statements", "status")
+    dfs = create_financial_data(tickers)
+    if not dfs:
+        yield sse_event("No data fetched", "error")
+        return
+
+    # unscaled (USD only) values, the prompt builder computes ratios over them
+    store = StatementStore.from_frames(normalize_statements(dfs, millions=False))
+    yield sse_event("analyzing", "status")
+    for piece in stream_ai_analysis(store, prompt, use_cache, chunked):
+        yield sse_event(piece)
+    yield sse_event("", "done")
+
+
+@router.get("/stream")
+def stream_analysis(
+    tickers: str = Query(..., description="comma separated, target first"),
+    prompt: str = Query(..., min_length=1),
+    use_cache: bool = True,
+    chunked: Optional[bool] = None,
+):
+    """Stream the AI analysis of a run (target & peers) as server-sent events"""
+    ticker_list = list(
+        dict.fromkeys(t.strip().upper() for t in tickers.split(",") if t.strip())
+    )
+    if not ticker_list:
+        raise HTTPException(status_code=400, detail="No tickers provided")
+
+    return StreamingResponse(
+        analysis_events(ticker_list, prompt, use_cache, chunked),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
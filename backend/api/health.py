@@ -4,10 +4,13 @@ Health check endpoints for the API.
 Provides:
 - A database health check by inserting a sample company record.
 - A Redis connection health check.
+- Per-host metrics of the shared upstream HTTP clients.
+- Remaining upstream quota per provider.
 """
 
 from fastapi import FastAPI
 
+from backend.utils import http_client, rate_limiter
 from backend.utils.redis_client import redis_client
 from db.repositories.company_repository import CompanyRepository
 
@@ -38,3 +41,15 @@ def health():
         return {"status": "success", "redis": redis_status}
     except Exception as e:
         return {"status": "error", "details": str(e)}
+
+
+@app.get("/health/http/")
+def http_metrics():
+    """Request counts, errors, status codes and latency per upstream host."""
+    return {"status": "success", "hosts": http_client.get_metrics()}
+
+
+@app.get("/health/quota/")
+def upstream_quota():
+    """Requests left in the shared token bucket of each upstream provider."""
+    return {"status": "success", "providers": rate_limiter.get_remaining()}
@@ -1,18 +1,21 @@
 """a file that helps fetch financial information about a list of tickers"""
 
-from typing import List
+from typing import List, Optional
 
-import yfinance as yf
+from backend.ingest.ticker_info import TickerInfoProvider
 
 
-def create_companies_fields(tickers: List[str]) -> List[dict]:
+def create_companies_fields(
+    tickers: List[str], infos: Optional[TickerInfoProvider] = None
+) -> List[dict]:
     """
-    fetches certain company data (sector, mc..) needed for the Company class
+    fetches certain company data (sector, mc..) needed for the Company class,
+    all infos in one batched pass through the run's provider when given
     """
+    infos_by_ticker = (infos or TickerInfoProvider()).get_many(tickers)
     companies_fields = []
     for ticker in tickers:
-        yf_ticker = yf.Ticker(ticker)
-        info = yf_ticker.info
+        info = infos_by_ticker[ticker]
         if not info:
             return {"error": "could not get ticker.info for companies tickers"}
         company_field = {
@@ -22,7 +25,7 @@ def create_companies_fields(tickers: List[str]) -> List[dict]:
                 "incorporation"
             ),  # returns None (not provided via yf api)
             "sector": info.get("sector"),
-            "market_cap": info.get("marketcap"),
+            "market_cap": info.get("marketCap"),
         }
         companies_fields.append(company_field)
     return companies_fields
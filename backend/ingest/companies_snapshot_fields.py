@@ -1,104 +1,199 @@
 """
-this file organizes firms data (ebit, sales...),
-some data is only for the target company we are analyzing
+this file organizes firms data (ebit, sales...) into FinancialSnapshot fields,
+some data is only for the target company we are analyzing.
+
+The latest period of every ticker's statements is pivoted once into a wide
+ticker x field table, fields are picked with vectorized column selection and
+missing values are tracked with an explicit mask.
 """
 
-from typing import TYPE_CHECKING, List
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 import pandas as pd
 import yfinance as yf
+from yfinance.exceptions import YFException
 
-from backend.exceptions import DataFetchError
+from backend.ingest.ticker_info import TickerInfoProvider
+from backend.utils import rate_limiter
 from backend.utils.logger import get_logger
 
-if TYPE_CHECKING:
-    from pandas import DataFrame
-
-
 logger = get_logger(__file__)
 
-
-def create_companies_snapshot_fields(dfs: List[pd.DataFrame]):  # needs revision
-    """funcyion that handles target company ticker, its data,
-    handles data per statement type & ticker.."""
-    snapshots = {}
-    target_company_ticker = dfs[0]["ticker"].iloc[0]
-
-    # for target company only
-    snapshots[0][target_company_ticker]["trailing_sales"] = None
-    snapshots[0][target_company_ticker]["trailing_ebit"] = None
-    yf_ticker = yf.Ticker(target_company_ticker)
-    # check if this method is actually available + are those fields valid
+MARGINAL_TAX_RATE = 0.21  # make it dynamic if possible
+
+# snapshot field -> (statement, FMP metrics in order of preference)
+STATEMENT_FIELDS = {
+    "last_annual_revenue": ("income-statement", ("revenue",)),
+    "last_annual_ebit": ("income-statement", ("ebit", "operatingIncome")),
+    "last_annual_net_income": ("income-statement", ("netIncome",)),
+    "last_annual_interest_expense": ("income-statement", ("interestExpense",)),
+    "last_annual_tax_paid": ("income-statement", ("incomeTaxExpense",)),
+    "last_annual_debt": ("balance-sheet-statement", ("totalDebt",)),
+    "last_annual_equity": (
+        "balance-sheet-statement",
+        ("totalEquity", "totalStockholdersEquity"),
+    ),
+    "last_annual_cash": (
+        "balance-sheet-statement",
+        ("cashAndShortTermInvestments",),
+    ),
+    "last_annual_capex": ("cash-flow-statement", ("capitalExpenditure",)),  # negative
+    "last_annual_chng_wc": ("cash-flow-statement", ("changeInWorkingCapital",)),
+    "last_annual_da": ("cash-flow-statement", ("depreciationAndAmortization",)),
+}
+# snapshot field -> yfinance info key
+MARKET_FIELDS = {
+    "market_cap": "marketCap",
+    "current_shares_outstanding": "sharesOutstanding",
+    "current_beta": "beta",
+}
+TARGET_ONLY_FIELDS = ("last_annual_cash", "trailing_sales", "trailing_ebit")
+OPTIONAL_FIELDS = TARGET_ONLY_FIELDS
+
+
+def latest_periods(dfs: List[pd.DataFrame]) -> pd.DataFrame:
+    """Most recent row of every ticker x statement, all frames concatenated once"""
+    frames = [df for df in dfs if not df.empty]
+    if not frames:
+        return pd.DataFrame(columns=["ticker", "statement_type"])
+
+    combined = pd.concat(frames, ignore_index=True)
+    if "date" in combined.columns:
+        combined = combined.sort_values("date", ascending=False, kind="stable")
+    return combined.drop_duplicates(["ticker", "statement_type"])
+
+
+def statement_table(latest: pd.DataFrame, tickers: List[str]) -> pd.DataFrame:
+    """ticker x statement-field table, one vectorized selection per statement"""
+    table = pd.DataFrame(index=pd.Index(tickers, name="ticker"))
+    by_statement = {
+        statement: rows.set_index("ticker")
+        for statement, rows in latest.groupby("statement_type", sort=False)
+    }
+
+    for field, (statement, metrics) in STATEMENT_FIELDS.items():
+        rows = by_statement.get(statement)
+        column = pd.Series(np.nan, index=table.index, dtype="float64")
+        if rows is not None:
+            for metric in metrics:  # first available metric wins per ticker
+                if metric in rows.columns:
+                    values = pd.to_numeric(rows[metric], errors="coerce")
+                    column = column.fillna(values.reindex(table.index))
+        table[field] = column
+    return table
+
+
+def market_table(infos: Dict[str, dict], tickers: List[str]) -> pd.DataFrame:
+    """ticker x market-field table from the yfinance info dicts"""
+    info_frame = pd.DataFrame.from_dict(
+        {ticker: infos.get(ticker) or {} for ticker in tickers}, orient="index"
+    )
+    info_frame = info_frame.reindex(index=tickers, columns=list(MARKET_FIELDS.values()))
+    info_frame = info_frame.apply(pd.to_numeric, errors="coerce")
+    info_frame.columns = list(MARKET_FIELDS)
+    return info_frame.rename_axis("ticker")
+
+
+def trailing_fields(ticker: str) -> Tuple[Optional[float], Optional[float]]:
+    """Sum of the last four quarters of revenue & EBIT from yfinance, Nones if unknown"""
     try:
-        quartrly_inc = yf_ticker.financials
-        if "Total Revenue" in quartrly_inc.index:
-            snapshots[0][target_company_ticker]["trailing_sales"] = (
-                quartrly_inc.loc["total Revenue"].iloc[:4].sum()
-            )
-
-            for key in ["Operating Income", "Ebit", "EBIT"]:
-                if key in quartrly_inc.index:
-                    snapshots[0][target_company_ticker]["trailing_ebit"] = (
-                        quartrly_inc.loc[key].iloc[:4].sum()
-                    )
-                    break
-    except DataFetchError:
-        logger.error("Error fetching financials for %s", target_company_ticker)
-
-    if (
-        snapshots[ticker]["trailing_sales"] or snapshots[ticker]["trailing_ebit"]
-    ) is None:
-        snapshots[ticker]["trailing_sales"] = latest.get("revenue")
-        snapshots[ticker]["trailing_ebit"] = latest.get("ebit")
-
-    snapshots[0][target_company_ticker]["last_annual_cash"] = latest.get(
-        "cashAndShortTermInvestments"
-    )  # needed for target company only
-
-    for df in dfs:
-        ticker = df["ticker"].iloc[0]
-        stmt_type = df["statement_type"].iloc[0]
-
-        yf_ticker = yf.Ticker(ticker)
-        info = ticker.info
-
-        if ticker not in snapshots:
-            snapshots[ticker] = {}
-
-        latest = df.iloc[0].to_dict()
-
-        snapshots[ticker]["marginal_tax_rate"] = 0.21  # make it dynamic if possible
-
-        if stmt_type == "income_statement":
-            snapshots[ticker]["last_annual_revenue"] = latest.get("revenue")
-            snapshots[ticker]["last_annual_ebit"] = latest.get("ebit")
-            snapshots[ticker]["last_annual_net_income"] = latest.get("netIncome")
-            snapshots[ticker]["last_annual_interest_expense"] = latest.get(
-                "interestExpense"
-            )
-            snapshots[ticker]["last_annual_tax_paid"] = latest.get("incomeTaxExpense")
-
-        elif stmt_type == "balance-sheet-statement":
-            snapshots[ticker]["last_annual_debt"] = latest.get("totalDebt")
-
-            snapshots[ticker]["last_annual_equity"] = latest.get("totalEquity")
-
-        elif stmt_type == "cash-flow-statement":
-            snapshots[ticker]["last_annual_capex"] = latest.get(
-                "capitalExpenditure"
-            )  # negative
-            snapshots[ticker]["last_annual_chng_wc"] = latest.get(
-                "changeInWorkingCapital"
-            )
-            snapshots[ticker]["last_annual_da"] = latest.get(
-                "depreciationAndAmortization"
-            )
-
-        else:
-            snapshots[ticker]["market_cap"] = info.get("marketCap")
-            snapshots[ticker]["current_shares_outstanding"] = info.get(
-                "sharesOutstanding"
-            )
-            snapshots[ticker]["current_beta"] = info.get("beta")
-
-    return snapshots
+        rate_limiter.acquire("yfinance")
+        quarterly = yf.Ticker(ticker).quarterly_income_stmt
+    except (rate_limiter.QuotaExceeded, YFException, OSError, ValueError) as e:
+        logger.error("Error fetching quarterly financials for %s: %s", ticker, e)
+        return None, None
+
+    if quarterly is None or quarterly.empty:
+        return None, None
+
+    def last_four(keys):
+        for key in keys:
+            if key in quarterly.index:
+                values = pd.to_numeric(quarterly.loc[key], errors="coerce").iloc[:4]
+                if values.notna().all() and len(values) == 4:
+                    return float(values.sum())
+        return None
+
+    return (
+        last_four(("Total Revenue",)),
+        last_four(("Operating Income", "EBIT", "Ebit")),
+    )
+
+
+def snapshot_table(
+    dfs: List[pd.DataFrame],
+    infos: TickerInfoProvider,
+    target: Optional[str] = None,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Wide ticker x snapshot-field table and its missing-value mask.
+
+    Args:
+        dfs (List[pd.DataFrame]): statement frames, dfs[0] belongs to the target
+        infos (TickerInfoProvider): the run's yfinance info provider
+        target (Optional[str]): target ticker, defaults to the ticker of dfs[0]
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: field values (NaN when missing) and a
+        boolean mask of the required fields that are missing
+    """
+    latest = latest_periods(dfs)
+    tickers = list(dict.fromkeys(latest["ticker"]))
+    if target is None and tickers:
+        target = dfs[0]["ticker"].iloc[0]
+
+    table = statement_table(latest, tickers).join(
+        market_table(infos.get_many(tickers), tickers)
+    )
+    table.insert(0, "marginal_tax_rate", MARGINAL_TAX_RATE)
+
+    # target only: trailing four quarters, falling back to the last annual figures
+    table["trailing_sales"] = np.nan
+    table["trailing_ebit"] = np.nan
+    is_target = table.index == target
+    table.loc[~is_target, "last_annual_cash"] = np.nan
+    if target in table.index:
+        sales, ebit = trailing_fields(target)
+        table.loc[target, "trailing_sales"] = (
+            sales if sales is not None else table.loc[target, "last_annual_revenue"]
+        )
+        table.loc[target, "trailing_ebit"] = (
+            ebit if ebit is not None else table.loc[target, "last_annual_ebit"]
+        )
+
+    required = [col for col in table.columns if col not in OPTIONAL_FIELDS]
+    missing = table[required].isna()
+    return table, missing
+
+
+def create_companies_snapshot_fields(
+    dfs: List[pd.DataFrame],
+    infos: Optional[TickerInfoProvider] = None,
+    target: Optional[str] = None,
+) -> Dict[str, dict]:
+    """
+    FinancialSnapshot field dicts of every ticker, keyed by ticker, missing values
+    as None; yfinance info comes from the run's provider when given.
+    """
+    if not dfs:
+        return {}
+
+    table, missing = snapshot_table(dfs, infos or TickerInfoProvider(), target)
+
+    incomplete = missing.any(axis=1)
+    for ticker in table.index[incomplete]:
+        logger.warning(
+            "Missing snapshot fields for %s: %s",
+            ticker,
+            list(missing.columns[missing.loc[ticker]]),
+        )
+
+    shares = table["current_shares_outstanding"]
+    values = table.astype(object).where(table.notna(), None)
+    values["current_shares_outstanding"] = pd.Series(
+        [int(v) if pd.notna(v) else None for v in shares],
+        index=table.index,
+        dtype=object,
+    )
+    return values.to_dict("index")
@@ -1,18 +1,57 @@
 """Financial data fetching and analysis module."""
 
-import json
 import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from typing import List, Optional, Tuple
+from itertools import islice, product
+from typing import IO, Dict, Iterator, List, Optional, Tuple, Union
 
 import pandas as pd
 import requests
-import yfinance as yf
 from dotenv import load_dotenv
+from xlsxwriter.exceptions import XlsxWriterException
 
 from backend.domain.comparables import ComparableSet
-from backend.ingest.webhook import notify_cache_expiry
-from backend.simplai.ai import extract_info_gemini
+from backend.ingest.excel_export import write_workbook
+from backend.ingest.freshness import (
+    STATEMENT_PERIOD,
+    incremental_limit,
+    is_stale,
+    merge_periods,
+)
+from backend.ingest.fx_rates import get_rates
+from backend.ingest.normalize import normalize_frames
+from backend.ingest.presentation import combined_view, statement_view
+from backend.ingest.screener_cache import (
+    bucketed,
+    read_screen,
+    screen_key,
+    screen_peers,
+    write_screen,
+)
+from backend.ingest.statement_cache import (
+    CACHE_NAMESPACE,
+    cache_key,
+    claim_refresh,
+    entry_depth,
+    read_tickers,
+    statement_digest,
+    ticker_digest,
+    write_tickers,
+)
+from backend.ingest.statement_store import StatementStore
+from backend.ingest.ticker_info import TickerInfoProvider
+from backend.ingest.webhook import notify_cache_update
+from backend.simplai.ai import (
+    AI_CHUNK_TICKERS,
+    extract_info_gemini,
+    extract_info_gemini_chunked,
+    stream_info_gemini,
+)
+from backend.utils import cache_codec, http_client
 from backend.utils.decorators import retry
 from backend.utils.logger import get_logger
 from backend.utils.redis_client import redis_client
@@ -20,78 +59,29 @@ from backend.utils.redis_client import redis_client
 load_dotenv()
 
 api_key = os.getenv("FINANCIAL-PREP-API-KEY")
-currancy_api_key = os.getenv("CURRANCY-API-KEY")
+fetch_max_workers = int(os.getenv("FETCH_MAX_WORKERS", "8"))
 logger = get_logger(__file__)
 
-
-def are_dataframes_equal(df1: pd.DataFrame, df2: pd.DataFrame) -> bool:
-    """
-    Sophisticated DataFrame comparison that handles common financial data issues.
-    """
-    try:
-        # Quick check: different shapes = definitely different
-        if df1.shape != df2.shape:
-            return False
-
-        # Check if columns are the same (order doesn't matter)
-        if set(df1.columns) != set(df2.columns):
-            return False
-
-        # Sort columns to ensure same order for comparison
-        df1_sorted = df1.reindex(sorted(df1.columns), axis=1).reset_index(drop=True)
-        df2_sorted = df2.reindex(sorted(df2.columns), axis=1).reset_index(drop=True)
-
-        # Compare using pandas equals with some tolerance for floating point
-        return df1_sorted.equals(df2_sorted)
-
-    except (ValueError, KeyError):  # More specific exceptions
-        # If comparison fails for any reason, assume they're different
-        return False
-
-
-def compare_ticker_data(new_data: list, cached_data: list) -> bool:
-    """
-    Compare ticker-level data (list of statement dictionaries).
-
-    Args:
-        new_data: List of {'statement_type': str, 'data': list} dicts
-        cached_data: List of {'statement_type': str, 'data': list} dicts
-
-    Returns:
-        bool: True if data is the same, False if different
-    """
-    try:
-        # Quick check: different number of statements
-        if len(new_data) != len(cached_data):
-            return False
-
-        # Sort by statement type for consistent comparison
-        new_sorted = sorted(new_data, key=lambda x: x["statement_type"])
-        cached_sorted = sorted(cached_data, key=lambda x: x["statement_type"])
-
-        # Compare each statement
-        for new_stmt, cached_stmt in zip(new_sorted, cached_sorted):
-            if new_stmt["statement_type"] != cached_stmt["statement_type"]:
-                return False
-
-            # Convert to DataFrames and compare
-            new_df = pd.DataFrame(new_stmt["data"])
-            cached_df = pd.DataFrame(cached_stmt["data"])
-
-            if not are_dataframes_equal(new_df, cached_df):
-                return False
-
-        return True
-
-    except (ValueError, KeyError):  # More specific exceptions
-        # If comparison fails, assume data is different
-        return False
+_refresh_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("REFRESH_MAX_WORKERS", "2")),
+    thread_name_prefix="statement-refresh",
+)
+_refreshing = set()
+_refresh_lock = threading.Lock()
 
 
 BASE_URL = "https://financialmodelingprep.com/api/v3"
 SCREENER_URL = "https://financialmodelingprep.com/stable/company-screener"
-CURRANCY_URL = "https://api.beta.fastforex.io/"
 
+FETCH_MODES = ("full", "latest")
+
+SCREENER_PAGE_SIZE = int(os.getenv("SCREENER_PAGE_SIZE", "100"))
+SCREENER_MAX_PAGES = int(os.getenv("SCREENER_MAX_PAGES", "10"))
+SCREENER_EXCHANGES = tuple(
+    e.strip().upper()
+    for e in os.getenv("SCREENER_EXCHANGES", "NYSE,NASDAQ,AMEX").split(",")
+    if e.strip()
+)
 REQUIRED_STATEMENTS = (
     "income-statement",
     "balance-sheet-statement",
@@ -100,16 +90,17 @@ REQUIRED_STATEMENTS = (
 
 
 @retry()
-def target_company_filters(target_company_ticker: str) -> Tuple[float, float]:
+def target_company_filters(
+    target_company_ticker: str, infos: Optional[TickerInfoProvider] = None
+) -> Tuple[float, float]:
     """
     Get market cap and beta for the target company from Yahoo Finance.
-    Returns a tuple (market_cap, beta).
+    Returns a tuple (market_cap, beta), info comes from the run's provider when given.
     """
     if not target_company_ticker:
         return None
 
-    yf_ticker = yf.Ticker(target_company_ticker)
-    info = yf_ticker.info
+    info = (infos or TickerInfoProvider()).get(target_company_ticker)
 
     if not info:
         return None
@@ -123,18 +114,16 @@ def target_company_filters(target_company_ticker: str) -> Tuple[float, float]:
     return market_cap, beta
 
 
-def screener(
-    mc: float, beta: float, country: str = "US", limit: int = 100
-) -> List[str]:
-    """
-    Returns a list of comparable tickers from FMP screener.
-    """
+def screener_params(mc: float, beta: float, country: str, limit: int) -> dict:
+    """Query params of the FMP screener for peers around the target's mc & beta,
+    snapped to the cache buckets so near-identical targets share one screen."""
+    mc, beta = bucketed(mc, beta)
     mc_low = 0.2 * mc
     mc_high = 5 * mc
     beta_low = 0.7 * beta
     beta_high = 1.5 * beta
 
-    params = {
+    return {
         "marketCapMoreThan": mc_low,
         "marketCapLowerThan": mc_high,
         "betaMoreThan": beta_low,
@@ -144,130 +133,423 @@ def screener(
         "apikey": api_key,
     }
 
+
+def keep_screened(row: dict, seen: set, exchanges: Tuple[str, ...]) -> bool:
+    """Pre-filter of a screener row: has a symbol not seen yet, listed on one of the
+    exchanges, actively traded, not an ETF or a fund. Marks the symbol as seen."""
+    symbol = row.get("symbol")
+    if not symbol or symbol in seen:
+        return False
+
+    exchange = row.get("exchangeShortName") or row.get("exchange")
+    if exchanges and exchange and exchange.upper() not in exchanges:
+        return False
+    if row.get("isActivelyTrading") is False or row.get("isEtf") or row.get("isFund"):
+        return False
+
+    seen.add(symbol)
+    return True
+
+
+def _screener_page(params: dict) -> Optional[list]:
+    """One screener request, None when it fails (the other pages carry on)."""
     try:
-        response = requests.get(SCREENER_URL, params=params, timeout=4)
+        response = http_client.get(SCREENER_URL, params=params)
         response.raise_for_status()
-        data = response.json()
-        tickers = [c.get("symbol") for c in data if c.get("symbol")]
-        return tickers
-    except requests.RequestException as e:
-        logger.error("Failed to fetch comparables: %s", e)
-        return []
+        return response.json()
+    except (requests.RequestException, ValueError) as e:
+        logger.error(
+            "Screener page %s-%s failed: %s",
+            params["marketCapMoreThan"],
+            params["marketCapLowerThan"],
+            e,
+        )
+        return None
+
+
+def screener_query(mc: float, beta: float, country: str, page_size: int) -> dict:
+    """Screener params of one page, server-side pre-filtered: actively trading,
+    no ETFs or funds."""
+    return {
+        **screener_params(mc, beta, country, page_size),
+        "isActivelyTrading": "true",
+        "isEtf": "false",
+        "isFund": "false",
+    }
+
+
+def next_page_bound(rows: list, high: float, page_size: int) -> Optional[float]:
+    """
+    marketCapLowerThan of the page after rows (FMP returns the largest market caps
+    first), None when rows were the last page or the bound would not move.
+    """
+    if len(rows) < page_size:
+        return None
+    caps = [
+        row["marketCap"]
+        for row in rows
+        if isinstance(row.get("marketCap"), (int, float))
+    ]
+    if not caps or min(caps) >= high:
+        return None
+    return min(caps)
+
+
+def iter_screener(
+    mc: float,
+    beta: float,
+    country: str = "US",
+    target: Optional[str] = None,
+    page_size: int = SCREENER_PAGE_SIZE,
+    exchanges: Tuple[str, ...] = SCREENER_EXCHANGES,
+) -> Iterator[str]:
+    """
+    Stream comparable tickers page by page, largest market caps first.
+
+    FMP's screener has no offset, so pages are keyed on market cap: a full page is
+    followed by a query capped at its smallest market cap, up to SCREENER_MAX_PAGES
+    pages. A page is only requested once the previous one is consumed, so a caller
+    that needs one page makes one request. Symbols are pre-filtered by
+    keep_screened and deduplicated against the target.
+    """
+    base = screener_query(mc, beta, country, page_size)
+    seen = {target} if target else set()
+    high = base["marketCapLowerThan"]
+
+    for _ in range(SCREENER_MAX_PAGES):
+        rows = _screener_page({**base, "marketCapLowerThan": high})
+        if rows is None:
+            return
+
+        for row in rows:
+            if keep_screened(row, seen, exchanges):
+                yield row["symbol"]
+
+        high = next_page_bound(rows, high, page_size)
+        if high is None:
+            return
+
+
+def screener(
+    mc: float,
+    beta: float,
+    country: str = "US",
+    limit: int = 100,
+    target: Optional[str] = None,
+) -> List[str]:
+    """
+    Returns up to `limit` comparable tickers from the paginated FMP screener
+    (never the target itself), cached per bucketed screen.
+    """
+    key = screen_key(mc, beta, country, limit)
+    tickers = read_screen(redis_client, key)
+
+    if tickers is None:
+        # the cached screen is shared by every target of the bucket, so the target
+        # is only dropped from the result
+        tickers = list(islice(iter_screener(mc, beta, country), limit))
+        write_screen(redis_client, key, tickers)
+
+    return screen_peers(tickers, limit, target)
+
+
+def statement_frame(data, ticker: str, statement: str) -> Optional[pd.DataFrame]:
+    """Build a statement DataFrame from an FMP payload, None if it is empty."""
+    if not data:
+        return None
+
+    if isinstance(data, dict):
+        df = pd.DataFrame([data])
+    else:
+        df = pd.DataFrame(data)
+
+    df["ticker"] = ticker
+    df["statement_type"] = statement
+    return df
+
+
+def cached_statements(ticker: str, cached_data) -> List[dict]:
+    """Decode a cached ticker payload, one statement dict (DataFrame + metadata) each."""
+    statements = cache_codec.decode(cached_data)
+    for statement_data in statements:
+        statement_data["data"]["ticker"] = ticker
+        statement_data["data"]["statement_type"] = statement_data["statement_type"]
+    return statements
+
+
+def usable_entry(statements: Optional[List[dict]], mode: str) -> Optional[List[dict]]:
+    """A cached entry only serves a full fetch if it holds the whole history."""
+    if statements is None:
+        return None
+    if mode == "full" and any(s.get("depth") == "latest" for s in statements):
+        return None
+    return statements
+
+
+def decode_cached_ticker(ticker: str, cached_data) -> Optional[List[dict]]:
+    """Return the cached statements of a ticker, or None on a miss."""
+    if not cached_data:
+        return None
+
+    try:
+        statements = cached_statements(ticker, cached_data)
+        if logger:
+            logger.info("Using cached data for %s", ticker)
+        return statements
+
+    except (ValueError, KeyError, TypeError, zlib.error) as e:  # Specific exceptions
+        if logger:
+            logger.warning("Cache read failed for %s: %s", cache_key(ticker), e)
+        return None
+
+
+def statement_entry(statement: str, df: pd.DataFrame, depth: str = "full") -> dict:
+    """Cache entry of a freshly fetched statement, hashed once here so that
+    change detection compares digests only. depth tells whether the entry holds
+    the whole history ('full') or only the latest period ('latest')."""
+    return {
+        "statement_type": statement,
+        "data": df,
+        "digest": statement_digest(df),
+        "fetched_at": time.time(),
+        "depth": depth,
+    }
+
+
+def statement_params(limit: Optional[int] = None) -> dict:
+    """FMP query params of a statement request, limit caps the number of periods"""
+    params = {"period": STATEMENT_PERIOD, "apikey": api_key}
+    if limit is not None:
+        params["limit"] = limit
+    return params
+
+
+def _fetch_statement(
+    ticker: str, statement: str, limit: Optional[int] = None
+) -> Optional[pd.DataFrame]:
+    """Fetch a single statement of a ticker from FMP (the latest `limit` periods
+    when given), None if unavailable."""
+    try:
+        url = f"{BASE_URL}/{statement}/{ticker}"
+        response = http_client.get(url, params=statement_params(limit))
+
+        if response.status_code != 200:
+            if logger:
+                logger.warning(
+                    "Failed to fetch %s %s: %s",
+                    ticker,
+                    statement,
+                    response.status_code,
+                )
+            return None
+
+        return statement_frame(response.json(), ticker, statement)
+
+    except (
+        requests.RequestException,
+        ValueError,
+    ) as e:
+        if logger:
+            logger.error("Error fetching %s %s: %s", ticker, statement, e)
+        return None
+
+
+def cache_payloads(tickers_data: Dict[str, list]) -> Dict[str, bytes]:
+    """Encode the fetched statements of every ticker with the namespace codec."""
+    return {
+        ticker: cache_codec.encode(CACHE_NAMESPACE, ticker_data)
+        for ticker, ticker_data in tickers_data.items()
+        if ticker_data
+    }
+
+
+def _cache_tickers(tickers_data: Dict[str, list]) -> None:
+    """Cache the statements of all fetched tickers in one pipeline, every ticker
+    whose content digest changed is broadcast so other workers drop their local copy
+    (the new payload stays in redis)."""
+    payloads = cache_payloads(tickers_data)
+    if not redis_client or not payloads:
+        return
+
+    # Always update cache with latest data, previous digests come back in the same trip
+    digests = {ticker: ticker_digest(tickers_data[ticker]) for ticker in payloads}
+    depths = {ticker: entry_depth(tickers_data[ticker]) for ticker in payloads}
+    previous = write_tickers(redis_client, payloads, digests, depths)
+
+    # Only notify the other workers if data actually changed
+    for ticker, old_digest in previous.items():
+        if old_digest != digests[ticker]:
+            notify_cache_update(cache_key(ticker))
+
+
+def _fetch_tickers(
+    tickers: List[str],
+    max_workers: int = 1,
+    limits: Optional[Dict[Tuple[str, str], Optional[int]]] = None,
+    depth: str = "full",
+) -> Dict[str, list]:
+    """
+    Fetch REQUIRED_STATEMENTS of every ticker, fanned out across tickers and
+    statements on a thread pool bounded by max_workers (1 keeps the fetch serial).
+
+    Args:
+        limits: optional period limit per (ticker, statement), None = whole history
+        depth: recorded on the entries, 'latest' when only one period is requested
+
+    Returns:
+        Dict[str, list]: statement entries per ticker, in REQUIRED_STATEMENTS order
+    """
+    limits = limits or {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            (ticker, statement): executor.submit(
+                _fetch_statement, ticker, statement, limits.get((ticker, statement))
+            )
+            for ticker in tickers
+            for statement in REQUIRED_STATEMENTS
+        }
+        fetched = {key: future.result() for key, future in futures.items()}
+
+    return {
+        ticker: [
+            statement_entry(statement, fetched[(ticker, statement)], depth)
+            for statement in REQUIRED_STATEMENTS
+            if fetched[(ticker, statement)] is not None
+        ]
+        for ticker in tickers
+    }
+
+
+def merge_entries(cached: List[dict], fetched: List[dict]) -> List[dict]:
+    """Merge incrementally fetched statements into the cached ones of a ticker,
+    keeping the cached depth and statements that failed to refresh."""
+    new = {statement["statement_type"]: statement for statement in fetched}
+    merged = []
+    for old in cached:
+        statement = new.pop(old["statement_type"], None)
+        if statement is None:
+            merged.append(old)
+            continue
+        df = merge_periods(old["data"], statement["data"])
+        merged.append(
+            statement_entry(statement["statement_type"], df, old.get("depth", "full"))
+        )
+    return merged + list(new.values())
+
+
+def _refresh_tickers(cached: Dict[str, List[dict]]) -> None:
+    """
+    Background refresh of stale cache entries (stale-while-revalidate), each
+    statement only requests the periods newer than its latest cached date.
+    """
+    try:
+        limits = {
+            (ticker, statement["statement_type"]): incremental_limit(statement)
+            for ticker, statements in cached.items()
+            for statement in statements
+        }
+        fetched = _fetch_tickers(list(cached), fetch_max_workers, limits)
+        _cache_tickers(
+            {
+                ticker: merge_entries(cached[ticker], fetched[ticker])
+                for ticker in cached
+            }
+        )
+        if logger:
+            logger.info("Refreshed %d stale tickers", len(cached))
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        if logger:
+            logger.error("Background refresh failed for %s: %s", list(cached), e)
+    finally:
+        with _refresh_lock:
+            _refreshing.difference_update(cached)
+
+
+def schedule_refresh(cached: Dict[str, List[dict]]) -> None:
+    """Queue a background refresh of stale tickers (ticker -> cached statements),
+    at most one in flight per ticker in this process and, through a redis lock,
+    across workers."""
+    with _refresh_lock:
+        pending = [ticker for ticker in cached if ticker not in _refreshing]
+        _refreshing.update(pending)
+
+    claimed = []
+    try:
+        claimed = claim_refresh(redis_client, pending) if pending else []
+    finally:
+        # unclaimed tickers (another worker holds the lock, or the claim failed)
+        # must not stay marked, or this process would never refresh them again
+        with _refresh_lock:
+            _refreshing.difference_update(set(pending) - set(claimed))
+
+    if claimed:
+        _refresh_executor.submit(
+            _refresh_tickers, {ticker: cached[ticker] for ticker in claimed}
+        )
 
 
 @retry()
 def create_financial_data(
     tickers: List[str],
+    max_workers: int = 1,
+    mode: str = "full",
 ) -> List[pd.DataFrame]:  # target company+screener tickers
-    """Fetch financial data with ticker-level caching and smart comparison"""
+    """
+    Fetch financial data with ticker-level caching and digest-based change detection.
+
+    Cache misses are fanned out across tickers and statements on a thread pool
+    bounded by max_workers (1 keeps the fetch serial). Stale cache entries (see
+    backend/ingest/freshness.py) are served immediately and refreshed in the
+    background, requesting only the periods newer than the cached ones. Results
+    keep the order of tickers, then REQUIRED_STATEMENTS, so dfs[0] is still the
+    target company.
+
+    mode 'full' returns the whole statement history, 'latest' only the most
+    recent period (enough for the valuation path, much smaller payloads).
+    """
+    if mode not in FETCH_MODES:
+        raise ValueError(f"Unknown fetch mode: {mode}")
+
     if not api_key:
         return []
 
     if not tickers:
         return []
 
-    dfs = []
+    # Resolve every cache entry in one MGET, only misses go to the API
+    raw = read_tickers(redis_client, tickers)
+    cached = {
+        ticker: usable_entry(decode_cached_ticker(ticker, raw.get(ticker)), mode)
+        for ticker in tickers
+    }
+    misses = [ticker for ticker in tickers if cached[ticker] is None]
+    stale = {
+        ticker: cached[ticker]
+        for ticker in tickers
+        if cached[ticker] is not None and is_stale(cached[ticker])
+    }
+
+    fetched = {}
+    if misses:
+        if mode == "latest":
+            limits = {key: 1 for key in product(misses, REQUIRED_STATEMENTS)}
+            fetched = _fetch_tickers(misses, max_workers, limits, depth="latest")
+        else:
+            fetched = _fetch_tickers(misses, max_workers)
 
+    dfs = []
     for ticker in tickers:
-        cache_key = f"financial_data:{ticker}"
-        cached_data_found = False
-
-        # Try to get all statements for this ticker from cache
-        if redis_client:
-            try:
-                cached_data = redis_client.get(cache_key)
-                if cached_data:
-                    cached_dict = json.loads(cached_data)
-
-                    for statement_data in cached_dict:
-                        cached_df = pd.DataFrame(statement_data["data"])
-                        cached_df["ticker"] = ticker
-                        cached_df["statement_type"] = statement_data["statement_type"]
-                        dfs.append(cached_df)
-
-                    if logger:
-                        logger.info("Using cached data for %s", ticker)
-                    cached_data_found = True
-                    continue
-
-            except (json.JSONDecodeError, ConnectionError) as e:  # Specific exceptions
-                if logger:
-                    logger.warning("Cache read failed for %s: %s", cache_key, e)
-
-        # Fetch from API if not in cache
-        if not cached_data_found:
-            ticker_data = []  # Store all statements for this ticker
-
-            for statement in REQUIRED_STATEMENTS:
-                try:
-                    url = f"{BASE_URL}/{statement}/{ticker}?apikey={api_key}"
-                    response = requests.get(url, timeout=10)
-
-                    if response.status_code != 200:
-                        if logger:
-                            logger.warning(
-                                "Failed to fetch %s %s: %s",
-                                ticker,
-                                statement,
-                                response.status_code,
-                            )
-                        continue
-
-                    data = response.json()
-                    if not data:
-                        continue
-
-                    # Create DataFrame
-                    if isinstance(data, dict):
-                        df = pd.DataFrame([data])
-                    else:
-                        df = pd.DataFrame(data)
-
-                    df["ticker"] = ticker
-                    df["statement_type"] = statement
-
-                    # Store for caching
-                    ticker_data.append(
-                        {"statement_type": statement, "data": df.to_dict("records")}
-                    )
-                    dfs.append(df)
-
-                except (
-                    requests.RequestException,
-                    ValueError,
-                ) as e:
-                    if logger:
-                        logger.error("Error fetching %s %s: %s", ticker, statement, e)
-                    continue
-
-            # Cache all statements for this ticker with smart comparison
-            if redis_client and ticker_data:
-                try:
-                    # Check if data actually changed before notifying webhook
-                    should_notify = False
-
-                    try:
-                        old_cached_data = redis_client.get(cache_key)
-                        if old_cached_data:
-                            old_data = json.loads(old_cached_data)
-                            # Use sophisticated comparison instead of simple JSON comparison
-                            if not compare_ticker_data(ticker_data, old_data):
-                                should_notify = True
-                        else:
-                            should_notify = True  # First time caching this ticker
-                    except (json.JSONDecodeError, ConnectionError):
-                        should_notify = True  # Error reading cache, assume data changed
-
-                    # Always update cache with latest data
-                    redis_client.set(cache_key, json.dumps(ticker_data))
-
-                    # Only notify webhook if data actually changed
-                    if should_notify:
-                        notify_cache_expiry(cache_key)
-
-                except ConnectionError as e:
-                    if logger:
-                        logger.warning("Cache write failed for %s: %s", cache_key, e)
+        statements = cached[ticker] if cached[ticker] is not None else fetched[ticker]
+        dfs.extend(
+            statement["data"].head(1) if mode == "latest" else statement["data"]
+            for statement in statements
+        )
+
+    # Cache all fetched tickers and compare their digests
+    _cache_tickers(fetched)
+
+    if stale:
+        schedule_refresh(stale)
 
     if dfs and logger:
         logger.info("Fetched %d datasets", len(dfs))
@@ -276,140 +558,113 @@ def create_financial_data(
 
 
 def transpose_dataframes(dfs: List[pd.DataFrame]) -> List[pd.DataFrame]:
-    """Transpose DataFrames for better readability"""
+    """Transpose DataFrames for better readability (numeric metric rows, then the
+    text fields), meant for the export boundary only"""
     if not dfs:
         return []
 
     transposed_dfs = []
     for df in dfs:
-        if "date" in df.columns:
-            try:
-                transposed = df.set_index("date").T.reset_index()
-                transposed = transposed.rename(columns={"index": "metric"})
-                str_df = transposed.astype(str)
-                transposed_dfs.append(str_df)
-            except (ValueError, KeyError) as e:  # Specific exceptions
-                if logger:
-                    logger.warning("Transpose formatting failed: %s", e)
-                transposed_dfs.append(df)
-        else:
+        try:
+            transposed_dfs.append(statement_view(df, text=True))
+        except (ValueError, KeyError) as e:  # Specific exceptions
+            if logger:
+                logger.warning("Transpose formatting failed: %s", e)
             transposed_dfs.append(df)
 
     return transposed_dfs
 
 
-def convert_to_millions(dfs: List[pd.DataFrame]) -> List[pd.DataFrame]:
+def convert_to_millions(
+    dfs: List[pd.DataFrame], inplace: bool = False
+) -> List[pd.DataFrame]:
     """Convert large numeric values to millions for better readability"""
     if not dfs:
         return []
 
-    formatted_dfs = []
-    for df in dfs:
-        try:
-            df_formatted = df.copy()
-            numeric_columns = df_formatted.select_dtypes(include=["number"]).columns
-
-            for col in numeric_columns:
-                mask = df_formatted[col].abs() >= 1_000_000
-                df_formatted.loc[mask, col] = df_formatted.loc[mask, col] / 1_000_000
+    return normalize_frames(dfs, inplace=inplace)
 
-            formatted_dfs.append(df_formatted)
 
-        except (ValueError, KeyError) as e:  # Specific exceptions
-            if logger:
-                logger.warning("Error converting to millions: %s", e)
-            formatted_dfs.append(df)
-
-    return formatted_dfs
+def dollar_frames(
+    dfs: List[pd.DataFrame], rates: Dict[str, float], inplace: bool = False
+) -> List[pd.DataFrame]:
+    """Apply an FX rate table (units per USD) to every non-USD DataFrame."""
+    return normalize_frames(dfs, rates, millions=False, inplace=inplace)
 
 
-def convert_to_dollars(dfs: List[pd.DataFrame]) -> List[pd.DataFrame]:
-    """convets data frames currancies to american dollars"""
+def convert_to_dollars(
+    dfs: List[pd.DataFrame], inplace: bool = False
+) -> List[pd.DataFrame]:
+    """convets data frames currancies to american dollars, with every needed rate
+    resolved in (at most) one upstream call"""
     if not dfs:
         return []
 
-    converted_dfs = []
-    for df in dfs:
-        try:
-            # need to make sure we can access currency by df attributes
-            currency = df.attrs.get("currency", "USD")
-
-            if currency == "USD":
-                converted_dfs.append(df.copy())
-                continue
+    rates = get_rates(df.attrs.get("currency", "USD") for df in dfs)
+    return dollar_frames(dfs, rates, inplace)
 
-            df_converted = df.copy()
-            numeric_columns = df_converted.select_dtypes(include=["number"]).columns
 
-            # fetch conversion ratio
-            try:
-                currancy_url = (
-                    f"{CURRANCY_URL}/convert?from={currency}&to=USD"
-                    f"&amount=1&api_key={currancy_api_key}"
-                )
-                response = requests.get(currancy_url, timeout=4)
-                response.raise_for_status()
-                data = response.json()
-                ratio = data.get(
-                    "value"
-                )  # need to make sure api response provide "value"
-
-                if not ratio:
-                    converted_dfs.append(df)
-                    continue
-
-            except requests.RequestException as e:
-                if logger:
-                    logger.warning("Currency conversion failed for %s: %s", currency, e)
-                converted_dfs.append(df)
-                continue
-
-            for col in numeric_columns:
-                df_converted[col] = df_converted[col] / ratio
-
-            df_converted.attrs["currency"] = "USD"
-            converted_dfs.append(df_converted)
-
-        except (ValueError, KeyError, TypeError) as e:
-            if logger:
-                logger.warning("Failed to process dataframe: %s", e)
-            converted_dfs.append(df)
+def normalize_statements(
+    dfs: List[pd.DataFrame], inplace: bool = False, millions: bool = True
+) -> List[pd.DataFrame]:
+    """Convert frames to USD and scale them to millions in one pass per frame,
+    inplace skips the copies for frames the caller owns. millions=False keeps the
+    units, for computations mixing values (ratios, growth) that the per-value
+    million scaling would put in different units."""
+    if not dfs:
+        return []
 
-    return converted_dfs
+    rates = get_rates(df.attrs.get("currency", "USD") for df in dfs)
+    return normalize_frames(dfs, rates, millions=millions, inplace=inplace)
 
 
-def save_as_excel(dfs: List[pd.DataFrame]) -> Optional[BytesIO]:
-    """Save a list of DataFrames into an Excel file in memory."""
+def save_as_excel(
+    dfs: Union[List[pd.DataFrame], StatementStore],
+    target: Union[str, IO[bytes], None] = None,
+) -> Union[BytesIO, str, IO[bytes], None]:
+    """Save a list of typed statement DataFrames as an Excel workbook, one transposed,
+    number-formatted sheet per statement, rows streamed with constant memory.
+    Written to target (path or file object) when given, else to a new BytesIO."""
     if not dfs:
         if logger:
             logger.error("No DataFrames to save")
         return None
 
+    output = BytesIO() if target is None else target
     try:
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-            for i, df in enumerate(dfs):
-                sheet_name = f"Sheet_{i+1}"
-
-                if "ticker" in df.columns and "statement_type" in df.columns:
-                    ticker = df["ticker"].iloc[0]
-                    statement = df["statement_type"].iloc[0].replace("-statement", "")
-                    sheet_name = f"{ticker}_{statement}"[:31]
-
-                df.to_excel(writer, index=False, sheet_name=sheet_name)
-
+        write_workbook(output, dfs)
         return output
 
-    except (ValueError, KeyError, IOError) as e:  # Specific exceptions
+    except (ValueError, KeyError, IOError, XlsxWriterException) as e:
         if logger:
             logger.error("Error saving Excel: %s", e)
         return None
 
 
+def _analysis_view(
+    dfs: Union[List[pd.DataFrame], StatementStore], chunked: Optional[bool]
+) -> Tuple[pd.DataFrame, bool]:
+    """Combined view sent to the model, and whether it is analyzed in chunks
+    (by default when there are more than AI_CHUNK_TICKERS peers)"""
+    if isinstance(dfs, StatementStore):
+        combined_data = dfs.combined_view()
+    else:
+        combined_data = combined_view(dfs)
+    if chunked is None:
+        chunked = combined_data["ticker"].nunique() > AI_CHUNK_TICKERS + 1
+    return combined_data, chunked
+
+
 def ai_analysis(
-    dfs: List[pd.DataFrame], user_prompt: Optional[str] = None
+    dfs: Union[List[pd.DataFrame], StatementStore],
+    user_prompt: Optional[str] = None,
+    use_cache: bool = True,
+    chunked: Optional[bool] = None,
 ) -> Optional[str]:
-    """Perform AI analysis on financial data"""
+    """Perform AI analysis on financial data (statement frames or a StatementStore),
+    use_cache=False bypasses the AI response cache. chunked runs the map-reduce
+    analysis over chunks of peers, by default when there are more than
+    AI_CHUNK_TICKERS peers"""
     if not dfs:
         if logger:
             logger.error("No DataFrames available for analysis")
@@ -421,8 +676,15 @@ def ai_analysis(
         return None
 
     try:
-        combined_data = pd.concat(dfs, ignore_index=True) if len(dfs) > 1 else dfs[0]
-        result = extract_info_gemini(combined_data, user_prompt)
+        combined_data, chunked = _analysis_view(dfs, chunked)
+        if chunked:
+            result = extract_info_gemini_chunked(
+                combined_data, user_prompt, use_cache=use_cache
+            )
+        else:
+            result = extract_info_gemini(
+                combined_data, user_prompt, use_cache=use_cache
+            )
 
         if logger:
             logger.info("AI analysis completed")
@@ -434,8 +696,32 @@ def ai_analysis(
         return None
 
 
-def run_financial_analysis(user_prompt: Optional[str] = None) -> Optional[dict]:
-    """Run the complete financial analysis pipeline"""
+def stream_ai_analysis(
+    dfs: Union[List[pd.DataFrame], StatementStore],
+    user_prompt: str,
+    use_cache: bool = True,
+    chunked: Optional[bool] = None,
+) -> Iterator[str]:
+    """Streaming ai_analysis, yields the answer piece by piece as it is generated"""
+    if not dfs or not user_prompt:
+        if logger:
+            logger.warning("Nothing to analyze (no data or no prompt)")
+        return
+
+    combined_data, chunked = _analysis_view(dfs, chunked)
+    yield from stream_info_gemini(
+        combined_data, user_prompt, chunked=chunked, use_cache=use_cache
+    )
+
+
+def run_financial_analysis(
+    user_prompt: Optional[str] = None,
+    excel_path: Optional[str] = None,
+    use_cache: bool = True,
+) -> Optional[dict]:
+    """Run the complete financial analysis pipeline, the workbook is written to
+    excel_path when given (kept in memory otherwise), use_cache=False forces a
+    fresh AI answer"""
     if not ComparableSet or not hasattr(ComparableSet, "companies"):
         if logger:
             logger.error("ComparableSet not available")
@@ -453,27 +739,32 @@ def run_financial_analysis(user_prompt: Optional[str] = None) -> Optional[dict]:
             logger.error("No data fetched")
         return None
 
-    # Step 2: Process data
-    transposed_dfs = transpose_dataframes(dfs)
-    formatted_dfs = convert_to_millions(transposed_dfs)
+    # Step 2: Process data (frames are shared with the cache refresh, not inplace),
+    # they stay typed, transposing & formatting happen at the export boundary
+    # the AI aggregates ratios over the store, so it keeps the units, only the
+    # exported frames are scaled to millions
+    usd_frames = normalize_statements(dfs, millions=False)
+    frames = normalize_frames(usd_frames)
+    store = StatementStore.from_frames(usd_frames)
 
-    # Step 3: Save to Excel
-    excel_file = save_as_excel(formatted_dfs)
+    # Step 3: Save to Excel, from the frames: the store only holds numeric metrics
+    # and the sheets keep the text fields (reportedCurrency, period, link...)
+    excel_file = save_as_excel(frames, excel_path)
 
     # Step 4: AI Analysis
     analysis_result = None
     if user_prompt:
-        analysis_result = ai_analysis(formatted_dfs, user_prompt)
+        analysis_result = ai_analysis(store, user_prompt, use_cache=use_cache)
 
     pipeline_results = {
-        "data": formatted_dfs,
+        "data": store,
         "excel_file": excel_file,
         "ai_analysis": analysis_result,
-        "success": len(formatted_dfs) > 0,
+        "success": len(store) > 0,
     }
 
     if logger:
-        logger.info("Pipeline completed - %d datasets processed", len(formatted_dfs))
+        logger.info("Pipeline completed - %d datasets processed", len(store))
 
     return pipeline_results
 
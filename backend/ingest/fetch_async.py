@@ -0,0 +1,223 @@
+"""Async counterpart of the ingest layer (backend/ingest/fetch.py) for FastAPI routes."""
+
+import asyncio
+from typing import Dict, List, Optional
+
+import httpx
+import pandas as pd
+
+from backend.ingest.fetch import (
+    BASE_URL,
+    FETCH_MODES,
+    REQUIRED_STATEMENTS,
+    SCREENER_EXCHANGES,
+    SCREENER_MAX_PAGES,
+    SCREENER_PAGE_SIZE,
+    SCREENER_URL,
+    api_key,
+    cache_payloads,
+    decode_cached_ticker,
+    dollar_frames,
+    keep_screened,
+    next_page_bound,
+    schedule_refresh,
+    screener_query,
+    statement_entry,
+    statement_frame,
+    statement_params,
+    usable_entry,
+)
+from backend.ingest.freshness import is_stale
+from backend.ingest.fx_rates import get_rates_async
+from backend.ingest.screener_cache import (
+    read_screen_async,
+    screen_key,
+    screen_peers,
+    write_screen_async,
+)
+from backend.ingest.statement_cache import (
+    cache_key,
+    entry_depth,
+    read_tickers_async,
+    ticker_digest,
+    write_tickers_async,
+)
+from backend.ingest.webhook import notify_cache_update
+from backend.utils import http_client
+from backend.utils.logger import get_logger
+from backend.utils.redis_client import async_redis_client
+
+logger = get_logger(__file__)
+
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+async def screener_async(
+    mc: float,
+    beta: float,
+    country: str = "US",
+    limit: int = 100,
+    target: Optional[str] = None,
+    client: Optional[httpx.AsyncClient] = None,
+) -> List[str]:
+    """
+    Async screener: up to `limit` comparable tickers (never the target itself),
+    paged and cached exactly like the sync screener, without blocking.
+    """
+    key = screen_key(mc, beta, country, limit)
+    tickers = await read_screen_async(async_redis_client, key)
+    if tickers is not None:
+        return screen_peers(tickers, limit, target)
+
+    http = client or http_client.get_async_client()
+    base = screener_query(mc, beta, country, SCREENER_PAGE_SIZE)
+    high = base["marketCapLowerThan"]
+    seen, tickers = set(), []
+    for _ in range(SCREENER_MAX_PAGES):
+        try:
+            response = await http.get(
+                SCREENER_URL, params={**base, "marketCapLowerThan": high}
+            )
+            response.raise_for_status()
+            rows = response.json()
+        except (httpx.HTTPError, ValueError) as e:
+            logger.error("Failed to fetch comparables: %s", e)
+            break
+
+        tickers.extend(
+            row["symbol"]
+            for row in rows
+            if keep_screened(row, seen, SCREENER_EXCHANGES)
+        )
+        high = next_page_bound(rows, high, SCREENER_PAGE_SIZE)
+        if len(tickers) >= limit or high is None:
+            break
+
+    tickers = tickers[:limit]
+    await write_screen_async(async_redis_client, key, tickers)
+    return screen_peers(tickers, limit, target)
+
+
+async def _fetch_statement_async(
+    http: httpx.AsyncClient,
+    semaphore: asyncio.Semaphore,
+    ticker: str,
+    statement: str,
+    limit: Optional[int] = None,
+) -> Optional[pd.DataFrame]:
+    """Fetch a single statement of a ticker from FMP, None if unavailable."""
+    try:
+        async with semaphore:
+            url = f"{BASE_URL}/{statement}/{ticker}"
+            response = await http.get(url, params=statement_params(limit))
+
+        if response.status_code != 200:
+            logger.warning(
+                "Failed to fetch %s %s: %s", ticker, statement, response.status_code
+            )
+            return None
+
+        return statement_frame(response.json(), ticker, statement)
+
+    except (httpx.HTTPError, ValueError) as e:
+        logger.error("Error fetching %s %s: %s", ticker, statement, e)
+        return None
+
+
+async def _cache_tickers_async(tickers_data: Dict[str, list]) -> None:
+    """Cache all fetched tickers in one pipeline, broadcast the changed ones."""
+    payloads = cache_payloads(tickers_data)
+    if not async_redis_client or not payloads:
+        return
+
+    digests = {ticker: ticker_digest(tickers_data[ticker]) for ticker in payloads}
+    depths = {ticker: entry_depth(tickers_data[ticker]) for ticker in payloads}
+    previous = await write_tickers_async(async_redis_client, payloads, digests, depths)
+    # queued, the broadcasts are batched & sent off the event loop
+    for ticker, old_digest in previous.items():
+        if old_digest != digests[ticker]:
+            notify_cache_update(cache_key(ticker))
+
+
+async def create_financial_data_async(
+    tickers: List[str],
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    client: Optional[httpx.AsyncClient] = None,
+    mode: str = "full",
+) -> List[pd.DataFrame]:
+    """
+    Async create_financial_data: same caching, change detection, stale-while-revalidate
+    and result order (dfs[0] is the target company), with at most max_concurrency
+    requests in flight. mode is 'full' or 'latest', as in create_financial_data.
+    """
+    if mode not in FETCH_MODES:
+        raise ValueError(f"Unknown fetch mode: {mode}")
+
+    if not api_key or not tickers:
+        return []
+
+    raw = await read_tickers_async(async_redis_client, tickers)
+    cached = {
+        ticker: usable_entry(decode_cached_ticker(ticker, raw.get(ticker)), mode)
+        for ticker in tickers
+    }
+    misses = [ticker for ticker in tickers if cached[ticker] is None]
+    stale = {
+        ticker: cached[ticker]
+        for ticker in tickers
+        if cached[ticker] is not None and is_stale(cached[ticker])
+    }
+
+    http = client or http_client.get_async_client()
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    keys = [
+        (ticker, statement) for ticker in misses for statement in REQUIRED_STATEMENTS
+    ]
+    limit = 1 if mode == "latest" else None
+    results = await asyncio.gather(
+        *(_fetch_statement_async(http, semaphore, *key, limit) for key in keys)
+    )
+    fetched = dict(zip(keys, results))
+
+    tickers_data = {
+        ticker: [
+            statement_entry(statement, fetched[(ticker, statement)], mode)
+            for statement in REQUIRED_STATEMENTS
+            if fetched[(ticker, statement)] is not None
+        ]
+        for ticker in misses
+    }
+
+    dfs = []
+    for ticker in tickers:
+        statements = (
+            cached[ticker] if cached[ticker] is not None else tickers_data[ticker]
+        )
+        dfs.extend(
+            statement["data"].head(1) if mode == "latest" else statement["data"]
+            for statement in statements
+        )
+
+    await _cache_tickers_async(tickers_data)
+
+    if stale:
+        # refreshed on the sync ingest's background pool, served stale meanwhile
+        await asyncio.to_thread(schedule_refresh, stale)
+
+    if dfs:
+        logger.info("Fetched %d datasets", len(dfs))
+
+    return dfs
+
+
+async def convert_to_dollars_async(
+    dfs: List[pd.DataFrame], client: Optional[httpx.AsyncClient] = None
+) -> List[pd.DataFrame]:
+    """convert_to_dollars on the async rate table lookup"""
+    if not dfs:
+        return []
+
+    rates = await get_rates_async(
+        (df.attrs.get("currency", "USD") for df in dfs), client=client
+    )
+    return dollar_frames(dfs, rates)
@@ -0,0 +1,113 @@
+"""
+Freshness policy of cached financial statements, driven by the filing cadence:
+an entry stays fresh until the next 10-K/10-Q is expected to be filed
+(latest statement date + period length + filing lag), after which it is
+re-checked at most once per recheck interval until the new filing shows up.
+"""
+
+import os
+import time
+from typing import List, Optional
+
+import pandas as pd
+from dotenv import load_dotenv
+
+load_dotenv()
+
+STATEMENT_PERIOD = os.getenv("STATEMENT_PERIOD", "annual")
+PERIOD_DAYS = {"annual": 365, "quarter": 91}
+FILING_LAG_DAYS = {
+    "annual": int(os.getenv("ANNUAL_FILING_LAG_DAYS", "90")),  # 10-K deadline
+    "quarter": int(os.getenv("QUARTER_FILING_LAG_DAYS", "45")),  # 10-Q deadline
+}
+RECHECK_SECONDS = int(os.getenv("STATEMENT_RECHECK_SECONDS", str(24 * 3600)))
+MAX_AGE_SECONDS = int(os.getenv("STATEMENT_MAX_AGE_SECONDS", str(90 * 24 * 3600)))
+
+
+def latest_period_date(statements: List[dict]) -> Optional[pd.Timestamp]:
+    """Most recent statement 'date' across the cached statements of a ticker"""
+    dates = [
+        pd.to_datetime(statement["data"]["date"], errors="coerce").max()
+        for statement in statements
+        if "date" in statement["data"].columns
+    ]
+    dates = [date for date in dates if not pd.isna(date)]
+    return max(dates) if dates else None
+
+
+def fetched_at(statements: List[dict]) -> Optional[float]:
+    """When the oldest statement of the entry was fetched (epoch seconds)"""
+    times = [s["fetched_at"] for s in statements if s.get("fetched_at") is not None]
+    return min(times) if times else None
+
+
+def next_filing_due(
+    latest_date: pd.Timestamp, period: str = STATEMENT_PERIOD
+) -> pd.Timestamp:
+    """Date by which the filing after latest_date is expected to be available"""
+    return latest_date + pd.Timedelta(
+        days=PERIOD_DAYS[period] + FILING_LAG_DAYS[period]
+    )
+
+
+def is_stale(
+    statements: List[dict],
+    now: Optional[float] = None,
+    period: str = STATEMENT_PERIOD,
+) -> bool:
+    """
+    Whether a cached entry should be refreshed (it is still served meanwhile).
+
+    Args:
+        statements: decoded cache entry, {'statement_type', 'data', 'fetched_at'} dicts
+        now: epoch seconds, defaults to the current time
+        period: 'annual' or 'quarter' filing cadence
+
+    Returns:
+        bool: True once the next filing is due and the last check is older than
+        RECHECK_SECONDS, or the entry is older than MAX_AGE_SECONDS
+    """
+    now = time.time() if now is None else now
+    last_fetch = fetched_at(statements)
+    latest_date = latest_period_date(statements)
+
+    if last_fetch is not None and now - last_fetch >= MAX_AGE_SECONDS:
+        return True  # catch restatements even when no new period is due
+
+    if latest_date is None:
+        return last_fetch is not None and now - last_fetch >= RECHECK_SECONDS
+
+    if pd.Timestamp(now, unit="s") < next_filing_due(latest_date, period):
+        return False
+
+    # the next filing is due, poll for it once per recheck interval
+    return last_fetch is None or now - last_fetch >= RECHECK_SECONDS
+
+
+def incremental_limit(
+    statement: dict,
+    now: Optional[float] = None,
+    period: str = STATEMENT_PERIOD,
+) -> Optional[int]:
+    """
+    Number of periods to request when refreshing a cached statement: the periods
+    elapsed since its latest 'date', plus the latest one again to pick up restatements.
+    None means the whole history is needed (no usable date in cache).
+    """
+    latest_date = latest_period_date([statement])
+    if latest_date is None:
+        return None
+
+    now = time.time() if now is None else now
+    elapsed_days = (pd.Timestamp(now, unit="s") - latest_date).days
+    return max(0, elapsed_days) // PERIOD_DAYS[period] + 1
+
+
+def merge_periods(cached_df: pd.DataFrame, new_df: pd.DataFrame) -> pd.DataFrame:
+    """Merge newly fetched periods into a cached series, new rows win on equal dates"""
+    if "date" not in cached_df.columns or "date" not in new_df.columns:
+        return new_df
+
+    merged = pd.concat([new_df, cached_df], ignore_index=True)
+    merged = merged.drop_duplicates(subset="date", keep="first")
+    return merged.sort_values("date", ascending=False, ignore_index=True)
@@ -0,0 +1,206 @@
+"""
+FX rate table used to convert statements to USD (backend/ingest/fetch.py & fetch_async.py).
+
+Rates are units of a currency per 1 USD (EUR -> 0.92), so an amount in that currency
+divided by its rate is the amount in USD. Every currency missing from the table is
+fetched in a single fastforex fetch-multi request, rates are kept in-process and in
+redis (fx_rate:{currency}) for FX_RATE_TTL_SECONDS.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+import httpx
+import redis
+import requests
+from dotenv import load_dotenv
+
+from backend.utils import http_client
+from backend.utils.logger import get_logger
+from backend.utils.redis_client import async_redis_client, redis_client
+
+load_dotenv()
+logger = get_logger(__file__)
+
+currancy_api_key = os.getenv("CURRANCY-API-KEY")
+CURRANCY_URL = "https://api.beta.fastforex.io"
+BASE_CURRENCY = "USD"
+FX_NAMESPACE = "fx_rate"
+FX_RATE_TTL_SECONDS = int(os.getenv("FX_RATE_TTL_SECONDS", str(6 * 3600)))
+
+_rates: Dict[str, tuple] = {}  # currency -> (rate, expires_at)
+_lock = threading.Lock()
+
+
+def fx_key(currency: str) -> str:
+    """Redis key holding the USD rate of a currency"""
+    return f"{FX_NAMESPACE}:{currency}"
+
+
+def _normalize(currencies: Iterable[str]) -> List[str]:
+    return sorted({c.upper() for c in currencies if c} - {BASE_CURRENCY})
+
+
+def _local_rates(currencies: List[str]) -> Dict[str, float]:
+    now = time.time()
+    with _lock:
+        return {
+            currency: _rates[currency][0]
+            for currency in currencies
+            if currency in _rates and _rates[currency][1] > now
+        }
+
+
+def _store_local(rates: Dict[str, float]) -> None:
+    expires_at = time.time() + FX_RATE_TTL_SECONDS
+    with _lock:
+        for currency, rate in rates.items():
+            _rates[currency] = (rate, expires_at)
+
+
+def _parse_cached(currencies: List[str], values) -> Dict[str, float]:
+    return {
+        currency: float(value)
+        for currency, value in zip(currencies, values)
+        if value is not None
+    }
+
+
+def _multi_params(currencies: List[str]) -> dict:
+    return {
+        "from": BASE_CURRENCY,
+        "to": ",".join(currencies),
+        "api_key": currancy_api_key,
+    }
+
+
+def _parse_multi(currencies: List[str], data: dict) -> Dict[str, float]:
+    """Keep the positive rates of the requested currencies from a fetch-multi reply"""
+    results = data.get("results") or {}
+    rates = {}
+    for currency in currencies:
+        try:
+            rate = float(results[currency])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if rate > 0:
+            rates[currency] = rate
+    return rates
+
+
+def _read_redis(currencies: List[str]) -> Dict[str, float]:
+    if not redis_client or not currencies:
+        return {}
+    try:
+        values = redis_client.mget([fx_key(currency) for currency in currencies])
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("FX rate cache read failed: %s", e)
+        return {}
+    return _parse_cached(currencies, values)
+
+
+def _write_redis(rates: Dict[str, float]) -> None:
+    if not redis_client or not rates:
+        return
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        for currency, rate in rates.items():
+            pipe.set(fx_key(currency), rate, ex=FX_RATE_TTL_SECONDS)
+        pipe.execute()
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("FX rate cache write failed: %s", e)
+
+
+def fetch_rates(currencies: List[str]) -> Dict[str, float]:
+    """All requested rates in one fastforex fetch-multi call, {} on failure"""
+    if not currencies:
+        return {}
+    try:
+        response = http_client.get(
+            f"{CURRANCY_URL}/fetch-multi", params=_multi_params(currencies)
+        )
+        response.raise_for_status()
+        return _parse_multi(currencies, response.json())
+    except (requests.RequestException, ValueError) as e:
+        logger.warning("FX rates fetch failed for %s: %s", currencies, e)
+        return {}
+
+
+def get_rates(currencies: Iterable[str]) -> Dict[str, float]:
+    """
+    Units per USD of every requested currency, from the in-process table, then redis,
+    then a single upstream request for whatever is still missing.
+
+    Returns:
+        Dict[str, float]: rate per currency, currencies that could not be resolved
+        are left out (USD is never included)
+    """
+    currencies = _normalize(currencies)
+    rates = _local_rates(currencies)
+
+    missing = [currency for currency in currencies if currency not in rates]
+    cached = _read_redis(missing)
+    _store_local(cached)
+    rates.update(cached)
+
+    missing = [currency for currency in missing if currency not in cached]
+    fetched = fetch_rates(missing)
+    _store_local(fetched)
+    _write_redis(fetched)
+    rates.update(fetched)
+
+    return rates
+
+
+async def get_rates_async(
+    currencies: Iterable[str], client: Optional[httpx.AsyncClient] = None
+) -> Dict[str, float]:
+    """Async get_rates on the redis.asyncio client and the shared httpx client"""
+    currencies = _normalize(currencies)
+    rates = _local_rates(currencies)
+
+    missing = [currency for currency in currencies if currency not in rates]
+    if async_redis_client and missing:
+        try:
+            values = await async_redis_client.mget([fx_key(c) for c in missing])
+            cached = _parse_cached(missing, values)
+        except (redis.RedisError, ConnectionError) as e:
+            logger.warning("FX rate cache read failed: %s", e)
+            cached = {}
+        _store_local(cached)
+        rates.update(cached)
+        missing = [currency for currency in missing if currency not in cached]
+
+    if not missing:
+        return rates
+
+    http = client or http_client.get_async_client()
+    try:
+        response = await http.get(
+            f"{CURRANCY_URL}/fetch-multi", params=_multi_params(missing)
+        )
+        response.raise_for_status()
+        fetched = _parse_multi(missing, response.json())
+    except (httpx.HTTPError, ValueError) as e:
+        logger.warning("FX rates fetch failed for %s: %s", missing, e)
+        return rates
+
+    _store_local(fetched)
+    if async_redis_client and fetched:
+        try:
+            async with async_redis_client.pipeline(transaction=False) as pipe:
+                for currency, rate in fetched.items():
+                    pipe.set(fx_key(currency), rate, ex=FX_RATE_TTL_SECONDS)
+                await pipe.execute()
+        except (redis.RedisError, ConnectionError) as e:
+            logger.warning("FX rate cache write failed: %s", e)
+    rates.update(fetched)
+    return rates
+
+
+def clear_local() -> None:
+    """Forget the in-process rates (redis entries expire on their own)"""
+    with _lock:
+        _rates.clear()
@@ -0,0 +1,104 @@
+"""
+Redis cache of yfinance metadata (used by backend/ingest/ticker_info.py).
+
+Only the fields the app reads are kept, split by how fast they change:
+slow fields (name, sector...) under ticker_info_slow:{ticker} for
+TICKER_INFO_SLOW_TTL_SECONDS, fast market fields (market cap, beta...) under
+ticker_info_fast:{ticker} for TICKER_INFO_FAST_TTL_SECONDS.
+A ticker is served from cache only while both halves are present.
+"""
+
+import json
+import os
+from typing import Dict, List, Optional
+
+import redis
+from dotenv import load_dotenv
+
+from backend.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__file__)
+
+INFO_NAMESPACE = "ticker_info"
+SLOW_TTL_SECONDS = int(os.getenv("TICKER_INFO_SLOW_TTL_SECONDS", str(7 * 24 * 3600)))
+FAST_TTL_SECONDS = int(os.getenv("TICKER_INFO_FAST_TTL_SECONDS", str(3600)))
+
+SLOW_FIELDS = (
+    "longName",
+    "shortName",
+    "sector",
+    "industry",
+    "country",
+    "currency",
+    "financialCurrency",
+    "exchange",
+)
+FAST_FIELDS = (
+    "marketCap",
+    "beta",
+    "sharesOutstanding",
+    "currentPrice",
+    "enterpriseValue",
+)
+
+
+def slow_key(ticker: str) -> str:
+    """Redis key of a ticker's slow-changing fields"""
+    return f"{INFO_NAMESPACE}_slow:{ticker}"
+
+
+def fast_key(ticker: str) -> str:
+    """Redis key of a ticker's fast-changing market fields"""
+    return f"{INFO_NAMESPACE}_fast:{ticker}"
+
+
+def project(info: dict) -> dict:
+    """The cached subset of a yfinance info dict"""
+    return {field: info.get(field) for field in SLOW_FIELDS + FAST_FIELDS}
+
+
+def read_infos(client, tickers: List[str]) -> Dict[str, dict]:
+    """
+    Cached info of many tickers in one MGET (slow & fast keys interleaved).
+
+    Returns:
+        Dict[str, dict]: info per ticker with both halves cached, misses left out
+    """
+    if not client or not tickers:
+        return {}
+
+    keys = [key for ticker in tickers for key in (slow_key(ticker), fast_key(ticker))]
+    try:
+        values = client.mget(keys)
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Ticker info cache read failed: %s", e)
+        return {}
+
+    infos = {}
+    for ticker, slow, fast in zip(tickers, values[::2], values[1::2]):
+        if slow is None or fast is None:
+            continue
+        try:
+            infos[ticker] = {**json.loads(slow), **json.loads(fast)}
+        except ValueError:
+            continue
+    return infos
+
+
+def write_infos(client, infos: Dict[str, Optional[dict]]) -> None:
+    """Cache the slow & fast halves of many infos in one pipeline, skipping empty ones"""
+    infos = {ticker: info for ticker, info in infos.items() if info}
+    if not client or not infos:
+        return
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        for ticker, info in infos.items():
+            slow = {field: info.get(field) for field in SLOW_FIELDS}
+            fast = {field: info.get(field) for field in FAST_FIELDS}
+            pipe.set(slow_key(ticker), json.dumps(slow), ex=SLOW_TTL_SECONDS)
+            pipe.set(fast_key(ticker), json.dumps(fast), ex=FAST_TTL_SECONDS)
+        pipe.execute()
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Ticker info cache write failed: %s", e)
@@ -0,0 +1,101 @@
+"""
+Unit & currency normalization of statement DataFrames (used by backend/ingest/fetch.py).
+
+Currency conversion and million-scaling run as one vectorized pass over the numeric
+block of each frame: values are divided by the FX rate (units per USD), then every
+value of at least 1,000,000 is expressed in millions.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.utils.logger import get_logger
+
+logger = get_logger(__file__)
+
+MILLION = 1_000_000
+
+
+def scale_frame(
+    df: pd.DataFrame,
+    divisor: float = 1.0,
+    millions: bool = True,
+    inplace: bool = False,
+) -> pd.DataFrame:
+    """
+    Divide the numeric columns of a frame by `divisor`, then scale values of at least
+    a million to millions, in a single pass over the numeric block.
+
+    Args:
+        df (pd.DataFrame): statement frame
+        divisor (float): FX rate (units per USD), 1 leaves the currency as is
+        millions (bool): whether to scale large values to millions
+        inplace (bool): write the result into df instead of a shallow copy
+
+    Returns:
+        pd.DataFrame: the scaled frame, df itself when nothing had to change
+    """
+    numeric_columns = df.select_dtypes(include=["number"]).columns
+    if numeric_columns.empty or (divisor == 1 and not millions):
+        return df
+
+    values = df[numeric_columns].to_numpy(dtype="float64", copy=True)
+    if divisor != 1:
+        values /= divisor
+    if millions:
+        large = np.abs(values) >= MILLION
+        values[large] /= MILLION
+
+    # shallow copies are cheap under copy-on-write, only the numeric block is new
+    out = df if inplace else df.copy(deep=False)
+    out[numeric_columns] = values
+    return out
+
+
+def normalize_frames(
+    dfs: List[pd.DataFrame],
+    rates: Optional[Dict[str, float]] = None,
+    millions: bool = True,
+    inplace: bool = False,
+) -> List[pd.DataFrame]:
+    """
+    Convert every frame to USD with an FX rate table and/or scale it to millions.
+
+    Args:
+        dfs (List[pd.DataFrame]): frames, their currency read from attrs["currency"]
+        rates (Optional[Dict[str, float]]): units per USD, None skips currency conversion
+        millions (bool): whether to scale large values to millions
+        inplace (bool): mutate the frames instead of returning shallow copies,
+            only for frames the caller owns
+
+    Returns:
+        List[pd.DataFrame]: normalized frames, in input order; frames without a rate
+        keep their currency, frames that fail to convert are returned untouched
+    """
+    normalized = []
+    for df in dfs:
+        divisor = 1.0
+        if rates is not None:
+            currency = df.attrs.get("currency", "USD")
+            if currency != "USD":
+                divisor = rates.get(str(currency).upper())
+                if not divisor:
+                    logger.warning("No USD rate for %s, left unconverted", currency)
+                    divisor = 1.0
+
+        try:
+            out = scale_frame(df, divisor, millions, inplace)
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Failed to normalize dataframe: %s", e)
+            normalized.append(df)
+            continue
+
+        if divisor != 1:
+            if out is df and not inplace:
+                out = df.copy(deep=False)
+            out.attrs["currency"] = "USD"
+        normalized.append(out)
+
+    return normalized
@@ -0,0 +1,70 @@
+"""
+Export-boundary views of statement DataFrames (Excel sheets, AI prompt csv).
+
+The pipeline works on typed, period-per-row frames (numeric columns stay float64);
+transposing to a metric x period layout and number formatting only happen here,
+right before the data leaves the process.
+"""
+
+from typing import List
+
+import pandas as pd
+
+META_COLUMNS = ("date", "ticker", "statement_type")
+NUMBER_FORMAT = "%.2f"
+EXCEL_NUMBER_FORMAT = "#,##0.00"
+
+
+def sheet_name(df: pd.DataFrame, index: int) -> str:
+    """Excel sheet name of a statement frame, '<ticker>_<statement>' when known"""
+    if "ticker" in df.columns and "statement_type" in df.columns and not df.empty:
+        ticker = df["ticker"].iloc[0]
+        statement = str(df["statement_type"].iloc[0]).replace("-statement", "")
+        return f"{ticker}_{statement}"[:31]
+    return f"Sheet_{index + 1}"
+
+
+def statement_view(
+    df: pd.DataFrame, labelled: bool = False, text: bool = False
+) -> pd.DataFrame:
+    """
+    Metric x period view of a typed statement: one row per numeric metric, one
+    column per statement date. Only numeric columns are transposed by default, so
+    the period columns keep a numeric dtype instead of becoming strings.
+    text appends the non-numeric fields (reportedCurrency, period, link...) as
+    string rows after the metrics, the period columns then hold objects (exports).
+    labelled prepends the ticker & statement_type columns (for combined exports).
+    """
+    if "date" not in df.columns:
+        return df
+
+    metrics = [
+        col
+        for col in df.select_dtypes(include=["number"]).columns
+        if col not in META_COLUMNS
+    ]
+    view = df.set_index("date")[metrics].T
+    if text:
+        fields = [col for col in df.columns if col not in (*META_COLUMNS, *metrics)]
+        if fields:
+            view = pd.concat([view.astype(object), df.set_index("date")[fields].T])
+    view.columns = [str(date) for date in view.columns]
+    view = view.rename_axis("metric").reset_index()
+
+    if labelled:
+        for position, col in enumerate(("ticker", "statement_type")):
+            value = df[col].iloc[0] if col in df.columns and not df.empty else None
+            view.insert(position, col, value)
+    return view
+
+
+def combined_view(dfs: List[pd.DataFrame]) -> pd.DataFrame:
+    """Labelled statement views of many frames stacked into one"""
+    return pd.concat(
+        [statement_view(df, labelled=True) for df in dfs], ignore_index=True
+    )
+
+
+def prompt_csv(df: pd.DataFrame) -> str:
+    """Csv text of a frame for an LLM prompt, floats rendered with NUMBER_FORMAT"""
+    return df.to_csv(index=False, float_format=NUMBER_FORMAT)
@@ -0,0 +1,147 @@
+"""
+Redis cache of FMP company-screener results (used by backend/ingest/fetch.py & fetch_async.py).
+
+Target market cap & beta are snapped to buckets before the screen is built, so
+near-identical targets produce the same query and share one cache entry:
+market caps on a log scale (SCREENER_MC_BUCKETS_PER_DECADE steps per 10x),
+betas on a linear SCREENER_BETA_STEP grid.
+Entries live for SCREENER_CACHE_TTL_SECONDS, invalidate_screens() drops them early;
+its /expire_screener_cache/ hook is registered here on the cache endpoints app of
+backend/utils/redis_client.py, which knows nothing about the ingest layer.
+"""
+
+import json
+import math
+import os
+from typing import List, Optional
+
+import redis
+from dotenv import load_dotenv
+from fastapi import Request
+
+from backend.utils.logger import get_logger
+from backend.utils.redis_client import app, redis_client
+from backend.utils.redis_keys import unlink_pattern
+
+load_dotenv()
+logger = get_logger(__file__)
+
+SCREENER_NAMESPACE = "screener"
+SCREENER_CACHE_TTL_SECONDS = int(os.getenv("SCREENER_CACHE_TTL_SECONDS", str(6 * 3600)))
+MC_BUCKETS_PER_DECADE = int(os.getenv("SCREENER_MC_BUCKETS_PER_DECADE", "10"))
+BETA_STEP = float(os.getenv("SCREENER_BETA_STEP", "0.05"))
+
+
+def mc_bucket(mc: float) -> int:
+    """Log-scale bucket index of a market cap"""
+    return round(math.log10(mc) * MC_BUCKETS_PER_DECADE)
+
+
+def beta_bucket(beta: float) -> int:
+    """Linear bucket index of a beta"""
+    return round(beta / BETA_STEP)
+
+
+def bucketed(mc: float, beta: float) -> tuple:
+    """Representative (market cap, beta) of the buckets the target falls in"""
+    mc_value = 10 ** (mc_bucket(mc) / MC_BUCKETS_PER_DECADE)
+    beta_value = round(beta_bucket(beta) * BETA_STEP, 6)
+    return mc_value, beta_value
+
+
+def screen_key(mc: float, beta: float, country: str, limit: int) -> str:
+    """Redis key of a screen, built from the bucketed bounds, country and limit"""
+    return (
+        f"{SCREENER_NAMESPACE}:{country.upper()}:{limit}:"
+        f"{mc_bucket(mc)}:{beta_bucket(beta)}"
+    )
+
+
+def _decode(raw) -> Optional[List[str]]:
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except ValueError:
+        return None
+
+
+def read_screen(client, key: str) -> Optional[List[str]]:
+    """Cached tickers of a screen, None on a miss or error"""
+    if not client:
+        return None
+    try:
+        return _decode(client.get(key))
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Screener cache read failed for %s: %s", key, e)
+        return None
+
+
+def write_screen(client, key: str, tickers: List[str]) -> None:
+    """Cache the tickers of a screen, empty results are not cached"""
+    if not client or not tickers:
+        return
+    try:
+        client.set(key, json.dumps(tickers), ex=SCREENER_CACHE_TTL_SECONDS)
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Screener cache write failed for %s: %s", key, e)
+
+
+def screen_peers(
+    tickers: List[str], limit: int, target: Optional[str] = None
+) -> List[str]:
+    """Peers of a target from a cached screen: the shared screen holds `limit`
+    symbols of the whole bucket, the target is dropped here, never when caching"""
+    return [ticker for ticker in tickers if ticker != target][:limit]
+
+
+async def read_screen_async(client, key: str) -> Optional[List[str]]:
+    """Async read_screen on a redis.asyncio client"""
+    if not client:
+        return None
+    try:
+        return _decode(await client.get(key))
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Screener cache read failed for %s: %s", key, e)
+        return None
+
+
+async def write_screen_async(client, key: str, tickers: List[str]) -> None:
+    """Async write_screen on a redis.asyncio client"""
+    if not client or not tickers:
+        return
+    try:
+        await client.set(key, json.dumps(tickers), ex=SCREENER_CACHE_TTL_SECONDS)
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Screener cache write failed for %s: %s", key, e)
+
+
+def invalidate_screens(client, country: Optional[str] = None) -> int:
+    """
+    Drop cached screens (of one country, or all), e.g. after a universe or
+    market data change. Keys are found with SCAN and removed with UNLINK.
+
+    Returns:
+        int: number of keys removed
+    """
+    pattern = f"{SCREENER_NAMESPACE}:{country.upper() if country else '*'}:*"
+    return unlink_pattern(client, pattern)
+
+
+@app.post("/expire_screener_cache/")
+async def expire_screener_cache(request: Request):
+    """
+    Invalidation hook of the screener cache, drops every cached screen or only
+    those of the 'country' given in the JSON body.
+
+    Returns:
+        dict: Status and number of screens removed.
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        data = {}
+    if not redis_client:
+        return {"status": "info", "message": "Redis client not available"}
+    removed = invalidate_screens(redis_client, data.get("country"))
+    return {"status": "success", "message": f"Removed {removed} cached screens"}
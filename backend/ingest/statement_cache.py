@@ -0,0 +1,213 @@
+"""
+Batched redis access for the per-ticker financial statement cache
+(financial_data:{ticker} payloads, financial_data_digest:{ticker} content digests,
+one digest per entry depth), used by backend/ingest/fetch.py & fetch_async.py.
+
+Sync reads go through an in-process tier first (local_payloads), kept coherent across
+workers by the pub/sub invalidation bus (backend/utils/invalidation_bus.py).
+"""
+
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+import pandas as pd
+import redis
+from dotenv import load_dotenv
+
+from backend.utils.invalidation_bus import LocalCache, ensure_listener
+from backend.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__file__)
+
+CACHE_NAMESPACE = "financial_data"
+# hard backstop only, freshness is decided by backend/ingest/freshness.py
+CACHE_TTL_SECONDS = int(os.getenv("STATEMENT_CACHE_TTL_SECONDS", str(400 * 24 * 3600)))
+REFRESH_LOCK_SECONDS = int(os.getenv("STATEMENT_REFRESH_LOCK_SECONDS", "120"))
+
+# raw payloads by cache key, served only while invalidations are heard
+local_payloads = LocalCache(CACHE_NAMESPACE)
+
+
+def cache_key(ticker: str) -> str:
+    """Redis key holding all cached statements of a ticker"""
+    return f"{CACHE_NAMESPACE}:{ticker}"
+
+
+def digest_key(ticker: str, depth: str = "full") -> str:
+    """Redis key holding the content digest of a ticker's cached statements, one per
+    depth so that replacing a 'latest' entry by a 'full' one (or back) is no change"""
+    suffix = "" if depth == "full" else f":{depth}"
+    return f"{CACHE_NAMESPACE}_digest:{ticker}{suffix}"
+
+
+def entry_depth(ticker_data: List[dict]) -> str:
+    """'latest' if any statement of a ticker entry only holds the latest period"""
+    if any(statement.get("depth") == "latest" for statement in ticker_data):
+        return "latest"
+    return "full"
+
+
+def refresh_key(ticker: str) -> str:
+    """Redis key locking the background refresh of a ticker across workers"""
+    return f"{CACHE_NAMESPACE}_refresh:{ticker}"
+
+
+def read_tickers(client, tickers: List[str]) -> Dict[str, Optional[bytes]]:
+    """
+    Resolve the cache entries of all tickers from the local tier, the rest in a
+    single MGET round-trip.
+
+    Returns:
+        Dict[str, Optional[bytes]]: raw payload per ticker, None on a miss or error
+    """
+    if not client or not tickers:
+        return dict.fromkeys(tickers)
+
+    ensure_listener(client)
+    payloads = {ticker: local_payloads.get(cache_key(ticker)) for ticker in tickers}
+    misses = [ticker for ticker, payload in payloads.items() if payload is None]
+    if not misses:
+        return payloads
+
+    try:
+        values = client.mget([cache_key(ticker) for ticker in misses])
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Cache read failed for %d tickers: %s", len(misses), e)
+        return payloads
+
+    for ticker, value in zip(misses, values):
+        payloads[ticker] = value
+        local_payloads.set(cache_key(ticker), value)
+    return payloads
+
+
+def statement_digest(df: pd.DataFrame) -> str:
+    """
+    Canonical content digest of a statement, independent of column order:
+    column names plus a vectorized per-row hash of the values.
+    """
+    columns = sorted(df.columns, key=str)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update("\x1f".join(map(str, columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df[columns], index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def ticker_digest(ticker_data: List[dict]) -> str:
+    """Digest of a whole ticker entry, built from its per-statement digests"""
+    return ",".join(
+        f"{statement['statement_type']}={statement['digest']}"
+        for statement in sorted(ticker_data, key=lambda x: x["statement_type"])
+    )
+
+
+def _decode_digest(value) -> Optional[str]:
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def write_tickers(
+    client,
+    payloads: Dict[str, bytes],
+    digests: Dict[str, str],
+    depths: Optional[Dict[str, str]] = None,
+) -> Dict[str, Optional[str]]:
+    """
+    Write the payloads & digests of many tickers in one pipeline. SET ... GET on the
+    digest key hands back the digest stored before the write, so "did anything change"
+    is a string comparison with no extra read and no payload decoding. The digest is
+    stored under the entry's depth (depths, 'full' by default) and compared with the
+    previous digest of the same depth only.
+
+    Returns:
+        Dict[str, Optional[str]]: previous digest per written ticker, None if unknown
+    """
+    if not client or not payloads:
+        return {}
+
+    try:
+        depths = depths or {}
+        pipe = client.pipeline(transaction=False)
+        for ticker, payload in payloads.items():
+            pipe.set(cache_key(ticker), payload, ex=CACHE_TTL_SECONDS)
+            pipe.set(
+                digest_key(ticker, depths.get(ticker, "full")),
+                digests[ticker],
+                ex=CACHE_TTL_SECONDS,
+                get=True,
+            )
+        results = pipe.execute()
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Cache write failed for %d tickers: %s", len(payloads), e)
+        return {}
+
+    for ticker, payload in payloads.items():
+        local_payloads.set(cache_key(ticker), payload)
+    return dict(zip(payloads, map(_decode_digest, results[1::2])))
+
+
+def claim_refresh(client, tickers: List[str]) -> List[str]:
+    """
+    Take the cross-worker refresh lock of each ticker (SET NX with a short TTL) in one
+    pipeline, so a stale entry is refreshed by a single gunicorn worker.
+
+    Returns:
+        List[str]: tickers this process should refresh
+    """
+    if not client or not tickers:
+        return list(tickers)
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        for ticker in tickers:
+            pipe.set(refresh_key(ticker), 1, nx=True, ex=REFRESH_LOCK_SECONDS)
+        claimed = pipe.execute()
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Refresh lock failed for %d tickers: %s", len(tickers), e)
+        return []
+
+    return [ticker for ticker, ok in zip(tickers, claimed) if ok]
+
+
+async def read_tickers_async(client, tickers: List[str]) -> Dict[str, Optional[bytes]]:
+    """Async read_tickers on a redis.asyncio client"""
+    if not client or not tickers:
+        return dict.fromkeys(tickers)
+
+    try:
+        values = await client.mget([cache_key(ticker) for ticker in tickers])
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Cache read failed for %d tickers: %s", len(tickers), e)
+        return dict.fromkeys(tickers)
+
+    return dict(zip(tickers, values))
+
+
+async def write_tickers_async(
+    client,
+    payloads: Dict[str, bytes],
+    digests: Dict[str, str],
+    depths: Optional[Dict[str, str]] = None,
+) -> Dict[str, Optional[str]]:
+    """Async write_tickers on a redis.asyncio client"""
+    if not client or not payloads:
+        return {}
+
+    try:
+        depths = depths or {}
+        async with client.pipeline(transaction=False) as pipe:
+            for ticker, payload in payloads.items():
+                pipe.set(cache_key(ticker), payload, ex=CACHE_TTL_SECONDS)
+                pipe.set(
+                    digest_key(ticker, depths.get(ticker, "full")),
+                    digests[ticker],
+                    ex=CACHE_TTL_SECONDS,
+                    get=True,
+                )
+            results = await pipe.execute()
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Cache write failed for %d tickers: %s", len(payloads), e)
+        return {}
+
+    return dict(zip(payloads, map(_decode_digest, results[1::2])))
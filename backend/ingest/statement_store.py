@@ -0,0 +1,167 @@
+"""
+All statements of a run held as one tidy long-format table:
+(ticker, statement_type, date, metric, value), with categorical ticker/statement/metric
+columns (categories in input order) and values downcast to float32 when that is
+lossless.
+
+Lookups (latest value of a metric, a metric's history) are served from indexes built
+once, instead of re-scanning a list of per-ticker DataFrames. Iterating the store yields
+the classic wide per ticker x statement frames, so it can be handed to the exporters.
+"""
+
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backend.ingest.presentation import META_COLUMNS
+
+COLUMNS = ["ticker", "statement_type", "date", "metric", "value"]
+
+
+def _downcast(values: np.ndarray) -> np.ndarray:
+    """float32 when every value survives the round-trip, float64 otherwise"""
+    narrow = values.astype(np.float32)
+    if np.array_equal(narrow.astype(np.float64), values, equal_nan=True):
+        return narrow
+    return values
+
+
+def _long_frame(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Melt the numeric metrics of one statement frame into long format"""
+    if df.empty or "date" not in df.columns:
+        return None
+
+    metrics = [
+        col
+        for col in df.select_dtypes(include=["number"]).columns
+        if col not in META_COLUMNS
+    ]
+    if not metrics:
+        return None
+
+    values = df[metrics].to_numpy(dtype=np.float64)
+    n_dates, n_metrics = values.shape
+    return pd.DataFrame(
+        {
+            "ticker": df["ticker"].iloc[0] if "ticker" in df.columns else None,
+            "statement_type": (
+                df["statement_type"].iloc[0] if "statement_type" in df.columns else None
+            ),
+            "date": np.repeat(
+                pd.to_datetime(df["date"], errors="coerce").to_numpy(), n_metrics
+            ),
+            "metric": np.tile(np.asarray(metrics, dtype=object), n_dates),
+            "value": values.ravel(),
+        }
+    )
+
+
+class StatementStore:
+    """Long-format, categorical store of every statement fetched for a run"""
+
+    def __init__(self, data: pd.DataFrame, currencies: Optional[Dict] = None):
+        data = data.reindex(columns=COLUMNS)
+        # categories in first-seen order, so sorting & grouping keep the input order
+        # (target first, then the peers) instead of an alphabetical one
+        for col in ("ticker", "statement_type", "metric"):
+            data[col] = pd.Categorical(
+                data[col], categories=data[col].dropna().unique()
+            )
+        data["value"] = _downcast(data["value"].to_numpy(dtype=np.float64))
+        self.data = data.sort_values(
+            ["ticker", "statement_type", "metric", "date"],
+            ascending=[True, True, True, False],
+            ignore_index=True,
+        )
+        self.currencies = currencies or {}
+        self._n_frames = len(
+            self.data[["ticker", "statement_type"]].drop_duplicates().dropna()
+        )
+
+        # newest non-null value per (ticker, metric) & (ticker, statement, metric)
+        known = self.data.dropna(subset=["value", "date"])
+        self._latest = known.groupby(["ticker", "metric"], observed=True)[
+            "value"
+        ].first()
+        self._latest_by_statement = known.groupby(
+            ["ticker", "statement_type", "metric"], observed=True
+        )["value"].first()
+
+    @classmethod
+    def from_frames(cls, dfs: List[pd.DataFrame]) -> "StatementStore":
+        """Build the store from the per ticker x statement frames of the ingest path"""
+        parts = [part for part in map(_long_frame, dfs) if part is not None]
+        data = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+        currencies = {
+            (df["ticker"].iloc[0], df["statement_type"].iloc[0]): df.attrs["currency"]
+            for df in dfs
+            if "currency" in df.attrs
+            and not df.empty
+            and {"ticker", "statement_type"} <= set(df.columns)
+        }
+        return cls(data, currencies)
+
+    @property
+    def tickers(self) -> List[str]:
+        """Tickers present in the store, in input order (the target first)"""
+        return list(self.data["ticker"].cat.categories)
+
+    def latest(
+        self, ticker: str, metric: str, statement_type: Optional[str] = None
+    ) -> Optional[float]:
+        """Most recent value of a metric, None when it is unknown"""
+        if statement_type is None:
+            value = self._latest.get((ticker, metric))
+        else:
+            value = self._latest_by_statement.get((ticker, statement_type, metric))
+        return None if value is None else float(value)
+
+    def series(
+        self, ticker: str, metric: str, statement_type: Optional[str] = None
+    ) -> pd.Series:
+        """History of a metric indexed by date, newest first"""
+        mask = (self.data["ticker"] == ticker) & (self.data["metric"] == metric)
+        if statement_type is not None:
+            mask &= self.data["statement_type"] == statement_type
+        rows = self.data.loc[mask, ["date", "value"]].drop_duplicates("date")
+        return rows.set_index("date")["value"].rename(metric)
+
+    def frames(self) -> Iterator[pd.DataFrame]:
+        """Wide, period-per-row frame of every ticker x statement, generated lazily"""
+        groups = self.data.groupby(["ticker", "statement_type"], observed=True)
+        for (ticker, statement_type), group in groups:
+            wide = group.pivot_table(
+                index="date", columns="metric", values="value", observed=True
+            ).sort_index(ascending=False)
+            wide.columns = list(wide.columns)
+            wide = wide.reset_index()
+            wide["date"] = wide["date"].dt.strftime("%Y-%m-%d")
+            wide["ticker"] = ticker
+            wide["statement_type"] = statement_type
+            if (ticker, statement_type) in self.currencies:
+                wide.attrs["currency"] = self.currencies[(ticker, statement_type)]
+            yield wide
+
+    def combined_view(self) -> pd.DataFrame:
+        """ticker, statement_type, metric rows x date columns view of the whole store"""
+        if self.data.empty:
+            return pd.DataFrame(columns=["ticker", "statement_type", "metric"])
+        view = self.data.pivot_table(
+            index=["ticker", "statement_type", "metric"],
+            columns="date",
+            values="value",
+            observed=True,
+        ).sort_index(axis=1, ascending=False)
+        view.columns = [date.strftime("%Y-%m-%d") for date in view.columns]
+        return view.reset_index()
+
+    def memory_usage(self) -> int:
+        """Bytes held by the long table"""
+        return int(self.data.memory_usage(deep=True).sum())
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        return self.frames()
+
+    def __len__(self) -> int:
+        return self._n_frames
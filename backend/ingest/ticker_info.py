@@ -0,0 +1,99 @@
+"""
+Request-scoped provider of yfinance `Ticker.info` dicts.
+
+One provider is created per analysis run and handed to every consumer
+(target_company_filters, create_companies_fields, create_companies_snapshot_fields),
+so each ticker's info is fetched at most once per run. Tickers are read through the
+redis metadata cache (info_cache.py) first, the remaining ones are fetched
+concurrently, in batches, through the shared yfinance quota.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List
+
+import yfinance as yf
+from dotenv import load_dotenv
+from yfinance.exceptions import YFException, YFRateLimitError
+
+from backend.ingest.info_cache import project, read_infos, write_infos
+from backend.utils import rate_limiter
+from backend.utils.logger import get_logger
+from backend.utils.redis_client import redis_client
+
+load_dotenv()
+logger = get_logger(__file__)
+
+INFO_MAX_WORKERS = int(os.getenv("YF_INFO_MAX_WORKERS", "8"))
+INFO_BATCH_SIZE = int(os.getenv("YF_INFO_BATCH_SIZE", "25"))
+
+
+def fetch_info(ticker: str) -> dict:
+    """Cached fields of one ticker's yfinance info, {} when it cannot be fetched"""
+    try:
+        rate_limiter.acquire("yfinance")
+        info = yf.Ticker(ticker).info
+        return project(info) if info else {}
+    except YFRateLimitError as e:
+        rate_limiter.block("yfinance", rate_limiter.BACKOFF_SECONDS)
+        logger.warning("yfinance rate limited on %s: %s", ticker, e)
+    except rate_limiter.QuotaExceeded as e:
+        logger.warning("yfinance quota exhausted, skipping %s: %s", ticker, e)
+    except (YFException, OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+        logger.warning("Failed to fetch yfinance info for %s: %s", ticker, e)
+    return {}
+
+
+class TickerInfoProvider:
+    """Deduplicating, batched cache of yfinance info dicts for one run"""
+
+    def __init__(
+        self, max_workers: int = INFO_MAX_WORKERS, batch_size: int = INFO_BATCH_SIZE
+    ):
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, batch_size)
+        self._infos: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def _missing(self, tickers: Iterable[str]) -> List[str]:
+        with self._lock:
+            return [t for t in dict.fromkeys(tickers) if t and t not in self._infos]
+
+    def prefetch(self, tickers: Iterable[str]) -> None:
+        """Resolve the info of every ticker not seen yet in this run, from the redis
+        cache or concurrently from yfinance"""
+        missing = self._missing(tickers)
+        if not missing:
+            return
+
+        cached = read_infos(redis_client, missing)
+        with self._lock:
+            self._infos.update(cached)
+        missing = [ticker for ticker in missing if ticker not in cached]
+        if not missing:
+            return
+
+        workers = min(self.max_workers, len(missing))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for start in range(0, len(missing), self.batch_size):
+                batch = missing[start : start + self.batch_size]
+                infos = dict(zip(batch, executor.map(fetch_info, batch)))
+                write_infos(redis_client, infos)
+                with self._lock:
+                    self._infos.update(infos)
+
+        logger.info("Fetched yfinance info for %d tickers", len(missing))
+
+    def get(self, ticker: str) -> dict:
+        """Info of one ticker, fetched on first use, {} when unavailable"""
+        self.prefetch([ticker])
+        with self._lock:
+            return self._infos.get(ticker, {})
+
+    def get_many(self, tickers: Iterable[str]) -> Dict[str, dict]:
+        """Info of many tickers, the missing ones fetched in one concurrent pass"""
+        tickers = list(tickers)
+        self.prefetch(tickers)
+        with self._lock:
+            return {ticker: self._infos.get(ticker, {}) for ticker in tickers}
@@ -1,38 +1,199 @@
-"""file used to handle data change (mainly used in backend/ingest/fetch.py)"""
+"""
+file used to handle data change (mainly used in backend/ingest/fetch.py & fetch_async.py)
 
-import requests
+Changed cache keys are not expired one by one from the fetch loop: they are queued
+and a background thread flushes them, deduplicated, in batches of up to
+WEBHOOK_BATCH_SIZE keys, at most every WEBHOOK_FLUSH_SECONDS. Expired keys are removed
+from redis and broadcast on the invalidation bus (backend/utils/invalidation_bus.py),
+so the in-process caches of every worker drop them too. Updated keys (just rewritten
+by this process, e.g. a refreshed statement payload) are only broadcast: the new value
+stays in redis and the other workers drop their local copy of the old one.
+Pending invalidations are flushed at interpreter exit.
+"""
 
+import atexit
+import os
+import threading
+from typing import Iterable, List, Optional
+
+from dotenv import load_dotenv
+
+from backend.utils.invalidation_bus import invalidate, publish
 from backend.utils.logger import get_logger
+from backend.utils.redis_client import redis_client
 
+load_dotenv()
 logger = get_logger(__file__)
 
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", "200"))
+WEBHOOK_FLUSH_SECONDS = float(os.getenv("WEBHOOK_FLUSH_SECONDS", "0.5"))
+
+
+def send_invalidations(
+    keys: Iterable[str] = (),
+    patterns: Iterable[str] = (),
+    updated: Iterable[str] = (),
+) -> bool:
+    """
+    Expire one batch of cache keys and key patterns in redis and in every worker,
+    and drop the local copies of updated keys in every worker.
+
+    Args:
+        keys (Iterable[str]): Redis cache keys to expire
+        patterns (Iterable[str]): glob patterns of keys to expire
+        updated (Iterable[str]): keys rewritten in redis, kept there
+
+    Returns:
+        bool: True if redis was reached, False otherwise
+    """
+    keys, patterns, updated = list(keys), list(patterns), list(updated)
+    if not keys and not patterns and not updated:
+        return True
+    if not redis_client:
+        logger.info("Redis client not available, %d keys not expired", len(keys))
+        return False
+
+    if keys or patterns:
+        removed = invalidate(redis_client, keys, patterns)
+        logger.info(
+            "Expired %d cache keys (%d keys, %d patterns)",
+            removed,
+            len(keys),
+            len(patterns),
+        )
+    if updated:
+        publish(redis_client, updated)
+        logger.info("Broadcast %d updated cache keys", len(updated))
+    return True
+
+
+class InvalidationQueue:
+    """Deduplicating queue of cache invalidations, flushed in batches off the caller's path"""
+
+    def __init__(
+        self,
+        batch_size: int = WEBHOOK_BATCH_SIZE,
+        flush_interval: float = WEBHOOK_FLUSH_SECONDS,
+    ):
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        # kind -> pending items (dicts keep insertion order & deduplicate)
+        self._pending = {"keys": {}, "patterns": {}, "updated": {}}
+        self._cond = threading.Condition()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+
+    def put(self, key: str) -> None:
+        """Queue one cache key for expiry"""
+        self._add("keys", key)
+
+    def put_pattern(self, pattern: str) -> None:
+        """Queue the expiry of every key matching a glob pattern"""
+        self._add("patterns", pattern)
+
+    def put_updated(self, key: str) -> None:
+        """Queue one rewritten cache key, only the local copies of it are dropped"""
+        self._add("updated", key)
+
+    def _count(self) -> int:
+        return sum(map(len, self._pending.values()))
+
+    def _add(self, kind: str, item: str) -> None:
+        with self._cond:
+            self._pending[kind][item] = None
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="cache-invalidation", daemon=True
+                )
+                self._worker.start()
+            if self._count() >= self.batch_size:
+                self._cond.notify()
+
+    def _take(self) -> tuple:
+        """Pop up to batch_size pending items as (keys, patterns, updated),
+        caller holds the lock"""
+        room, batch = self.batch_size, {}
+        for kind in ("patterns", "keys", "updated"):
+            items = list(self._pending[kind])[:room]
+            for item in items:
+                del self._pending[kind][item]
+            batch[kind], room = items, room - len(items)
+        return batch["keys"], batch["patterns"], batch["updated"]
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._closed or self._count() >= self.batch_size,
+                    timeout=self.flush_interval,
+                )
+                if self._closed:
+                    return
+                batch = self._take()
+                if not any(batch):  # idle, restarted by the next put
+                    self._worker = None
+                    return
+            send_invalidations(*batch)
+
+    def pending(self) -> int:
+        """Number of queued keys & patterns not sent yet"""
+        with self._cond:
+            return self._count()
+
+    def flush(self) -> List[bool]:
+        """Send every pending invalidation now, in the caller's thread"""
+        results = []
+        while True:
+            with self._cond:
+                batch = self._take()
+            if not any(batch):
+                return results
+            results.append(send_invalidations(*batch))
+
+    def close(self) -> None:
+        """Stop the background flusher and send what is left"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+
+invalidation_queue = InvalidationQueue()
+atexit.register(invalidation_queue.close)
+
 
 def notify_cache_expiry(cache_key_param: str) -> bool:
     """
-    Send webhook notification to expire a cache key.
+    Queue a cache key for expiry, it is sent with the next batch.
 
     Args:
         cache_key_param (str): Redis cache key to expire
 
     Returns:
-        bool: True if webhook succeeded, False otherwise
+        bool: True once the key is queued
     """
-    try:
-        resp = requests.post(
-            "http://localhost:8000/expire_cache/",
-            json={"cache_key": cache_key_param},
-            timeout=5,  # Increased timeout for reliability
-        )
+    invalidation_queue.put(cache_key_param)
+    return True
 
-        if resp.status_code == 200:
-            logger.info(
-                "Webhook success: %s", resp.json().get("message", "Cache expired")
-            )
-            return True
 
-        logger.error("Webhook failed with status %d", resp.status_code)
-        return False
+def notify_cache_update(cache_key_param: str) -> bool:
+    """
+    Queue a cache key this process just rewrote in redis, every worker drops its
+    local copy while the new value stays cached.
 
-    except (requests.RequestException, ValueError, TypeError) as e:
-        logger.warning("Webhook error: %s", e)
-        return False
+    Args:
+        cache_key_param (str): Redis cache key that was rewritten
+
+    Returns:
+        bool: True once the key is queued
+    """
+    invalidation_queue.put_updated(cache_key_param)
+    return True
+
+
+def notify_pattern_expiry(pattern: str) -> bool:
+    """Queue the expiry of every cache key matching a glob pattern"""
+    invalidation_queue.put_pattern(pattern)
+    return True
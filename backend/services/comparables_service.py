@@ -12,10 +12,11 @@ from backend.domain.financials.models import FinancialSnapshot
 from backend.ingest.companies_fields import create_companies_fields
 from backend.ingest.companies_snapshot_fields import \
     create_companies_snapshot_fields
-from backend.ingest.fetch import (create_financial_data, screener,
-                                  target_company_filters)
+from backend.ingest.fetch import (create_financial_data, fetch_max_workers,
+                                  screener, target_company_filters)
 from backend.ingest.projection_config_fields import create_projection_config
 from backend.ingest.stage_params_fields import create_params_for_companies
+from backend.ingest.ticker_info import TickerInfoProvider
 from db.repositories.company_repository import CompanyRepository
 from db.repositories.comparable_repository import ComparableRepository
 from db.repositories.snapshot_repository import SnapshotRepository
@@ -32,13 +33,16 @@ def analyze_company(ticker: str) -> Dict:
         Dict with analysis results or error message
     """
 
+    # yfinance info of every ticker is fetched once for the whole run
+    infos = TickerInfoProvider()
+
     # Step 1: Get target company filters
-    mc, beta = target_company_filters(ticker)
+    mc, beta = target_company_filters(ticker, infos=infos)
     if not mc or not beta:
         return {"error": "Could not fetch market cap and beta for target company"}
 
     # Step 2: Screen for comparable companies
-    comparables = screener(mc, beta)
+    comparables = screener(mc, beta, target=ticker)
     if not comparables:
         return {"error": "No comparable companies found"}
 
@@ -46,8 +50,12 @@ def analyze_company(ticker: str) -> Dict:
     target_ticker = ticker
     peer_tickers = comparables
     all_tickers = [target_ticker] + peer_tickers
+    infos.prefetch(all_tickers)
 
-    financial_data = create_financial_data(all_tickers)
+    # snapshot fields only read the most recent period of each statement
+    financial_data = create_financial_data(
+        all_tickers, max_workers=fetch_max_workers, mode="latest"
+    )
     if not financial_data:
         return {"error": "Could not fetch financial data"}
 
@@ -55,7 +63,7 @@ def analyze_company(ticker: str) -> Dict:
     tickers = all_tickers
 
     # Step 5: Create Company objects
-    companies_fields = create_companies_fields(tickers)
+    companies_fields = create_companies_fields(tickers, infos=infos)
     if not companies_fields:
         return {"error": "Could not fetch company metadata (name, sector, etc.)"}
 
@@ -68,7 +76,7 @@ def analyze_company(ticker: str) -> Dict:
         return {"error": "Failed to create Company objects"}
 
     # Step 6: Create snapshot fields (dict of dicts)
-    snapshot_fields = create_companies_snapshot_fields(financial_data)
+    snapshot_fields = create_companies_snapshot_fields(financial_data, infos=infos)
     if not snapshot_fields:
         return {"error": "Failed to extract financial snapshot fields"}
 
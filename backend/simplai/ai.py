@@ -1,37 +1,284 @@
 """
 Large Language Model integration module using Google's Gemini API.
 Provides functionality to analyze financial data with AI-powered insights.
+
+Large comparable sets are analyzed map-reduce style (extract_info_gemini_chunked):
+the data is split into chunks of peers, chunks are answered concurrently and the
+partial answers are combined by a final reduce call.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
 
 import google.generativeai as genai
+import pandas as pd
 from dotenv import load_dotenv
+from google.api_core.exceptions import GoogleAPIError
 
 from backend.exceptions import GeminiError
+from backend.simplai.prompt_builder import (
+    AI_PROMPT_TOKEN_BUDGET,
+    build_prompt_data,
+    estimate_tokens,
+)
+from backend.simplai.response_cache import (
+    data_digest,
+    read_response,
+    response_key,
+    write_response,
+)
 from backend.utils.logger import get_logger
+from backend.utils.redis_client import redis_client
 
 logger = get_logger(__file__)
 
 load_dotenv()
 genai.configure(api_key=os.getenv("GEMINI-API-KEY"))
-model = genai.GenerativeModel(model_name="gemini-2.5-flash")
-
-
-def extract_info_gemini(df, user_prompt):
-    """AI model receives a df & a user prompt & answer the prompt"""
-    text_csv = df.to_csv(index=False)
+MODEL_NAME = "gemini-2.5-flash"
+model = genai.GenerativeModel(model_name=MODEL_NAME)
 
-    prompt = f"""i will provide you with financial data for a certain
+PROMPT_TEMPLATE = """i will provide you with financial data for a certain
     publicly traded company in a csv format.
-    csv: {text_csv}
+    csv: {csv}
     now answer this:
-    {user_prompt}
+    {question}
+    only give precise & relevant part."""
+
+MAP_QUESTION = """{question}
+    (this is part {part} of {parts} of the peer set, answer for the companies in
+    this part only, name the tickers you refer to)"""
+
+REDUCE_TEMPLATE = """i asked the question below over several parts of a set of
+    publicly traded companies, here are the partial answers.
+    {answers}
+    now combine them into one answer to:
+    {question}
     only give precise & relevant part."""
 
+AI_CHUNK_TICKERS = int(os.getenv("AI_CHUNK_TICKERS", "20"))
+AI_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENCY", "4"))
+ERROR_MESSAGE = "An error occurred while processing the data."
+# API failures (quota, timeouts...) and blocked / empty responses (response.text)
+MODEL_ERRORS = (GeminiError, GoogleAPIError, ValueError)
+
+
+def _generate(prompt: str, key: str, use_cache: bool = True) -> Optional[str]:
+    """Model answer to a prompt through the response cache, None on error"""
+    if use_cache:
+        cached = read_response(redis_client, key)
+        if cached is not None:
+            logger.info("AI response served from cache")
+            return cached
+
     try:
         response = model.generate_content(prompt)
-        return response.text.strip()
-    except GeminiError as e:
+        text = response.text.strip()
+        write_response(redis_client, key, text)
+        return text
+    except MODEL_ERRORS as e:
         logger.error("[gemini error] %s", e)
-        return "An error occurred while processing the data."
+        return None
+
+
+def _data_prompt(df, user_prompt) -> Tuple[str, str]:
+    """Prompt over one frame of statement data and its response cache key"""
+    # only the pre-aggregated metrics relevant to the question, within the budget
+    instructions = PROMPT_TEMPLATE.format(csv="", question=user_prompt)
+    prompt_data = build_prompt_data(
+        df, user_prompt, AI_PROMPT_TOKEN_BUDGET - estimate_tokens(instructions)
+    )
+    text_csv = prompt_data.text
+    prompt = PROMPT_TEMPLATE.format(csv=text_csv, question=user_prompt)
+    logger.info(
+        "AI prompt: ~%d tokens, %d rows (%d dropped) over metrics %s",
+        estimate_tokens(prompt),
+        prompt_data.rows,
+        prompt_data.dropped_rows,
+        prompt_data.metrics,
+    )
+
+    # keyed on the prompt without its data + a digest of the data
+    return prompt, response_key(MODEL_NAME, instructions, data_digest(text_csv))
+
+
+def _answer(df, user_prompt, use_cache=True) -> Optional[str]:
+    """Answer a question over one frame of statement data, None on error"""
+    return _generate(*_data_prompt(df, user_prompt), use_cache)
+
+
+def _answer_part(
+    chunk, question, part: int, parts: int, use_cache=True
+) -> Optional[str]:
+    """Map step answer of one chunk, None when that chunk fails (the other chunks
+    are still reduced)"""
+    try:
+        return _answer(chunk, question, use_cache)
+    except MODEL_ERRORS as e:
+        logger.error("[gemini error] chunk %d/%d: %s", part, parts, e)
+        return None
+
+
+def extract_info_gemini(df, user_prompt, use_cache=True):
+    """AI model receives a df & a user prompt & answer the prompt,
+    repeated questions over the same data are served from the response cache
+    unless use_cache is False"""
+    answer = _answer(df, user_prompt, use_cache)
+    return answer if answer is not None else ERROR_MESSAGE
+
+
+def chunk_view(
+    view: pd.DataFrame,
+    chunk_tickers: int = AI_CHUNK_TICKERS,
+    groups: Optional[Dict[str, List[str]]] = None,
+) -> List[pd.DataFrame]:
+    """
+    Split a combined statement view into chunks of peers, the target (first ticker)
+    is repeated in every chunk so each partial answer can compare against it.
+
+    Args:
+        view (pd.DataFrame): combined statement view, the target's rows first
+        chunk_tickers (int): max peers per chunk
+        groups (Dict[str, List[str]]): optional peer groups (e.g. by sector), each
+            group is chunked on its own; tickers outside every group form a last one
+
+    Returns:
+        List[pd.DataFrame]: the chunks, one chunk when the view has no ticker column
+    """
+    if view.empty or "ticker" not in view.columns:
+        return [view]
+
+    tickers = list(dict.fromkeys(view["ticker"]))
+    target, peers = tickers[0], tickers[1:]
+    if groups:
+        grouped = [[t for t in group if t in peers] for group in groups.values()]
+        seen = {t for group in grouped for t in group}
+        grouped.append([t for t in peers if t not in seen])
+    else:
+        grouped = [peers]
+
+    size = max(1, chunk_tickers)
+    slices = [
+        group[start : start + size]
+        for group in grouped
+        for start in range(0, len(group), size)
+    ]
+    if not slices:
+        return [view]
+    return [view[view["ticker"].isin([target, *part])] for part in slices]
+
+
+def _final_prompt(
+    df,
+    user_prompt,
+    chunk_tickers: int = AI_CHUNK_TICKERS,
+    max_workers: int = AI_MAX_CONCURRENCY,
+    groups: Optional[Dict[str, List[str]]] = None,
+    use_cache: bool = True,
+) -> Optional[Tuple[str, str]]:
+    """
+    Prompt & cache key of the last call of a map-reduce analysis: the data prompt
+    when there is a single chunk, otherwise the reduce prompt over the answers of
+    every chunk (answered concurrently, at most max_workers calls in flight).
+    None when no chunk could be answered.
+    """
+    chunks = chunk_view(df, chunk_tickers, groups)
+    if len(chunks) == 1:
+        return _data_prompt(chunks[0], user_prompt)
+
+    parts = len(chunks)
+    questions = [
+        MAP_QUESTION.format(question=user_prompt, part=i + 1, parts=parts)
+        for i in range(parts)
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, parts))) as ex:
+        partials = list(
+            ex.map(
+                lambda i: _answer_part(
+                    chunks[i], questions[i], i + 1, parts, use_cache
+                ),
+                range(parts),
+            )
+        )
+
+    answers = [answer for answer in partials if answer]
+    logger.info("AI map step: %d/%d chunks answered", len(answers), len(chunks))
+    if not answers:
+        return None
+
+    joined = "\n\n".join(f"part {i + 1}:\n{answer}" for i, answer in enumerate(answers))
+    prompt = REDUCE_TEMPLATE.format(answers=joined, question=user_prompt)
+    key = response_key(
+        MODEL_NAME,
+        REDUCE_TEMPLATE.format(answers="", question=user_prompt),
+        data_digest(joined),
+    )
+    return prompt, key
+
+
+def extract_info_gemini_chunked(
+    df,
+    user_prompt,
+    chunk_tickers: int = AI_CHUNK_TICKERS,
+    max_workers: int = AI_MAX_CONCURRENCY,
+    groups: Optional[Dict[str, List[str]]] = None,
+    use_cache: bool = True,
+):
+    """
+    Map-reduce counterpart of extract_info_gemini: every chunk of peers is answered
+    concurrently (at most max_workers calls in flight), the partial answers are then
+    combined by one reduce call. A single chunk is answered directly.
+    """
+    final = _final_prompt(
+        df, user_prompt, chunk_tickers, max_workers, groups, use_cache
+    )
+    answer = _generate(*final, use_cache) if final else None
+    return answer if answer is not None else ERROR_MESSAGE
+
+
+def _stream(prompt: str, key: str, use_cache: bool = True) -> Iterator[str]:
+    """Text pieces of the model answer as they are generated, a cached answer is
+    yielded whole; the full answer is cached once the stream completes"""
+    if use_cache:
+        cached = read_response(redis_client, key)
+        if cached is not None:
+            logger.info("AI response served from cache")
+            yield cached
+            return
+
+    pieces = []
+    try:
+        for chunk in model.generate_content(prompt, stream=True):
+            text = chunk.text
+            if text:
+                pieces.append(text)
+                yield text
+    except MODEL_ERRORS as e:
+        logger.error("[gemini error] %s", e)
+        yield ERROR_MESSAGE
+        return
+
+    write_response(redis_client, key, "".join(pieces).strip())
+
+
+def stream_info_gemini(
+    df,
+    user_prompt,
+    chunked: bool = False,
+    use_cache: bool = True,
+    **chunk_options,
+) -> Iterator[str]:
+    """
+    Streaming extract_info_gemini: yields the answer piece by piece as the model
+    generates it. In chunked mode the map step runs first (not streamed) and the
+    reduce answer is streamed; chunk_options are those of extract_info_gemini_chunked.
+    """
+    if chunked:
+        final = _final_prompt(df, user_prompt, use_cache=use_cache, **chunk_options)
+    else:
+        final = _data_prompt(df, user_prompt)
+
+    if final is None:
+        yield ERROR_MESSAGE
+        return
+    yield from _stream(*final, use_cache)
@@ -0,0 +1,214 @@
+"""
+Compact prompt data for the LLM (used by backend/simplai/ai.py).
+
+Instead of inlining every line item of every period, the combined statement view
+(ticker, statement_type, metric, <date columns>) is reduced to the metrics relevant
+to the question, pre-aggregated per ticker: latest value, year-over-year growth,
+CAGR over the available periods and margin on revenue (ratios in percent). Rows are
+then cut to fit AI_PROMPT_TOKEN_BUDGET (estimated at AI_CHARS_PER_TOKEN characters
+per token): the target company (first ticker) is kept first, then the peers metric by
+metric, most relevant metric first.
+"""
+
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import List
+
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+
+from backend.ingest.presentation import META_COLUMNS, prompt_csv
+
+load_dotenv()
+
+AI_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "8000"))
+AI_CHARS_PER_TOKEN = float(os.getenv("AI_CHARS_PER_TOKEN", "4"))
+
+# question keywords (whole words, plurals match too) -> metrics they refer to, in
+# order of relevance
+TOPIC_METRICS = {
+    "revenue": ("revenue",),
+    "sales": ("revenue",),
+    "growth": ("revenue", "operatingIncome", "netIncome"),
+    "margin": ("grossProfit", "operatingIncome", "ebitda", "netIncome", "revenue"),
+    "profit": ("grossProfit", "operatingIncome", "netIncome"),
+    "profitability": ("grossProfit", "operatingIncome", "netIncome"),
+    "earning": ("netIncome", "eps", "epsdiluted"),
+    "eps": ("eps", "epsdiluted"),
+    "ebit": ("operatingIncome", "ebitda"),
+    "debt": ("totalDebt", "netDebt", "totalEquity", "interestExpense"),
+    "leverage": ("totalDebt", "netDebt", "totalEquity", "ebitda"),
+    "cash": ("cashAndShortTermInvestments", "operatingCashFlow", "freeCashFlow"),
+    "capex": ("capitalExpenditure", "depreciationAndAmortization"),
+    "investment": ("capitalExpenditure", "depreciationAndAmortization"),
+    "investing": ("capitalExpenditure", "depreciationAndAmortization"),
+    "dividend": ("dividendsPaid", "netIncome"),
+    "tax": ("incomeTaxExpense", "incomeBeforeTax"),
+    "asset": ("totalAssets", "totalCurrentAssets"),
+    "liability": ("totalLiabilities", "totalCurrentLiabilities"),
+    "liabilities": ("totalLiabilities", "totalCurrentLiabilities"),
+    "equity": ("totalEquity", "totalStockholdersEquity"),
+    "working capital": ("changeInWorkingCapital", "totalCurrentAssets"),
+}
+DEFAULT_METRICS = (
+    "revenue",
+    "operatingIncome",
+    "netIncome",
+    "totalDebt",
+    "freeCashFlow",
+)
+MARGIN_METRICS = ("grossProfit", "operatingIncome", "ebitda", "netIncome")
+
+_CAMEL = re.compile(r"(?<=[a-z])(?=[A-Z])")
+
+
+@dataclass
+class PromptData:
+    """Compact data text of a prompt and its estimated size"""
+
+    text: str
+    estimated_tokens: int
+    rows: int
+    dropped_rows: int
+    metrics: List[str]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text, AI_CHARS_PER_TOKEN characters per token"""
+    return math.ceil(len(text) / AI_CHARS_PER_TOKEN)
+
+
+def _mentions(question: str, name: str) -> bool:
+    """True if the question holds name as a whole word (or its plural), so that
+    'eps' does not match 'steps' nor 'ebit' match 'ebitda'"""
+    return bool(re.search(rf"\b{re.escape(name)}(?:s|es)?\b", question, re.I))
+
+
+def relevant_metrics(question: str, available) -> List[str]:
+    """Metrics the question refers to (by topic keyword or by metric name),
+    most relevant first, DEFAULT_METRICS when nothing matches"""
+    available = list(dict.fromkeys(available))
+    picked = [
+        metric
+        for metric in available
+        if _mentions(question, _CAMEL.sub(" ", metric)) or _mentions(question, metric)
+    ]
+    for keyword, metrics in TOPIC_METRICS.items():
+        if _mentions(question, keyword):
+            picked.extend(metric for metric in metrics if metric in available)
+    if not picked:
+        picked = [metric for metric in DEFAULT_METRICS if metric in available]
+    return list(dict.fromkeys(picked))
+
+
+def aggregate(view: pd.DataFrame, metrics: List[str]) -> pd.DataFrame:
+    """
+    Per ticker x metric summary of a combined statement view: latest value, yoy
+    growth, CAGR over the available periods and margin on revenue, in percent.
+    The view must hold values in one unit (not million-scaled per value), see
+    normalize_statements(millions=False).
+    """
+    dates = sorted(
+        (col for col in view.columns if col not in META_COLUMNS + ("metric",)),
+        reverse=True,
+    )
+    rows = view[view["metric"].isin(metrics)].drop_duplicates(["ticker", "metric"])
+    # StatementStore views hold categoricals, which would leak into the ratios
+    rows = rows.astype({"ticker": str, "metric": str})
+    if rows.empty or not dates:
+        return pd.DataFrame(
+            columns=[
+                "ticker",
+                "metric",
+                "latest",
+                "yoy_growth_pct",
+                "cagr_pct",
+                "margin_pct",
+            ]
+        )
+
+    # one long pass over the known values, newest period first per row
+    values = rows[dates].apply(pd.to_numeric, errors="coerce").stack().dropna()
+    per_row = values.groupby(level=0)
+    latest, previous = per_row.nth(0), per_row.nth(1)
+    latest.index = latest.index.droplevel(1)
+    previous.index = previous.index.droplevel(1)
+    oldest, periods = per_row.last(), per_row.count()
+
+    summary = rows[["ticker", "metric"]].copy()
+    summary["latest"] = latest
+    with np.errstate(divide="ignore", invalid="ignore"):
+        summary["yoy_growth_pct"] = 100 * (latest - previous) / previous.abs()
+        years = (periods - 1).where(periods > 1)
+        ratio = (latest / oldest).where((latest > 0) & (oldest > 0))
+        summary["cagr_pct"] = 100 * (ratio ** (1 / years) - 1)
+
+    revenue = summary[summary["metric"] == "revenue"].set_index("ticker")["latest"]
+    summary["margin_pct"] = np.where(
+        summary["metric"].isin(MARGIN_METRICS),
+        100 * summary["latest"] / summary["ticker"].map(revenue),
+        np.nan,
+    )
+    summary = summary.replace([np.inf, -np.inf], np.nan)
+    return summary.dropna(axis=1, how="all").reset_index(drop=True)
+
+
+def build_prompt_data(
+    view: pd.DataFrame,
+    question: str,
+    token_budget: int = AI_PROMPT_TOKEN_BUDGET,
+) -> PromptData:
+    """
+    Compact csv of the metrics relevant to the question, cut to token_budget.
+
+    Args:
+        view (pd.DataFrame): combined statement view, the target's rows first
+        question (str): the user's question
+        token_budget (int): max estimated tokens of the data text
+
+    Returns:
+        PromptData: csv text, estimated tokens, kept / dropped rows and metrics used
+    """
+    if view.empty or not {"ticker", "metric"} <= set(view.columns):
+        text = prompt_csv(view)
+        return PromptData(text, estimate_tokens(text), len(view), 0, [])
+
+    metrics = relevant_metrics(question, view["metric"].astype(str))
+    summary = aggregate(view, metrics)
+
+    # target first, then the peers metric by metric, so a budget cut drops the
+    # least relevant metrics of the last peers
+    tickers = list(dict.fromkeys(view["ticker"]))
+    ticker_rank = summary["ticker"].map({t: i for i, t in enumerate(tickers)})
+    order = np.lexsort(
+        (
+            ticker_rank,
+            summary["metric"].map({m: i for i, m in enumerate(metrics)}),
+            ticker_rank > 0,
+        )
+    )
+    summary = summary.iloc[order].reset_index(drop=True)
+
+    # rows have similar widths, so the row count fitting the budget is estimated
+    # from the average row size, then trimmed until the real text fits
+    text = prompt_csv(summary)
+    keep = len(summary)
+    if estimate_tokens(text) > token_budget and keep:
+        header = estimate_tokens(prompt_csv(summary.head(0)))
+        per_row = max((estimate_tokens(text) - header) / keep, 1e-9)
+        keep = max(0, min(keep, int((token_budget - header) / per_row)))
+        text = prompt_csv(summary.head(keep))
+        while keep and estimate_tokens(text) > token_budget:
+            keep -= 1
+            text = prompt_csv(summary.head(keep))
+
+    return PromptData(
+        text=text,
+        estimated_tokens=estimate_tokens(text),
+        rows=keep,
+        dropped_rows=len(summary) - keep,
+        metrics=metrics,
+    )
@@ -0,0 +1,66 @@
+"""
+Content-addressed redis cache of LLM responses (used by backend/simplai/ai.py).
+
+A response is stored under a hash of (model name, normalized prompt, digest of the
+data sent), so a repeated question over unchanged statements is answered from redis.
+Entries live for AI_RESPONSE_TTL_SECONDS; callers pass use_cache=False to bypass.
+"""
+
+import hashlib
+import os
+import re
+from typing import Optional
+
+import redis
+from dotenv import load_dotenv
+
+from backend.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__file__)
+
+AI_RESPONSE_NAMESPACE = "ai_response"
+AI_RESPONSE_TTL_SECONDS = int(os.getenv("AI_RESPONSE_TTL_SECONDS", str(24 * 3600)))
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Prompt with case and whitespace differences removed"""
+    return _WHITESPACE.sub(" ", prompt).strip().casefold()
+
+
+def data_digest(text: str) -> str:
+    """Digest of the data text sent along with the prompt"""
+    return hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+
+
+def response_key(model_name: str, prompt: str, digest: str) -> str:
+    """Redis key of a response, from the model, normalized prompt and data digest"""
+    content = "\x1f".join((model_name, normalize_prompt(prompt), digest))
+    return (
+        f"{AI_RESPONSE_NAMESPACE}:"
+        f"{hashlib.blake2b(content.encode(), digest_size=16).hexdigest()}"
+    )
+
+
+def read_response(client, key: str) -> Optional[str]:
+    """Cached response text, None on a miss or error"""
+    if not client:
+        return None
+    try:
+        value = client.get(key)
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("AI response cache read failed for %s: %s", key, e)
+        return None
+    return value.decode() if isinstance(value, bytes) else value
+
+
+def write_response(client, key: str, text: str) -> None:
+    """Cache a response text, empty responses are not cached"""
+    if not client or not text:
+        return
+    try:
+        client.set(key, text, ex=AI_RESPONSE_TTL_SECONDS)
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("AI response cache write failed for %s: %s", key, e)
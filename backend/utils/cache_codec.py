@@ -0,0 +1,160 @@
+"""
+Pluggable codecs for cached statement payloads (a list of
+{'statement_type': str, 'data': DataFrame, ...} dicts), selectable per cache namespace.
+Keys other than 'data' are json-friendly metadata (digest, fetched_at) kept as is.
+
+- json: the original row-oriented json, still readable & writable
+- zlib: column-oriented json compressed with zlib (stdlib only)
+- msgpack: column-oriented msgpack, zstd compressed when zstandard is installed
+
+Every non-json payload starts with a magic prefix, so decode() picks the right codec
+and transparently falls back to json for keys written before codecs existed.
+"""
+
+import json
+import os
+import zlib
+from typing import List
+
+import pandas as pd
+from dotenv import load_dotenv
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+load_dotenv()
+
+DEFAULT_CODEC = os.getenv("CACHE_CODEC", "zlib")
+
+
+def _metadata(statement: dict) -> dict:
+    return {key: value for key, value in statement.items() if key != "data"}
+
+
+def _to_columns(statements: List[dict]) -> List[dict]:
+    """Column-oriented, json/msgpack friendly form of the statements"""
+    columnar = []
+    for statement in statements:
+        columns = pd.DataFrame(statement["data"]).to_dict("list")
+        columnar.append(
+            {
+                **_metadata(statement),
+                "columns": [str(col) for col in columns],
+                "values": list(columns.values()),
+            }
+        )
+    return columnar
+
+
+def _from_columns(columnar: List[dict]) -> List[dict]:
+    return [
+        {
+            **{
+                key: value
+                for key, value in statement.items()
+                if key not in ("columns", "values")
+            },
+            "data": pd.DataFrame(dict(zip(statement["columns"], statement["values"]))),
+        }
+        for statement in columnar
+    ]
+
+
+class JsonCodec:
+    """Legacy row-oriented json: one record dict per period"""
+
+    name = "json"
+    magic = b""
+
+    def encode(self, statements: List[dict]) -> bytes:
+        rows = [
+            {
+                **_metadata(statement),
+                "data": pd.DataFrame(statement["data"]).to_dict("records"),
+            }
+            for statement in statements
+        ]
+        return json.dumps(rows).encode()
+
+    def decode(self, raw: bytes) -> List[dict]:
+        return [
+            {**statement, "data": pd.DataFrame(statement["data"])}
+            for statement in json.loads(raw)
+        ]
+
+
+class ZlibCodec:
+    """Column-oriented json compressed with zlib"""
+
+    name = "zlib"
+    magic = b"IBKZ1"
+
+    def encode(self, statements: List[dict]) -> bytes:
+        body = json.dumps(_to_columns(statements), separators=(",", ":")).encode()
+        return self.magic + zlib.compress(body, 6)
+
+    def decode(self, raw: bytes) -> List[dict]:
+        return _from_columns(json.loads(zlib.decompress(raw[len(self.magic) :])))
+
+
+class MsgpackCodec:
+    """Column-oriented msgpack, zstd compressed when available (zlib otherwise)"""
+
+    name = "msgpack"
+    magic = b"IBKM1"
+
+    def encode(self, statements: List[dict]) -> bytes:
+        body = msgpack.packb(_to_columns(statements), use_bin_type=True)
+        if zstandard:
+            return self.magic + b"s" + zstandard.ZstdCompressor(level=3).compress(body)
+        return self.magic + b"z" + zlib.compress(body, 6)
+
+    def decode(self, raw: bytes) -> List[dict]:
+        flag, body = (
+            raw[len(self.magic) : len(self.magic) + 1],
+            raw[len(self.magic) + 1 :],
+        )
+        if flag == b"s":
+            body = zstandard.ZstdDecompressor().decompress(body)
+        else:
+            body = zlib.decompress(body)
+        return _from_columns(msgpack.unpackb(body, raw=False))
+
+
+CODECS = {"json": JsonCodec(), "zlib": ZlibCodec()}
+if msgpack:
+    CODECS["msgpack"] = MsgpackCodec()
+
+
+def get_codec(namespace: str):
+    """
+    Codec used to write a cache namespace, configured with
+    CACHE_CODEC_<NAMESPACE> (e.g. CACHE_CODEC_FINANCIAL_DATA), else CACHE_CODEC.
+    Unknown or unavailable codecs fall back to json.
+    """
+    name = os.getenv(f"CACHE_CODEC_{namespace.upper()}", DEFAULT_CODEC)
+    return CODECS.get(name, CODECS["json"])
+
+
+def encode(namespace: str, statements: List[dict]) -> bytes:
+    """Encode statements with the codec configured for the namespace"""
+    return get_codec(namespace).encode(statements)
+
+
+def decode(raw) -> List[dict]:
+    """Decode a payload written by any codec, legacy json included"""
+    if isinstance(raw, str):
+        raw = raw.encode()
+    for codec in CODECS.values():
+        if codec.magic and raw.startswith(codec.magic):
+            return codec.decode(raw)
+    if raw.startswith(MsgpackCodec.magic):
+        raise ValueError("msgpack payload found but msgpack is not installed")
+    return CODECS["json"].decode(raw)
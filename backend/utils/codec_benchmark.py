@@ -0,0 +1,73 @@
+"""
+Benchmark of the cache codecs (backend/utils/cache_codec.py): encode/decode time and
+payload size per ticker, plus redis MEMORY USAGE when a redis server is reachable.
+
+usage: python -m backend.utils.codec_benchmark [periods] [metrics]
+"""
+
+import sys
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from backend.ingest.fetch import REQUIRED_STATEMENTS
+from backend.utils.cache_codec import CODECS
+from backend.utils.redis_client import redis_client
+
+
+def sample_statements(periods: int = 5, metrics: int = 40) -> List[dict]:
+    """Fake ticker entry shaped like FMP statements (one row per period)"""
+    rng = np.random.default_rng(0)
+    statements = []
+    for statement in REQUIRED_STATEMENTS:
+        df = pd.DataFrame(
+            rng.integers(-(10**11), 10**11, size=(periods, metrics)),
+            columns=[f"{statement.split('-')[0]}Metric{i}" for i in range(metrics)],
+        )
+        df.insert(0, "date", pd.date_range("2024-12-31", periods=periods, freq="-1YE"))
+        df["date"] = df["date"].dt.strftime("%Y-%m-%d")
+        df["reportedCurrency"] = "USD"
+        df["ticker"] = "BENCH"
+        df["statement_type"] = statement
+        statements.append({"statement_type": statement, "data": df})
+    return statements
+
+
+def _best_of(func, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+
+def run(periods: int = 5, metrics: int = 40, repeat: int = 20) -> pd.DataFrame:
+    """Return one row per codec: encode/decode ms, payload bytes, redis bytes"""
+    statements = sample_statements(periods, metrics)
+    rows = []
+    for name, codec in CODECS.items():
+        payload = codec.encode(statements)
+        redis_bytes = None
+        if redis_client:
+            key = f"codec_benchmark:{name}"
+            redis_client.set(key, payload)
+            redis_bytes = redis_client.memory_usage(key)
+            redis_client.delete(key)
+        rows.append(
+            {
+                "codec": name,
+                "encode_ms": _best_of(lambda c=codec: c.encode(statements), repeat),
+                "decode_ms": _best_of(lambda c=codec, p=payload: c.decode(p), repeat),
+                "payload_bytes": len(payload),
+                "redis_bytes": redis_bytes,
+            }
+        )
+    return pd.DataFrame(rows).set_index("codec")
+
+
+if __name__ == "__main__":
+    args = [int(arg) for arg in sys.argv[1:3]]
+    print(run(*args).to_string(float_format=lambda v: f"{v:.3f}"))
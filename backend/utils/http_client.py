@@ -0,0 +1,208 @@
+"""
+Shared pooled HTTP clients for every upstream call (FMP, fastforex, Polygon, webhook).
+One keep-alive connection pool per host, configurable timeouts and per-host metrics.
+Calls to metered providers wait for their shared quota, see rate_limiter.py.
+"""
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from asyncio import AbstractEventLoop, get_running_loop
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+from backend.utils import rate_limiter
+from backend.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__file__)
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))
+
+Timeout = Union[float, Tuple[float, float], None]
+
+
+class RateLimited(requests.RequestException):
+    """The provider quota did not free up within RATE_LIMIT_MAX_WAIT_SECONDS"""
+
+
+class AsyncRateLimited(httpx.RequestError):
+    """Async counterpart of RateLimited, raised before the request is sent"""
+
+
+@dataclass
+class HostMetrics:
+    """HTTP-level counters of a single upstream host"""
+
+    requests: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    status_counts: Dict[int, int] = field(default_factory=dict)
+
+    @property
+    def avg_latency_ms(self) -> float:
+        """Mean request latency in milliseconds"""
+        if not self.requests:
+            return 0.0
+        return self.total_seconds / self.requests * 1000
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["avg_latency_ms"] = self.avg_latency_ms
+        return data
+
+
+_sessions: Dict[str, requests.Session] = {}
+_async_clients: "weakref.WeakKeyDictionary[AbstractEventLoop, httpx.AsyncClient]" = (
+    weakref.WeakKeyDictionary()
+)
+_metrics: Dict[str, HostMetrics] = {}
+_lock = threading.Lock()
+
+
+def _host(url: str) -> str:
+    return urlsplit(str(url)).netloc
+
+
+def _record(host: str, elapsed: float, status: Optional[int]) -> None:
+    """Add one request outcome to the host metrics, status None means it failed"""
+    with _lock:
+        metrics = _metrics.setdefault(host, HostMetrics())
+        metrics.requests += 1
+        metrics.total_seconds += elapsed
+        if status is None:
+            metrics.errors += 1
+        else:
+            metrics.status_counts[status] = metrics.status_counts.get(status, 0) + 1
+
+
+def get_session(host: str) -> requests.Session:
+    """Return the keep-alive session of a host, creating its pool on first use."""
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def request(
+    method: str, url: str, timeout: Timeout = None, **kwargs
+) -> requests.Response:
+    """
+    Send a request through the pooled session of the url's host.
+
+    Args:
+        method (str): HTTP method
+        url (str): full url, its host selects the connection pool
+        timeout: read timeout or (connect, read) tuple, defaults to the env config
+
+    Returns:
+        requests.Response: the response, RequestException propagates to callers
+    """
+    host = _host(url)
+    provider = rate_limiter.provider_for(host)
+    if provider:
+        try:
+            rate_limiter.acquire(provider)
+        except rate_limiter.QuotaExceeded as e:
+            raise RateLimited(str(e)) from e
+
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    elif not isinstance(timeout, tuple):
+        timeout = (CONNECT_TIMEOUT, timeout)
+
+    start = time.perf_counter()
+    try:
+        response = get_session(host).request(method, url, timeout=timeout, **kwargs)
+    except requests.RequestException:
+        _record(host, time.perf_counter() - start, None)
+        raise
+    _record(host, time.perf_counter() - start, response.status_code)
+    if provider and response.status_code == 429:
+        rate_limiter.on_rate_limited(provider, response.headers.get("Retry-After"))
+    return response
+
+
+def get(url: str, timeout: Timeout = None, **kwargs) -> requests.Response:
+    """GET through the shared pool, see request()"""
+    return request("GET", url, timeout=timeout, **kwargs)
+
+
+def post(url: str, timeout: Timeout = None, **kwargs) -> requests.Response:
+    """POST through the shared pool, see request()"""
+    return request("POST", url, timeout=timeout, **kwargs)
+
+
+async def _on_request(req: httpx.Request) -> None:
+    provider = rate_limiter.provider_for(_host(req.url))
+    if provider:
+        try:
+            await rate_limiter.acquire_async(provider)
+        except rate_limiter.QuotaExceeded as e:
+            raise AsyncRateLimited(str(e), request=req) from e
+    req.extensions["ibkit_start"] = time.perf_counter()
+
+
+async def _on_response(resp: httpx.Response) -> None:
+    host = _host(resp.request.url)
+    start = resp.request.extensions.get("ibkit_start", time.perf_counter())
+    _record(host, time.perf_counter() - start, resp.status_code)
+    provider = rate_limiter.provider_for(host)
+    if provider and resp.status_code == 429:
+        await asyncio.to_thread(
+            rate_limiter.on_rate_limited, provider, resp.headers.get("Retry-After")
+        )
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the shared httpx client of the running event loop (connections are pooled
+    per host by httpx), it must be called from inside a coroutine.
+    """
+    loop = get_running_loop()
+    with _lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=None, max_keepalive_connections=POOL_MAXSIZE
+                ),
+                event_hooks={"request": [_on_request], "response": [_on_response]},
+            )
+            _async_clients[loop] = client
+        return client
+
+
+def get_metrics() -> Dict[str, dict]:
+    """Snapshot of the HTTP metrics, keyed by host"""
+    with _lock:
+        return {host: metrics.to_dict() for host, metrics in _metrics.items()}
+
+
+def reset_metrics() -> None:
+    with _lock:
+        _metrics.clear()
+
+
+def close_all() -> None:
+    """Close every pooled session (async clients close with their event loop)."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
@@ -0,0 +1,226 @@
+"""
+Cross-worker cache invalidation over redis pub/sub, plus the in-process cache tier it
+keeps coherent.
+
+invalidate() removes keys (or glob patterns) from redis and publishes them on
+INVALIDATION_CHANNEL; every worker runs one subscriber thread that drops the matching
+entries of all its LocalCache instances. A LocalCache only serves entries while the
+subscriber is connected, so a worker that cannot hear invalidations falls back to
+redis instead of serving stale data. LOCAL_CACHE_TTL_SECONDS bounds staleness if a
+message is ever lost.
+"""
+
+import fnmatch
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional
+
+import redis
+from dotenv import load_dotenv
+
+from backend.utils.logger import get_logger
+from backend.utils.redis_keys import unlink_keys, unlink_pattern
+
+load_dotenv()
+logger = get_logger(__file__)
+
+INVALIDATION_CHANNEL = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache_invalidation")
+LOCAL_CACHE_TTL_SECONDS = float(os.getenv("LOCAL_CACHE_TTL_SECONDS", "60"))
+LOCAL_CACHE_MAX_ENTRIES = int(os.getenv("LOCAL_CACHE_MAX_ENTRIES", "512"))
+
+_caches: List["LocalCache"] = []
+_lock = threading.RLock()
+_listener = None  # redis PubSubWorkerThread of this process
+_listener_client = None  # client it subscribed through
+
+
+class LocalCache:
+    """Thread-safe in-process LRU with a TTL, emptied by invalidation messages"""
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float = LOCAL_CACHE_TTL_SECONDS,
+        max_entries: int = LOCAL_CACHE_MAX_ENTRIES,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max(1, max_entries)
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        with _lock:
+            _caches.append(self)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Value of a key, None on a miss, expiry or when invalidations are not heard"""
+        if not is_listening():
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        if value is None or not is_listening():
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> int:
+        """Drop exact keys and keys matching glob patterns, returns the number dropped"""
+        patterns = list(patterns)
+        with self._lock:
+            drop = {key for key in keys if key in self._entries}
+            if patterns:
+                drop.update(
+                    key
+                    for key in self._entries
+                    if any(fnmatch.fnmatchcase(key, p) for p in patterns)
+                )
+            for key in drop:
+                del self._entries[key]
+        return len(drop)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+def _decode_message(data) -> tuple:
+    try:
+        message = json.loads(data)
+        return list(message.get("keys") or []), list(message.get("patterns") or [])
+    except (ValueError, TypeError, AttributeError):
+        logger.warning("Ignoring malformed invalidation message: %r", data)
+        return [], []
+
+
+def apply_invalidation(keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> int:
+    """Drop the given keys & patterns from every local cache of this process"""
+    keys, patterns = list(keys), list(patterns)
+    with _lock:
+        caches = list(_caches)
+    return sum(cache.discard(keys, patterns) for cache in caches)
+
+
+def _on_message(message: dict) -> None:
+    apply_invalidation(*_decode_message(message.get("data")))
+
+
+def _clear_local() -> None:
+    with _lock:
+        caches = list(_caches)
+    for cache in caches:
+        cache.clear()
+
+
+def _on_listener_error(error, pubsub, thread) -> None:
+    """Subscriber lost: stop serving local entries, ensure_listener() reconnects"""
+    global _listener
+    logger.warning("Cache invalidation subscriber stopped: %s", error)
+    with _lock:
+        if _listener is thread:
+            _listener = None
+    _clear_local()
+    thread.stop()
+    try:
+        pubsub.close()
+    except (redis.RedisError, ConnectionError, OSError):
+        pass
+
+
+def is_listening() -> bool:
+    """True while this process' invalidation subscriber is running"""
+    listener = _listener
+    return listener is not None and listener.is_alive()
+
+
+def ensure_listener(client) -> bool:
+    """
+    Start this process' subscriber thread on INVALIDATION_CHANNEL if it is not
+    running yet, or resubscribe when the client changed (safe to call from every
+    cache read).
+
+    Returns:
+        bool: True when the local caches are kept coherent
+    """
+    global _listener, _listener_client
+    if is_listening() and client is _listener_client:
+        return True
+    if not client:
+        return False
+
+    with _lock:
+        if is_listening():
+            if client is _listener_client:
+                return True
+            _listener.stop()
+        _listener_client = client
+        _clear_local()  # anything cached before (re)subscribing may have been missed
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{INVALIDATION_CHANNEL: _on_message})
+            _listener = pubsub.run_in_thread(
+                sleep_time=1.0,
+                daemon=True,
+                exception_handler=_on_listener_error,
+            )
+        except (redis.RedisError, ConnectionError) as e:
+            logger.warning("Cache invalidation subscribe failed: %s", e)
+            _listener = None
+            return False
+
+    logger.info("Subscribed to cache invalidations on %s", INVALIDATION_CHANNEL)
+    return True
+
+
+def publish(client, keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> int:
+    """
+    Tell every worker to drop keys & patterns from its local caches.
+
+    Returns:
+        int: number of subscribers that received the message
+    """
+    keys, patterns = list(keys), list(patterns)
+    apply_invalidation(keys, patterns)  # this process, even without a subscriber
+    if not client or (not keys and not patterns):
+        return 0
+    try:
+        return client.publish(
+            INVALIDATION_CHANNEL, json.dumps({"keys": keys, "patterns": patterns})
+        )
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Cache invalidation publish failed: %s", e)
+        return 0
+
+
+def invalidate(client, keys: Iterable[str] = (), patterns: Iterable[str] = ()) -> int:
+    """
+    Remove keys & glob patterns from redis (UNLINK / SCAN) and broadcast them to the
+    local caches of every worker.
+
+    Returns:
+        int: number of redis keys removed
+    """
+    keys, patterns = list(keys), list(patterns)
+    removed = unlink_keys(client, keys)
+    removed += sum(unlink_pattern(client, pattern) for pattern in patterns)
+    publish(client, keys, patterns)
+    return removed
@@ -0,0 +1,271 @@
+"""
+Per-provider token buckets shared by every worker process (FMP, fastforex, Polygon,
+yfinance), so gunicorn workers draw from one upstream quota instead of each hammering
+the provider on its own.
+
+The bucket lives in redis and is refilled & taken atomically by a lua script using the
+redis clock, it falls back to an in-process bucket when redis is unavailable.
+A 429 Retry-After blocks the whole provider until the given time.
+
+Quotas are configured as "<requests>/<seconds>", e.g. RATE_LIMIT_FMP=300/60.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+import redis
+from dotenv import load_dotenv
+
+from backend.utils.logger import get_logger
+from backend.utils.redis_client import redis_client
+
+load_dotenv()
+logger = get_logger(__file__)
+
+DEFAULT_QUOTAS = {
+    "fmp": "300/60",
+    "fastforex": "500/3600",
+    "polygon": "5/60",
+    "yfinance": "60/60",
+}
+PROVIDER_HOSTS = {
+    "financialmodelingprep.com": "fmp",
+    "api.beta.fastforex.io": "fastforex",
+    "api.fastforex.io": "fastforex",
+    "api.polygon.io": "polygon",
+}
+MAX_WAIT_SECONDS = float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "30"))
+# pause applied on a 429 that carries no (valid) Retry-After
+BACKOFF_SECONDS = float(os.getenv("RATE_LIMIT_BACKOFF_SECONDS", "5"))
+KEY_PREFIX = "rate_limit"
+
+# KEYS[1] bucket hash, ARGV: rate/s, capacity, tokens to take, seconds to block
+# returns {granted (0/1), seconds to wait, tokens left} as strings (lua floats)
+_BUCKET_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local block = tonumber(ARGV[4])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts', 'blocked_until')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+local blocked_until = tonumber(state[3]) or 0
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+if block > 0 then
+    blocked_until = math.max(blocked_until, now + block)
+    tokens = 0
+end
+
+local granted = 0
+local wait = 0
+if blocked_until > now then
+    wait = blocked_until - now
+elseif tokens >= requested then
+    tokens = tokens - requested
+    granted = 1
+else
+    wait = (requested - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now, 'blocked_until', blocked_until)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate + math.max(0, blocked_until - now)) + 1)
+return {tostring(granted), tostring(wait), tostring(tokens)}
+"""
+
+
+class QuotaExceeded(Exception):
+    """Raised when a provider's quota would not free up within the allowed wait"""
+
+
+@dataclass
+class Quota:
+    """Token bucket parameters, `requests` tokens refilled evenly over `seconds`"""
+
+    requests: int
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        return self.requests / self.seconds
+
+    @classmethod
+    def parse(cls, spec: str) -> "Quota":
+        count, seconds = spec.split("/")
+        return cls(int(count), float(seconds))
+
+
+@dataclass
+class _LocalBucket:
+    tokens: float
+    ts: float
+    blocked_until: float = 0.0
+
+
+_local: Dict[str, _LocalBucket] = {}
+_local_lock = threading.Lock()
+_script = redis_client.register_script(_BUCKET_SCRIPT) if redis_client else None
+
+
+def provider_for(host: str) -> Optional[str]:
+    """Provider whose quota governs a host, None for unmetered hosts"""
+    return PROVIDER_HOSTS.get(host)
+
+
+def get_quota(provider: str) -> Quota:
+    """Quota of a provider, RATE_LIMIT_<PROVIDER> overrides the default"""
+    spec = os.getenv(f"RATE_LIMIT_{provider.upper()}", DEFAULT_QUOTAS[provider])
+    return Quota.parse(spec)
+
+
+def _bucket_key(provider: str) -> str:
+    return f"{KEY_PREFIX}:{provider}"
+
+
+def _take_local(
+    provider: str, quota: Quota, tokens: float, block: float
+) -> Tuple[bool, float, float]:
+    """In-process twin of the lua script, used when redis is unavailable"""
+    now = time.monotonic()
+    with _local_lock:
+        bucket = _local.setdefault(provider, _LocalBucket(quota.requests, now))
+        bucket.tokens = min(
+            quota.requests, bucket.tokens + max(0.0, now - bucket.ts) * quota.rate
+        )
+        bucket.ts = now
+        if block > 0:
+            bucket.blocked_until = max(bucket.blocked_until, now + block)
+            bucket.tokens = 0
+
+        if bucket.blocked_until > now:
+            return False, bucket.blocked_until - now, bucket.tokens
+        if bucket.tokens >= tokens:
+            bucket.tokens -= tokens
+            return True, 0.0, bucket.tokens
+        return False, (tokens - bucket.tokens) / quota.rate, bucket.tokens
+
+
+def _take(
+    provider: str, tokens: float = 1, block: float = 0
+) -> Tuple[bool, float, float]:
+    """
+    Refill the provider bucket and try to take `tokens` from it.
+
+    Returns:
+        Tuple[bool, float, float]: granted, seconds to wait before retrying, tokens left
+    """
+    quota = get_quota(provider)
+    if _script is not None:
+        try:
+            granted, wait, left = _script(
+                keys=[_bucket_key(provider)],
+                args=[quota.rate, quota.requests, tokens, block],
+            )
+            return granted in (b"1", "1"), float(wait), float(left)
+        except (redis.RedisError, ConnectionError) as e:
+            logger.warning("Shared rate limit unavailable for %s: %s", provider, e)
+    return _take_local(provider, quota, tokens, block)
+
+
+def acquire(
+    provider: str, tokens: float = 1, max_wait: Optional[float] = None
+) -> float:
+    """
+    Block until the provider quota grants `tokens`.
+
+    Returns:
+        float: seconds spent waiting
+
+    Raises:
+        QuotaExceeded: the quota does not free up within max_wait seconds
+        (RATE_LIMIT_MAX_WAIT_SECONDS by default)
+    """
+    max_wait = MAX_WAIT_SECONDS if max_wait is None else max_wait
+    waited = 0.0
+    while True:
+        granted, wait, _ = _take(provider, tokens)
+        if granted:
+            return waited
+        if waited + wait > max_wait:
+            raise QuotaExceeded(f"{provider} quota exhausted, retry in {wait:.1f}s")
+        time.sleep(wait)
+        waited += wait
+
+
+async def acquire_async(
+    provider: str, tokens: float = 1, max_wait: Optional[float] = None
+) -> float:
+    """Async acquire(), the redis round-trip runs off the event loop"""
+    max_wait = MAX_WAIT_SECONDS if max_wait is None else max_wait
+    waited = 0.0
+    while True:
+        if _script is None:
+            granted, wait, _ = _take(provider, tokens)
+        else:
+            granted, wait, _ = await asyncio.to_thread(_take, provider, tokens)
+        if granted:
+            return waited
+        if waited + wait > max_wait:
+            raise QuotaExceeded(f"{provider} quota exhausted, retry in {wait:.1f}s")
+        await asyncio.sleep(wait)
+        waited += wait
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def block(provider: str, seconds: float) -> None:
+    """Stop every worker from calling the provider for `seconds` (e.g. after a 429)"""
+    logger.warning("%s rate limited upstream, pausing for %.1fs", provider, seconds)
+    _take(provider, tokens=0, block=seconds)
+
+
+def on_rate_limited(provider: str, retry_after: Optional[str]) -> None:
+    """Honour the Retry-After of a 429 for the whole provider"""
+    seconds = parse_retry_after(retry_after)
+    block(provider, BACKOFF_SECONDS if seconds is None else seconds)
+
+
+def remaining(provider: str) -> dict:
+    """Quota left for a provider (tokens available now, seconds it is blocked for)"""
+    quota = get_quota(provider)
+    _, wait, left = _take(provider, tokens=0)
+    return {
+        "limit": quota.requests,
+        "period_seconds": quota.seconds,
+        "remaining": int(left),
+        "blocked_seconds": round(wait, 3),
+    }
+
+
+def get_remaining() -> Dict[str, dict]:
+    """remaining() of every known provider"""
+    return {provider: remaining(provider) for provider in DEFAULT_QUOTAS}
+
+
+def reset(provider: Optional[str] = None) -> None:
+    """Drop the in-process bucket of a provider (all when None)"""
+    with _local_lock:
+        if provider is None:
+            _local.clear()
+        else:
+            _local.pop(provider, None)
@@ -3,9 +3,11 @@
 import os
 
 import redis
+import redis.asyncio
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
 
+from backend.utils.invalidation_bus import invalidate
 from backend.utils.logger import get_logger
 
 load_dotenv()
@@ -25,6 +27,18 @@ except redis.exceptions.ConnectionError as e:
     logger.error("Redis connection failed: %s", e)
     redis_client = None
 
+# async counterpart used by the async ingest path, connects lazily on first command
+async_redis_client = (
+    redis.asyncio.Redis(
+        host=os.getenv("REDIS_HOST", "localhost"),
+        port=int(os.getenv("REDIS_PORT", "6379")),
+        db=int(os.getenv("REDIS_DB", "0")),
+        password=os.getenv("REDIS_PASSWORD", None),
+    )
+    if redis_client
+    else None
+)
+
 
 @app.post("/expire_cache/")
 async def expire_cache(request: Request):
@@ -44,7 +58,7 @@ async def expire_cache(request: Request):
             return {"status": "info", "message": "No cache_key provided"}
         if not redis_client:
             return {"status": "info", "message": "Redis client not available"}
-        result = redis_client.delete(cache_key)
+        result = invalidate(redis_client, [cache_key])
         if result:
             logger.info("Cache key '%s' expired successfully", cache_key)
             return {
@@ -61,6 +75,41 @@ async def expire_cache(request: Request):
         return {"status": "error", "message": f"Cache expiry failed: {str(e)}"}
 
 
+@app.post("/expire_cache/batch/")
+async def expire_cache_batch(request: Request):
+    """
+    Expires many cache keys at once, in redis and in the local caches of every worker.
+
+    Args:
+        request (Request): FastAPI request object containing JSON with 'keys'
+            (exact cache keys) and/or 'patterns' (glob patterns, expanded with SCAN).
+
+    Returns:
+        dict: Status and number of keys removed.
+    """
+    try:
+        data = await request.json()
+    except ValueError:
+        return {"status": "error", "message": "Invalid JSON body"}
+    if not isinstance(data, dict):
+        return {"status": "error", "message": "Invalid JSON body"}
+    keys = [key for key in data.get("keys") or [] if isinstance(key, str)]
+    patterns = [p for p in data.get("patterns") or [] if isinstance(p, str)]
+    if not keys and not patterns:
+        return {"status": "info", "message": "No keys or patterns provided"}
+    if not redis_client:
+        return {"status": "info", "message": "Redis client not available"}
+
+    removed = invalidate(redis_client, keys, patterns)
+    logger.info(
+        "Expired %d cache keys (%d keys, %d patterns requested)",
+        removed,
+        len(keys),
+        len(patterns),
+    )
+    return {"status": "success", "message": f"Removed {removed} cache keys"}
+
+
 @app.get("/health/")
 def health():
     """
@@ -0,0 +1,75 @@
+"""
+Bulk key removal helpers shared by the cache invalidation paths
+(backend/utils/redis_client.py endpoints, backend/ingest/screener_cache.py).
+
+Keys are removed with UNLINK (memory reclaimed in a background thread on the
+redis side), many at a time in one pipeline; patterns are expanded with SCAN so
+the server is never blocked by KEYS.
+"""
+
+import os
+from typing import Iterable, List
+
+import redis
+from dotenv import load_dotenv
+
+from backend.utils.logger import get_logger
+
+load_dotenv()
+logger = get_logger(__file__)
+
+UNLINK_BATCH_SIZE = int(os.getenv("REDIS_UNLINK_BATCH_SIZE", "500"))
+
+
+def _batches(keys: Iterable, size: int) -> Iterable[List]:
+    batch = []
+    for key in keys:
+        batch.append(key)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def unlink_keys(client, keys: Iterable[str]) -> int:
+    """
+    Remove many keys in one pipelined round-trip, UNLINK-ing UNLINK_BATCH_SIZE
+    keys per command.
+
+    Returns:
+        int: number of keys that existed and were removed
+    """
+    keys = list(dict.fromkeys(key for key in keys if key))
+    if not client or not keys:
+        return 0
+
+    try:
+        pipe = client.pipeline(transaction=False)
+        for batch in _batches(keys, UNLINK_BATCH_SIZE):
+            pipe.unlink(*batch)
+        return sum(pipe.execute())
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Failed to unlink %d keys: %s", len(keys), e)
+        return 0
+
+
+def unlink_pattern(client, pattern: str) -> int:
+    """
+    Remove every key matching a glob pattern, found incrementally with SCAN.
+    A pattern made only of wildcards is refused, it would empty the database.
+
+    Returns:
+        int: number of keys removed
+    """
+    if not client or not pattern or not pattern.strip("*?"):
+        return 0
+
+    removed = 0
+    try:
+        keys = client.scan_iter(match=pattern, count=UNLINK_BATCH_SIZE)
+        for batch in _batches(keys, UNLINK_BATCH_SIZE):
+            removed += client.unlink(*batch)
+    except (redis.RedisError, ConnectionError) as e:
+        logger.warning("Failed to unlink keys matching %s: %s", pattern, e)
+    return removed
@@ -0,0 +1,101 @@
+"""Tests for the map-reduce AI analysis over chunks of peers"""
+
+import threading
+from unittest.mock import MagicMock, PropertyMock, patch
+
+import pandas as pd
+from google.api_core.exceptions import ResourceExhausted
+
+from backend.simplai import ai
+from backend.simplai.ai import chunk_view, extract_info_gemini_chunked
+
+
+def view(tickers):
+    """Combined statement view with one revenue row per ticker"""
+    return pd.DataFrame(
+        {
+            "ticker": tickers,
+            "statement_type": "income-statement",
+            "metric": "revenue",
+            "2024-12-31": [float(i + 1) for i in range(len(tickers))],
+            "2023-12-31": [float(i) for i in range(len(tickers))],
+        }
+    )
+
+
+def test_chunk_view_repeats_target_and_honours_groups():
+    """Test that every chunk holds the target and at most chunk_tickers peers"""
+    df = view(["TSLA", "F", "GM", "RIVN", "NIO", "XOM"])
+
+    chunks = chunk_view(df, chunk_tickers=2)
+    assert [list(c["ticker"]) for c in chunks] == [
+        ["TSLA", "F", "GM"],
+        ["TSLA", "RIVN", "NIO"],
+        ["TSLA", "XOM"],
+    ]
+
+    chunks = chunk_view(df, chunk_tickers=3, groups={"auto": ["F", "GM", "NIO"]})
+    assert [list(c["ticker"]) for c in chunks] == [
+        ["TSLA", "F", "GM", "NIO"],
+        ["TSLA", "RIVN", "XOM"],
+    ]
+
+
+def test_chunks_answered_concurrently_then_reduced():
+    """Test the map calls run in parallel and one reduce call combines them"""
+    in_flight = threading.Barrier(2, timeout=5)
+
+    def generate(prompt):
+        if "partial answers" in prompt:
+            return MagicMock(text="combined answer")
+        in_flight.wait()  # both map calls must be in flight at once
+        part = "part 1" if "part 1 of 2" in prompt else "part 2"
+        return MagicMock(text=f"{part} answer")
+
+    with (
+        patch.object(ai, "redis_client", None),
+        patch.object(ai, "model") as model,
+    ):
+        model.generate_content.side_effect = generate
+        result = extract_info_gemini_chunked(
+            view(["TSLA", "F", "GM", "RIVN"]),
+            "revenue?",
+            chunk_tickers=2,
+            max_workers=2,
+        )
+
+    assert result == "combined answer"
+    assert model.generate_content.call_count == 3
+    reduce_prompt = model.generate_content.call_args.args[0]
+    assert "part 1 answer" in reduce_prompt and "part 2 answer" in reduce_prompt
+
+
+def test_failed_chunk_left_out_of_the_reduce():
+    """Test that an API error or a blocked response in one chunk only drops that
+    chunk, the answered chunks are still reduced"""
+
+    def generate(prompt):
+        if "partial answers" in prompt:
+            return MagicMock(text="combined answer")
+        if "part 2 of 3" in prompt:
+            raise ResourceExhausted("quota exceeded")
+        if "part 3 of 3" in prompt:
+            blocked = MagicMock()
+            type(blocked).text = PropertyMock(side_effect=ValueError("blocked"))
+            return blocked
+        return MagicMock(text="part 1 answer")
+
+    with (
+        patch.object(ai, "redis_client", None),
+        patch.object(ai, "model") as model,
+    ):
+        model.generate_content.side_effect = generate
+        result = extract_info_gemini_chunked(
+            view(["TSLA", "F", "GM", "RIVN", "NIO", "XOM", "NKLA"]),
+            "revenue?",
+            chunk_tickers=2,
+        )
+
+    assert result == "combined answer"
+    reduce_prompt = model.generate_content.call_args.args[0]
+    assert "part 1 answer" in reduce_prompt and "part 2:" not in reduce_prompt
@@ -0,0 +1,53 @@
+"""Tests for the content-addressed AI response cache"""
+
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from backend.simplai import ai
+from backend.simplai.response_cache import data_digest, response_key
+
+
+def test_key_ignores_prompt_formatting_but_not_data_or_model():
+    """Test that only meaningful prompt, data or model changes produce a new key"""
+    digest = data_digest("metric,2024\nrevenue,1.00\n")
+    key = response_key("gemini-2.5-flash", "What  are the\nrevenue trends?", digest)
+
+    assert key == response_key(
+        "gemini-2.5-flash", "what are the revenue trends? ", digest
+    )
+    assert key != response_key("gemini-2.5-pro", "what are the revenue trends?", digest)
+    assert key != response_key(
+        "gemini-2.5-flash",
+        "what are the revenue trends?",
+        data_digest("metric,2024\nrevenue,2.00\n"),
+    )
+
+
+def test_repeat_question_served_from_cache_and_bypassable():
+    """Test that the model is called once for a repeated question, again on bypass"""
+    store = {}
+    client = MagicMock()
+    client.get.side_effect = store.get
+    client.set.side_effect = lambda key, value, ex=None: store.__setitem__(key, value)
+    df = pd.DataFrame(
+        {
+            "ticker": ["TSLA"],
+            "statement_type": ["income-statement"],
+            "metric": ["revenue"],
+            "2024-12-31": [97.0],
+        }
+    )
+
+    with (
+        patch.object(ai, "redis_client", client),
+        patch.object(ai, "model") as model,
+    ):
+        model.generate_content.return_value.text = " Revenue grew. "
+
+        assert ai.extract_info_gemini(df, "Revenue trend?") == "Revenue grew."
+        assert ai.extract_info_gemini(df, "revenue   trend?") == "Revenue grew."
+        assert model.generate_content.call_count == 1
+
+        ai.extract_info_gemini(df, "Revenue trend?", use_cache=False)
+        assert model.generate_content.call_count == 2
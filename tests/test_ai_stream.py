@@ -0,0 +1,94 @@
+"""Tests for the streaming AI analysis and its server-sent events route"""
+
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+
+from backend.api import analysis
+from backend.simplai import ai
+from backend.simplai.ai import stream_info_gemini
+
+
+def statements():
+    return [
+        pd.DataFrame(
+            {
+                "date": ["2024-12-31", "2023-12-31"],
+                "revenue": [97.0, 96.0],
+                "ticker": "TSLA",
+                "statement_type": "income-statement",
+            }
+        )
+    ]
+
+
+def streamed(*pieces):
+    return iter([MagicMock(text=piece) for piece in pieces])
+
+
+def test_stream_yields_pieces_then_serves_cached_answer():
+    """Test that pieces arrive as generated and the full answer is cached"""
+    store = {}
+    client = MagicMock()
+    client.get.side_effect = store.get
+    client.set.side_effect = lambda key, value, ex=None: store.__setitem__(key, value)
+    view = pd.DataFrame(
+        {
+            "ticker": ["TSLA"],
+            "statement_type": ["income-statement"],
+            "metric": ["revenue"],
+            "2024-12-31": [97.0],
+        }
+    )
+
+    with (
+        patch.object(ai, "redis_client", client),
+        patch.object(ai, "model") as model,
+    ):
+        model.generate_content.return_value = streamed("Revenue ", "grew.")
+        assert list(stream_info_gemini(view, "revenue?")) == ["Revenue ", "grew."]
+        model.generate_content.assert_called_once()
+        assert model.generate_content.call_args.kwargs == {"stream": True}
+
+        assert list(stream_info_gemini(view, "revenue?")) == ["Revenue grew."]
+        assert model.generate_content.call_count == 1
+
+
+def test_sse_events_of_a_run():
+    """Test the event stream of a run: status events, answer pieces, done"""
+    with (
+        patch.object(analysis, "create_financial_data", return_value=statements()),
+        patch.object(
+            analysis, "normalize_statements", side_effect=lambda dfs, **kwargs: dfs
+        ) as normalize,
+        patch.object(ai, "redis_client", None),
+        patch.object(ai, "model") as model,
+    ):
+        model.generate_content.return_value = streamed("Revenue\nrose", " 1%.")
+        events = list(analysis.analysis_events(["TSLA"], "revenue?", True, None))
+
+    assert events == [
+        "event: status\ndata: fetching statements\n\n",
+        "event: status\ndata: analyzing\n\n",
+        "data: Revenue\ndata: rose\n\n",
+        "data:  1%.\n\n",
+        "event: done\ndata: \n\n",
+    ]
+    assert normalize.call_args.kwargs == {"millions": False}
+
+
+def test_stream_route_normalizes_tickers():
+    """Test that the route answers with an event stream over the cleaned tickers"""
+    with patch.object(analysis, "analysis_events") as events:
+        response = analysis.stream_analysis(
+            tickers=" tsla, f ,tsla", prompt="revenue?", use_cache=False, chunked=None
+        )
+
+    assert response.media_type == "text/event-stream"
+    events.assert_called_once_with(["TSLA", "F"], "revenue?", False, None)
+
+    with pytest.raises(HTTPException) as error:
+        analysis.stream_analysis(tickers=" , ", prompt="revenue?")
+    assert error.value.status_code == 400
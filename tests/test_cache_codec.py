@@ -0,0 +1,57 @@
+"""Tests for the pluggable cache codecs used by the financial_data cache"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from backend.utils import cache_codec
+
+
+def sample_statements():
+    """two statements, one of them with a missing value"""
+    income = pd.DataFrame(
+        {
+            "date": ["2024-12-31", "2023-12-31"],
+            "revenue": [150000, 120000],
+            "ebit": [30000.5, np.nan],
+        }
+    )
+    balance = pd.DataFrame({"date": ["2024-12-31"], "cash": [20000]})
+    return [
+        {"statement_type": "income-statement", "data": income},
+        {"statement_type": "balance-sheet-statement", "data": balance},
+    ]
+
+
+@pytest.mark.parametrize("name", list(cache_codec.CODECS))
+def test_codec_roundtrip(name):
+    """Test that every codec decodes back to equal DataFrames"""
+    statements = sample_statements()
+    raw = cache_codec.CODECS[name].encode(statements)
+    decoded = cache_codec.decode(raw)
+
+    assert [s["statement_type"] for s in decoded] == [
+        s["statement_type"] for s in statements
+    ]
+    for original, restored in zip(statements, decoded):
+        pd.testing.assert_frame_equal(original["data"], restored["data"])
+
+
+def test_legacy_json_payload_fallback():
+    """Test that keys written as plain json before codecs existed still decode"""
+    legacy = json.dumps(
+        [{"statement_type": "income-statement", "data": [{"revenue": 1, "ebit": 2}]}]
+    )
+    decoded = cache_codec.decode(legacy)
+
+    assert decoded[0]["statement_type"] == "income-statement"
+    assert decoded[0]["data"].to_dict("records") == [{"revenue": 1, "ebit": 2}]
+
+
+def test_codec_selected_per_namespace(monkeypatch):
+    """Test that CACHE_CODEC_<NAMESPACE> overrides the default codec"""
+    monkeypatch.setenv("CACHE_CODEC_FINANCIAL_DATA", "json")
+    assert cache_codec.get_codec("financial_data").name == "json"
+    assert cache_codec.get_codec("other").name == cache_codec.DEFAULT_CODEC
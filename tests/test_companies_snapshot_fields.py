@@ -0,0 +1,145 @@
+"""Tests for the single-pass snapshot field extraction"""
+
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from backend.domain.financials.models import FinancialSnapshot
+from backend.ingest import companies_snapshot_fields as snapshot_fields
+from backend.ingest.companies_snapshot_fields import (
+    create_companies_snapshot_fields,
+    snapshot_table,
+)
+
+
+def statement(ticker, statement_type, rows):
+    """Statement frame, newest period first"""
+    df = pd.DataFrame(rows)
+    df["ticker"] = ticker
+    df["statement_type"] = statement_type
+    return df
+
+
+def sample_frames():
+    """Three statements for the target, an incomplete peer"""
+    return [
+        statement(
+            "TSLA",
+            "income-statement",
+            [
+                {
+                    "date": "2024-12-31",
+                    "revenue": 97.0,
+                    "ebit": 8.0,
+                    "netIncome": 7.0,
+                    "interestExpense": 0.3,
+                    "incomeTaxExpense": 1.8,
+                },
+                {
+                    "date": "2023-12-31",
+                    "revenue": 96.0,
+                    "ebit": 9.0,
+                    "netIncome": 15.0,
+                    "interestExpense": 0.2,
+                    "incomeTaxExpense": -5.0,
+                },
+            ],
+        ),
+        statement(
+            "TSLA",
+            "balance-sheet-statement",
+            [
+                {
+                    "date": "2024-12-31",
+                    "totalDebt": 13.0,
+                    "totalStockholdersEquity": 72.0,
+                    "cashAndShortTermInvestments": 36.0,
+                }
+            ],
+        ),
+        statement(
+            "TSLA",
+            "cash-flow-statement",
+            [
+                {
+                    "date": "2024-12-31",
+                    "capitalExpenditure": -11.0,
+                    "changeInWorkingCapital": 0.5,
+                    "depreciationAndAmortization": 5.4,
+                }
+            ],
+        ),
+        statement(
+            "F",
+            "income-statement",
+            [
+                {
+                    "date": "2024-12-31",
+                    "revenue": 185.0,
+                    "operatingIncome": 5.0,
+                    "netIncome": 5.9,
+                    "interestExpense": 1.0,
+                    "incomeTaxExpense": 1.3,
+                }
+            ],
+        ),
+        statement(
+            "F",
+            "balance-sheet-statement",
+            [
+                {
+                    "date": "2024-12-31",
+                    "totalDebt": 160.0,
+                    "totalEquity": 44.0,
+                    "cashAndShortTermInvestments": 28.0,
+                }
+            ],
+        ),
+    ]
+
+
+def sample_infos():
+    infos = MagicMock()
+    infos.get_many.side_effect = lambda tickers: {
+        "TSLA": {"marketCap": 1.0e12, "sharesOutstanding": 3.2e9, "beta": 2.3},
+        "F": {"marketCap": 4.0e10, "beta": 1.6},
+    }
+    return infos
+
+
+def test_snapshot_table_latest_period_and_mask():
+    """Test one wide row per ticker from the latest periods, with a missing mask"""
+    with patch.object(snapshot_fields, "trailing_fields", return_value=(None, None)):
+        table, missing = snapshot_table(sample_frames(), sample_infos())
+
+    assert list(table.index) == ["TSLA", "F"]
+    assert table.loc["TSLA", "last_annual_revenue"] == 97.0
+    assert table.loc["TSLA", "last_annual_equity"] == 72.0
+    assert table.loc["F", "last_annual_ebit"] == 5.0  # operatingIncome fallback
+    # trailing figures fall back to the last annual ones, cash is target only
+    assert table.loc["TSLA", "trailing_sales"] == 97.0
+    assert pd.isna(table.loc["F", "last_annual_cash"])
+
+    assert not missing.loc["TSLA"].any()
+    assert sorted(missing.columns[missing.loc["F"]]) == [
+        "current_shares_outstanding",
+        "last_annual_capex",
+        "last_annual_chng_wc",
+        "last_annual_da",
+    ]
+
+
+def test_create_companies_snapshot_fields_builds_snapshots():
+    """Test that the field dicts use None for missing values and feed FinancialSnapshot"""
+    with patch.object(snapshot_fields, "trailing_fields", return_value=(98.0, 7.5)):
+        fields = create_companies_snapshot_fields(sample_frames(), infos=sample_infos())
+
+    assert fields["TSLA"]["trailing_sales"] == 98.0
+    assert fields["TSLA"]["current_shares_outstanding"] == 3_200_000_000
+    assert isinstance(fields["TSLA"]["current_shares_outstanding"], int)
+    assert fields["F"]["last_annual_capex"] is None
+    assert fields["F"]["trailing_ebit"] is None
+
+    snapshot = FinancialSnapshot(**fields["TSLA"])
+    assert snapshot.current_beta == 2.3
+    assert snapshot.marginal_tax_rate == 0.21
@@ -1,14 +1,24 @@
 # pylint: disable=redefined-outer-name
 """Tests for create_financial_data function with mocked redis_client, webhooks, and API responses"""
 
+import asyncio
 import json
 from unittest.mock import MagicMock, patch
 
 import pandas as pd
 import pytest
+import requests
 
-from backend.ingest import fetch
+from backend.ingest import fetch, screener_cache, statement_cache, webhook
 from backend.ingest.fetch import REQUIRED_STATEMENTS
+from backend.ingest.statement_cache import (
+    cache_key,
+    digest_key,
+    refresh_key,
+    statement_digest,
+    ticker_digest,
+)
+from backend.ingest.webhook import InvalidationQueue
 
 
 def sample_financial_data():
@@ -65,6 +75,19 @@ def sample_financial_data():
     ]
 
 
+def cached_digest(ticker_data):
+    """digest stored next to a cached ticker entry"""
+    return ticker_digest(
+        [
+            {
+                "statement_type": stmt["statement_type"],
+                "digest": statement_digest(pd.DataFrame(stmt["data"])),
+            }
+            for stmt in ticker_data
+        ]
+    )
+
+
 @pytest.fixture
 def financial_data_factory():
     return sample_financial_data
@@ -77,8 +100,8 @@ def test_cache_and_webhook(financial_data_factory):
 
     with (
         patch.object(fetch, "redis_client") as mock_redis,
-        patch.object(fetch, "notify_cache_expiry") as mock_webhook,
-        patch.object(fetch, "requests") as mock_requests,
+        patch.object(fetch, "notify_cache_update") as mock_webhook,
+        patch.object(fetch, "http_client") as mock_http,
     ):
 
         mock_redis.__bool__ = lambda self: True
@@ -96,34 +119,36 @@ def test_cache_and_webhook(financial_data_factory):
                 resp.json.return_value = [{"operating_cash_flow": 50000}]
             mock_responses.append(resp)
 
-        mock_requests.get.side_effect = mock_responses
-        mock_requests.RequestException = Exception
+        mock_http.get.side_effect = mock_responses
 
         # CACHE MISS TEST
-        mock_redis.get.return_value = None
-        mock_redis.set.return_value = True
+        mock_redis.mget.return_value = [None]
+        mock_pipe = mock_redis.pipeline.return_value
+        mock_pipe.execute.return_value = [True, None]
 
         result = fetch.create_financial_data([ticker])
 
         assert isinstance(result, list), f"Expected list, got {type(result)}"
         assert len(result) == 3, f"Should return 3 DataFrames, got {len(result)}"
-        assert mock_redis.set.called, "Redis set should be called"
+        assert mock_pipe.set.called, "Redis set should be called"
         assert mock_webhook.called, "Webhook should be called on cache miss"
 
         # Reset for cache hit test
         mock_webhook.reset_mock()
         mock_redis.reset_mock()
-        mock_requests.reset_mock()
+        mock_http.reset_mock()
 
         # CACHE HIT TEST
-        mock_redis.get.return_value = json.dumps(cached_data)
+        mock_redis.mget.return_value = [json.dumps(cached_data)]
 
         dfs2 = fetch.create_financial_data([ticker])
 
         assert isinstance(dfs2, list), f"Expected list, got {type(dfs2)}"
         assert len(dfs2) == 3, "Should return 3 cached DataFrames"
         assert not mock_webhook.called, "Webhook should not be called on cache hit"
-        assert not mock_redis.set.called, "Redis set should NOT be called on cache hit"
+        assert (
+            not mock_redis.pipeline.called
+        ), "Redis set should NOT be called on cache hit"
 
 
 def test_webhook_called_on_data_change(financial_data_factory):
@@ -133,8 +158,8 @@ def test_webhook_called_on_data_change(financial_data_factory):
 
     with (
         patch.object(fetch, "redis_client") as mock_redis,
-        patch.object(fetch, "notify_cache_expiry") as mock_webhook,
-        patch.object(fetch, "requests") as mock_requests,
+        patch.object(fetch, "notify_cache_update") as mock_webhook,
+        patch.object(fetch, "http_client") as mock_http,
     ):
 
         mock_redis.__bool__ = lambda self: True
@@ -152,15 +177,12 @@ def test_webhook_called_on_data_change(financial_data_factory):
                 resp.json.return_value = [{"operating_cash_flow": 555555}]
             mock_responses.append(resp)
 
-        mock_requests.get.side_effect = mock_responses
-        mock_requests.RequestException = Exception
+        mock_http.get.side_effect = mock_responses
 
-        # First get: None (cache miss), second get: old data
-        mock_redis.get.side_effect = [
-            None,
-            json.dumps(cached_data),
-        ]
-        mock_redis.set.return_value = True
+        # MGET: None (cache miss), SET ... GET in the write pipeline: old digest
+        mock_redis.mget.return_value = [None]
+        mock_pipe = mock_redis.pipeline.return_value
+        mock_pipe.execute.return_value = [True, cached_digest(cached_data).encode()]
 
         dfs = fetch.create_financial_data([ticker])
 
@@ -211,8 +233,8 @@ def test_no_webhook_when_data_unchanged():
 
     with (
         patch.object(fetch, "redis_client") as mock_redis,
-        patch.object(fetch, "notify_cache_expiry") as mock_webhook,
-        patch.object(fetch, "requests") as mock_requests,
+        patch.object(fetch, "notify_cache_update") as mock_webhook,
+        patch.object(fetch, "http_client") as mock_http,
     ):
 
         mock_redis.__bool__ = lambda self: True
@@ -230,20 +252,414 @@ def test_no_webhook_when_data_unchanged():
                 resp.json.return_value = [{"operating_cash_flow": 50000}]
             mock_responses.append(resp)
 
-        mock_requests.get.side_effect = mock_responses
-        mock_requests.RequestException = Exception
+        mock_http.get.side_effect = mock_responses
 
-        # First get: None (cache miss), second get: same data
-        mock_redis.get.side_effect = [
-            None,
-            json.dumps(same_data),
-        ]
-        mock_redis.set.return_value = True
+        # MGET: None (cache miss), SET ... GET in the write pipeline: same digest
+        mock_redis.mget.return_value = [None]
+        mock_pipe = mock_redis.pipeline.return_value
+        mock_pipe.execute.return_value = [True, cached_digest(same_data).encode()]
 
         dfs = fetch.create_financial_data([ticker])
 
         assert isinstance(dfs, list), f"Expected list, got {type(dfs)}"
-        assert mock_redis.set.called, "Redis set should be called"
+        assert mock_pipe.set.called, "Redis set should be called"
         assert (
             not mock_webhook.called
         ), "Webhook should NOT be called when data unchanged"
+
+
+def test_concurrent_fetch_keeps_ticker_order():
+    """Test that a concurrent fetch returns target first, then peers in input order"""
+    tickers = ["TSLA", "F", "GM", "RIVN"]
+
+    def fake_get(url, params=None):  # pylint: disable=unused-argument
+        resp = MagicMock()
+        resp.status_code = 200
+        ticker = url.split("?")[0].rsplit("/", 1)[-1]
+        resp.json.return_value = [{"symbol": ticker, "revenue": 100}]
+        return resp
+
+    with (
+        patch.object(fetch, "redis_client", None),
+        patch.object(fetch, "http_client") as mock_http,
+    ):
+        mock_http.get.side_effect = fake_get
+
+        dfs = fetch.create_financial_data(tickers, max_workers=8)
+
+    assert len(dfs) == len(tickers) * len(REQUIRED_STATEMENTS)
+    assert dfs[0]["ticker"].iloc[0] == "TSLA"
+    order = [(df["ticker"].iloc[0], df["statement_type"].iloc[0]) for df in dfs]
+    assert order == [(t, s) for t in tickers for s in REQUIRED_STATEMENTS]
+    assert all(df["symbol"].iloc[0] == df["ticker"].iloc[0] for df in dfs)
+
+
+def test_warm_tickers_resolved_in_one_mget(financial_data_factory):
+    """Test that a warm ticker set costs one MGET and no API or write round-trips"""
+    tickers = ["TSLA", "F", "GM"]
+    cached_data = json.dumps(financial_data_factory())
+
+    with (
+        patch.object(fetch, "redis_client") as mock_redis,
+        patch.object(fetch, "http_client") as mock_http,
+    ):
+        mock_redis.__bool__ = lambda self: True
+        mock_redis.mget.return_value = [cached_data] * len(tickers)
+
+        dfs = fetch.create_financial_data(tickers)
+
+    assert len(dfs) == len(tickers) * len(REQUIRED_STATEMENTS)
+    assert [df["ticker"].iloc[0] for df in dfs[::3]] == tickers
+    mock_redis.mget.assert_called_once()
+    assert not mock_redis.get.called
+    assert not mock_redis.pipeline.called
+    assert not mock_http.get.called
+
+
+def test_statement_digest_ignores_column_order():
+    """Test that digests match regardless of column order and change with values"""
+    df = pd.DataFrame([{"income": 150000, "ebit": 30000}])
+
+    assert statement_digest(df) == statement_digest(df[["ebit", "income"]])
+    assert statement_digest(df) != statement_digest(df.assign(ebit=30001))
+
+
+def test_stale_entry_served_and_refreshed_in_background(financial_data_factory):
+    """Test that a stale cache entry is returned at once and queued for refresh"""
+    stale_data = financial_data_factory()
+    for stmt in stale_data:
+        stmt["fetched_at"] = 0
+        for row in stmt["data"]:
+            row["date"] = "2019-12-31"
+
+    with (
+        patch.object(fetch, "redis_client") as mock_redis,
+        patch.object(fetch, "http_client") as mock_http,
+        patch.object(fetch, "schedule_refresh") as mock_refresh,
+    ):
+        mock_redis.__bool__ = lambda self: True
+        mock_redis.mget.return_value = [json.dumps(stale_data)]
+
+        dfs = fetch.create_financial_data(["TSLA"])
+
+    assert len(dfs) == 3, "Stale data should still be served"
+    assert not mock_http.get.called, "Request path should not wait on the API"
+    mock_refresh.assert_called_once()
+    assert list(mock_refresh.call_args.args[0]) == ["TSLA"]
+
+
+def test_latest_mode_requests_one_period():
+    """Test that latest-only mode asks FMP for a single period per statement"""
+    with (
+        patch.object(fetch, "redis_client", None),
+        patch.object(fetch, "http_client") as mock_http,
+    ):
+        resp = MagicMock(status_code=200)
+        resp.json.return_value = [{"date": "2024-12-31", "revenue": 1}]
+        mock_http.get.return_value = resp
+
+        dfs = fetch.create_financial_data(["TSLA"], mode="latest")
+
+    assert len(dfs) == 3
+    assert all(
+        call.kwargs["params"]["limit"] == 1 for call in mock_http.get.call_args_list
+    )
+
+
+def test_refresh_merges_only_new_periods():
+    """Test that a refresh requests the missing periods and merges them by date"""
+    cached_df = pd.DataFrame(
+        [
+            {"date": "2023-12-31", "revenue": 90},
+            {"date": "2022-12-31", "revenue": 80},
+        ]
+    )
+    cached = {"TSLA": [fetch.statement_entry("income-statement", cached_df)]}
+    new_df = pd.DataFrame(
+        [
+            {"date": "2024-12-31", "revenue": 100},
+            {"date": "2023-12-31", "revenue": 95},
+        ]
+    )
+
+    with (
+        patch.object(fetch, "_fetch_tickers") as mock_fetch,
+        patch.object(fetch, "_cache_tickers") as mock_cache,
+        patch.object(fetch, "incremental_limit", return_value=2),
+    ):
+        mock_fetch.return_value = {
+            "TSLA": [fetch.statement_entry("income-statement", new_df)]
+        }
+        fetch._refresh_tickers(cached)  # pylint: disable=protected-access
+
+    assert mock_fetch.call_args.args[2] == {("TSLA", "income-statement"): 2}
+    merged = mock_cache.call_args.args[0]["TSLA"][0]["data"]
+    assert merged["date"].tolist() == ["2024-12-31", "2023-12-31", "2022-12-31"]
+    assert merged["revenue"].tolist() == [100, 95, 80]
+
+
+def test_similar_screens_share_cache_entry():
+    """Test that near-identical targets hit the cached screen of the same bucket"""
+    store = {}
+
+    mock_redis = MagicMock()
+    mock_redis.__bool__ = lambda self: True
+    mock_redis.get.side_effect = store.get
+    mock_redis.set.side_effect = lambda key, value, ex=None: store.update({key: value})
+
+    with (
+        patch.object(fetch, "redis_client", mock_redis),
+        patch.object(fetch, "http_client") as mock_http,
+    ):
+        resp = MagicMock(status_code=200)
+        resp.json.return_value = [{"symbol": "F"}, {"symbol": "GM"}]
+        mock_http.get.return_value = resp
+
+        assert fetch.screener(1.00e12, 1.20) == ["F", "GM"]
+        assert fetch.screener(1.02e12, 1.21) == ["F", "GM"]
+        assert fetch.screener(5.00e12, 1.20) == ["F", "GM"]
+
+    assert mock_http.get.call_count == 2
+    assert mock_redis.set.call_args.kwargs["ex"] > 0
+
+
+def test_screener_pages_by_market_cap_and_prefilter():
+    """Test that a full page is followed by a page capped at its smallest market cap,
+    rows are pre-filtered, and a failed page ends the stream"""
+    calls = []
+
+    def fake_get(url, params=None):  # pylint: disable=unused-argument
+        calls.append((params["marketCapMoreThan"], params["marketCapLowerThan"]))
+        resp = MagicMock(status_code=200)
+        if len(calls) == 1:  # full page, largest caps first
+            resp.json.return_value = [
+                {"symbol": "TSLA", "exchangeShortName": "NASDAQ", "marketCap": 9e11},
+                {"symbol": "F", "exchangeShortName": "NYSE", "marketCap": 8e11},
+                {"symbol": "VOD", "exchangeShortName": "LSE", "marketCap": 7e11},
+                {"symbol": "SPY", "isEtf": True, "marketCap": 6e11},
+            ]
+        elif len(calls) == 2:  # next page, overlapping the boundary row
+            resp.json.return_value = [
+                {"symbol": "SPY", "isEtf": True, "marketCap": 6e11},
+                {"symbol": "F", "exchangeShortName": "NYSE", "marketCap": 8e11},
+                {"symbol": "GM", "exchangeShortName": "NYSE", "marketCap": 5e11},
+                {"symbol": "HMC", "exchangeShortName": "NYSE", "marketCap": 4e11},
+            ]
+        else:
+            resp.raise_for_status.side_effect = requests.HTTPError("timeout")
+        return resp
+
+    with patch.object(fetch, "http_client") as mock_http:
+        mock_http.get.side_effect = fake_get
+        tickers = list(fetch.iter_screener(1e12, 1.0, target="TSLA", page_size=4))
+
+    assert tickers == ["F", "GM", "HMC"]
+    assert len(calls) == 3
+    (low, high), second, third = calls
+    assert second == (low, 6e11) and third == (low, 4e11)
+
+
+def test_cold_screen_of_one_page_makes_one_request():
+    """Test that a default screen filled by its first page sends a single request"""
+    page = [
+        {"symbol": f"X{i}", "marketCap": 1e12 - i}
+        for i in range(fetch.SCREENER_PAGE_SIZE)
+    ]
+
+    with (
+        patch.object(fetch, "redis_client", None),
+        patch.object(fetch, "http_client") as mock_http,
+    ):
+        mock_http.get.return_value.json.return_value = page
+        tickers = fetch.screener(1e12, 1.0, target="X0")
+
+    assert mock_http.get.call_count == 1
+    assert tickers == [row["symbol"] for row in page[1:]]
+
+
+def test_screener_cache_hook_registered_from_ingest():
+    """Test that the screener expiry hook lives on the cache endpoints app and drops
+    the screens of the requested country"""
+    request = MagicMock()
+    request.json = MagicMock(return_value=asyncio.sleep(0, {"country": "us"}))
+    routes = [route.path for route in screener_cache.app.routes]
+    client = MagicMock()
+
+    with (
+        patch.object(screener_cache, "redis_client", client),
+        patch.object(screener_cache, "unlink_pattern", return_value=3) as unlink,
+    ):
+        result = asyncio.run(screener_cache.expire_screener_cache(request))
+
+    assert "/expire_screener_cache/" in routes
+    unlink.assert_called_once_with(client, "screener:US:*")
+    assert result["message"] == "Removed 3 cached screens"
+
+
+class FakeRedis:
+    """dict-backed stand-in for the SET / UNLINK / PUBLISH calls of the cache path"""
+
+    def __init__(self):
+        self.store, self.published = {}, []
+
+    def pipeline(self, transaction=False):  # pylint: disable=unused-argument
+        return FakePipeline(self)
+
+    def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    def unlink(self, *keys):
+        return sum(self.store.pop(key, None) is not None for key in keys)
+
+    def publish(self, channel, message):
+        self.published.append((channel, json.loads(message)))
+        return 1
+
+
+class FakePipeline:
+    """Pipeline of FakeRedis, commands run at once and results are collected"""
+
+    def __init__(self, client):
+        self.client, self.results = client, []
+
+    # pylint: disable-next=unused-argument,too-many-arguments
+    def set(self, key, value, ex=None, get=False, nx=False):
+        previous = self.client.store.get(key)
+        if nx and previous is not None:
+            self.results.append(None)
+            return
+        self.client.store[key] = value
+        self.results.append(previous if get else True)
+
+    def unlink(self, *keys):
+        self.results.append(self.client.unlink(*keys))
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+def test_refreshed_entry_stays_cached():
+    """Test that a refresh finding new data keeps its payload in redis and only tells
+    the other workers to drop their local copy"""
+    cached_df = pd.DataFrame([{"date": "2023-12-31", "revenue": 90}])
+    new_df = pd.DataFrame([{"date": "2024-12-31", "revenue": 100}])
+    cached = {"TSLA": [fetch.statement_entry("income-statement", cached_df)]}
+    fake = FakeRedis()
+    fake.store[digest_key("TSLA")] = "income-statement=old"
+    queue = InvalidationQueue(flush_interval=60)
+
+    with (
+        patch.object(fetch, "redis_client", fake),
+        patch.object(webhook, "redis_client", fake),
+        patch.object(webhook, "invalidation_queue", queue),
+        patch.object(queue, "_run"),
+        patch.object(fetch, "incremental_limit", return_value=2),
+        patch.object(fetch, "_fetch_tickers") as mock_fetch,
+    ):
+        mock_fetch.return_value = {
+            "TSLA": [fetch.statement_entry("income-statement", new_df)]
+        }
+        fetch._refresh_tickers(cached)  # pylint: disable=protected-access
+        queue.flush()
+
+    assert cache_key("TSLA") in fake.store, "Refreshed payload must stay in redis"
+    assert fake.published[0][1] == {"keys": [cache_key("TSLA")], "patterns": []}
+
+
+def test_switching_depth_is_not_a_change():
+    """Test that alternating 'latest' and 'full' entries of unchanged data keep their
+    own digests and do not broadcast an update on every switch"""
+    full_df = pd.DataFrame(
+        [{"date": "2024-12-31", "revenue": 100}, {"date": "2023-12-31", "revenue": 90}]
+    )
+    full = {"TSLA": [fetch.statement_entry("income-statement", full_df)]}
+    latest = {
+        "TSLA": [fetch.statement_entry("income-statement", full_df.head(1), "latest")]
+    }
+    fake = FakeRedis()
+
+    with (
+        patch.object(fetch, "redis_client", fake),
+        patch.object(fetch, "notify_cache_update") as mock_notify,
+    ):
+        fetch._cache_tickers(latest)  # pylint: disable=protected-access
+        fetch._cache_tickers(full)  # pylint: disable=protected-access
+        assert mock_notify.call_count == 2
+        for entry in (latest, full, latest, full):
+            fetch._cache_tickers(entry)  # pylint: disable=protected-access
+
+    assert mock_notify.call_count == 2, "Only the first write of each depth is new"
+    assert digest_key("TSLA") in fake.store
+    assert digest_key("TSLA", "latest") in fake.store
+
+
+def test_schedule_refresh_claims_lock_through_pipeline():
+    """Test that scheduling a refresh takes the redis lock of each ticker once and
+    only submits the tickers it claimed"""
+    cached = {"TSLA": [], "F": []}
+    fake = FakeRedis()
+    fake.store[refresh_key("F")] = 1  # held by another worker
+
+    with (
+        patch.object(fetch, "redis_client", fake),
+        patch.object(fetch, "_refresh_executor") as executor,
+    ):
+        fetch.schedule_refresh(cached)
+
+    assert fake.store[refresh_key("TSLA")] == 1
+    executor.submit.assert_called_once()
+    assert list(executor.submit.call_args.args[1]) == ["TSLA"]
+    fetch._refreshing.clear()  # pylint: disable=protected-access
+
+
+def test_stale_entry_refreshed_end_to_end():
+    """Test stale-while-revalidate without mocking the scheduling: the stale entry is
+    served, the ticker is claimed and refreshed, and its new payload is cached"""
+    stale = []
+    for statement in REQUIRED_STATEMENTS:
+        df = pd.DataFrame([{"date": "2019-12-31", "income": 1}])
+        stale.append({**fetch.statement_entry(statement, df), "fetched_at": 0})
+    fake = FakeRedis()
+    fake.store.update(
+        {cache_key(t): p for t, p in fetch.cache_payloads({"TSLA": stale}).items()}
+    )
+    stale_payload = fake.store[cache_key("TSLA")]
+    new_df = pd.DataFrame([{"date": "2024-12-31", "income": 2}])
+
+    with (
+        patch.object(fetch, "redis_client", fake),
+        patch.object(statement_cache, "ensure_listener", return_value=False),
+        patch.object(statement_cache.local_payloads, "get", return_value=None),
+        patch.object(fetch, "_refresh_executor") as executor,
+        patch.object(fetch, "_fetch_tickers") as mock_fetch,
+        patch.object(fetch, "notify_cache_update"),
+    ):
+        executor.submit.side_effect = lambda fn, *args: fn(*args)
+        mock_fetch.return_value = {
+            "TSLA": [fetch.statement_entry("income-statement", new_df)]
+        }
+        dfs = fetch.create_financial_data(["TSLA"])
+
+    assert len(dfs) == 3, "Stale data should still be served"
+    assert refresh_key("TSLA") in fake.store
+    mock_fetch.assert_called_once()
+    assert fake.store[cache_key("TSLA")] != stale_payload, "Refresh must be cached"
+    assert not fetch._refreshing  # pylint: disable=protected-access
+
+
+def test_failed_claim_does_not_block_later_refreshes():
+    """Test that a ticker whose refresh claim raised can be scheduled again"""
+    with (
+        patch.object(fetch, "claim_refresh") as claim,
+        patch.object(fetch, "_refresh_executor") as executor,
+    ):
+        claim.side_effect = [RuntimeError("claim failed"), ["TSLA"]]
+        with pytest.raises(RuntimeError):
+            fetch.schedule_refresh({"TSLA": []})
+        assert not fetch._refreshing  # pylint: disable=protected-access
+
+        fetch.schedule_refresh({"TSLA": []})
+
+    executor.submit.assert_called_once()
+    fetch._refreshing.clear()  # pylint: disable=protected-access
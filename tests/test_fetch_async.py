@@ -0,0 +1,69 @@
+"""Tests for the async ingest layer with a mocked httpx transport"""
+
+import asyncio
+from unittest.mock import patch
+
+import httpx
+
+from backend.ingest import fetch_async
+from backend.ingest.fetch import REQUIRED_STATEMENTS
+
+
+def fmp_handler(request: httpx.Request) -> httpx.Response:
+    """fake FMP api, echoes the ticker in every statement"""
+    if "company-screener" in str(request.url):
+        return httpx.Response(200, json=[{"symbol": "F"}, {"symbol": "GM"}, {}])
+    ticker = request.url.path.rsplit("/", 1)[-1]
+    return httpx.Response(200, json=[{"symbol": ticker, "revenue": 100}])
+
+
+def test_create_financial_data_async_keeps_order():
+    """Test that the async fetch returns target first, then peers in input order"""
+    tickers = ["TSLA", "F", "GM"]
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(fmp_handler)) as c:
+            return await fetch_async.create_financial_data_async(tickers, client=c)
+
+    with patch.object(fetch_async, "async_redis_client", None):
+        dfs = asyncio.run(run())
+
+    order = [(df["ticker"].iloc[0], df["statement_type"].iloc[0]) for df in dfs]
+    assert order == [(t, s) for t in tickers for s in REQUIRED_STATEMENTS]
+    assert all(df["symbol"].iloc[0] == df["ticker"].iloc[0] for df in dfs)
+
+
+def test_screener_async_skips_missing_symbols():
+    """Test that the async screener only returns entries with a symbol"""
+
+    async def run():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(fmp_handler)) as c:
+            return await fetch_async.screener_async(1e9, 1.0, client=c)
+
+    assert asyncio.run(run()) == ["F", "GM"]
+
+
+def test_screener_async_shares_the_sync_screen():
+    """Test that both screeners cache the same shape and drop the target on read"""
+    store = {}
+
+    class AsyncStore:
+        """redis.asyncio stand-in over the dict the sync mock writes to"""
+
+        async def get(self, key):
+            return store.get(key)
+
+        async def set(self, key, value, ex=None):  # pylint: disable=unused-argument
+            store[key] = value
+
+    async def run(target):
+        async with httpx.AsyncClient(transport=httpx.MockTransport(fmp_handler)) as c:
+            return await fetch_async.screener_async(1e9, 1.0, target=target, client=c)
+
+    with patch.object(fetch_async, "async_redis_client", AsyncStore()):
+        assert asyncio.run(run("F")) == ["GM"]
+        cached = dict(store)
+        assert asyncio.run(run("GM")) == ["F"]
+
+    assert store == cached
+    assert list(cached.values()) == ['["F", "GM"]']
@@ -0,0 +1,51 @@
+"""Tests for the filing-cadence freshness policy of cached statements"""
+
+import pandas as pd
+
+from backend.ingest import freshness
+
+DAY = 24 * 3600
+
+
+def entry(date: str, fetched_at):
+    """single cached statement with one period"""
+    return [
+        {
+            "statement_type": "income-statement",
+            "data": pd.DataFrame([{"date": date, "revenue": 1}]),
+            "fetched_at": fetched_at,
+        }
+    ]
+
+
+def test_fresh_until_next_filing_is_due():
+    """Test that an entry stays fresh before the next 10-K is expected"""
+    now = pd.Timestamp("2025-06-30").timestamp()
+    assert not freshness.is_stale(entry("2024-12-31", now - 60 * DAY), now=now)
+
+
+def test_stale_once_filing_due_and_recheck_elapsed():
+    """Test that an overdue filing is polled once per recheck interval"""
+    now = pd.Timestamp("2026-04-15").timestamp()
+    assert freshness.is_stale(entry("2024-12-31", now - 2 * DAY), now=now)
+    assert not freshness.is_stale(entry("2024-12-31", now - 60), now=now)
+
+
+def test_stale_after_max_age():
+    """Test that old entries are refreshed even when no new period is due"""
+    now = pd.Timestamp("2025-06-30").timestamp()
+    fetched_at = now - freshness.MAX_AGE_SECONDS - 1
+    assert freshness.is_stale(entry("2024-12-31", fetched_at), now=now)
+
+
+def test_legacy_entry_without_metadata_is_fresh():
+    """Test that entries without dates or fetch time are served as is"""
+    legacy = [{"statement_type": "income-statement", "data": pd.DataFrame([{"a": 1}])}]
+    assert not freshness.is_stale(legacy)
+
+
+def test_incremental_limit_counts_elapsed_periods():
+    """Test that a refresh asks for the elapsed periods plus the latest one"""
+    now = pd.Timestamp("2026-04-15").timestamp()
+    statement = entry("2024-12-31", now)[0]
+    assert freshness.incremental_limit(statement, now=now) == 2
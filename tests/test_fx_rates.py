@@ -0,0 +1,56 @@
+"""Tests for the batched FX rate table and the USD conversion built on it"""
+
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from backend.ingest import fetch, fx_rates
+
+
+@pytest.fixture(autouse=True)
+def empty_table():
+    """Start every test without in-process rates"""
+    fx_rates.clear_local()
+    yield
+    fx_rates.clear_local()
+
+
+def multi_response(results: dict) -> MagicMock:
+    response = MagicMock(status_code=200)
+    response.json.return_value = {"base": "USD", "results": results}
+    return response
+
+
+def test_rates_fetched_once_for_all_currencies():
+    """Test that missing currencies share one request and are then served locally"""
+    with (
+        patch.object(fx_rates, "redis_client", None),
+        patch.object(fx_rates, "http_client") as mock_http,
+    ):
+        mock_http.get.return_value = multi_response({"EUR": 0.5, "JPY": 150.0})
+
+        assert fx_rates.get_rates(["EUR", "usd", "JPY", "EUR"]) == {
+            "EUR": 0.5,
+            "JPY": 150.0,
+        }
+        assert fx_rates.get_rates(["JPY"]) == {"JPY": 150.0}
+
+    mock_http.get.assert_called_once()
+    assert mock_http.get.call_args.kwargs["params"]["to"] == "EUR,JPY"
+
+
+def test_convert_to_dollars_applies_table():
+    """Test that every non-USD frame is divided by its rate with a single lookup"""
+    dfs = []
+    for currency, revenue in [("EUR", 50.0), ("USD", 70.0), ("EUR", 10.0)]:
+        df = pd.DataFrame({"date": ["2024-12-31"], "revenue": [revenue]})
+        df.attrs["currency"] = currency
+        dfs.append(df)
+
+    with patch.object(fetch, "get_rates", return_value={"EUR": 0.5}) as mock_rates:
+        converted = fetch.convert_to_dollars(dfs)
+
+    mock_rates.assert_called_once()
+    assert [df["revenue"].iloc[0] for df in converted] == [100.0, 70.0, 20.0]
+    assert all(df.attrs["currency"] == "USD" for df in converted)
@@ -0,0 +1,40 @@
+"""Tests for the shared pooled http client registry"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+import requests
+
+from backend.utils import http_client
+
+
+def test_session_reused_per_host():
+    """Test that one pooled session is kept per host"""
+    fmp = http_client.get_session("financialmodelingprep.com")
+    assert http_client.get_session("financialmodelingprep.com") is fmp
+    assert http_client.get_session("api.polygon.io") is not fmp
+
+
+def test_metrics_and_default_timeouts():
+    """Test that status codes, errors and configured timeouts are applied"""
+    http_client.reset_metrics()
+    url = "https://metrics.example.com/x"
+    session = http_client.get_session("metrics.example.com")
+
+    with patch.object(session, "request") as mock_request:
+        mock_request.return_value = MagicMock(status_code=200)
+        http_client.get(url)
+        _, kwargs = mock_request.call_args
+        assert kwargs["timeout"] == (
+            http_client.CONNECT_TIMEOUT,
+            http_client.READ_TIMEOUT,
+        )
+
+        mock_request.side_effect = requests.ConnectionError("down")
+        with pytest.raises(requests.RequestException):
+            http_client.get(url, timeout=2)
+
+    metrics = http_client.get_metrics()["metrics.example.com"]
+    assert metrics["requests"] == 2
+    assert metrics["errors"] == 1
+    assert metrics["status_counts"] == {200: 1}
@@ -0,0 +1,76 @@
+"""Tests for the pub/sub cache invalidation bus and the local cache tier"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+from backend.ingest import statement_cache
+from backend.utils import invalidation_bus
+from backend.utils.invalidation_bus import LocalCache, ensure_listener, invalidate
+
+
+def subscribed_client():
+    """Mocked redis client whose subscriber thread reports itself alive"""
+    client = MagicMock()
+    client.pubsub.return_value.run_in_thread.return_value.is_alive.return_value = True
+    return client
+
+
+def test_local_cache_needs_a_subscriber():
+    """Test that nothing is served locally while invalidations cannot be heard"""
+    cache = LocalCache("test_offline")
+
+    with patch.object(invalidation_bus, "is_listening", return_value=False):
+        cache.set("financial_data:TSLA", b"payload")
+        assert cache.get("financial_data:TSLA") is None
+
+
+def test_message_drops_keys_and_patterns_in_every_cache():
+    """Test that an invalidation message clears matching entries of all local caches"""
+    client = subscribed_client()
+    assert ensure_listener(client)
+    statements, screens = LocalCache("test_statements"), LocalCache("test_screens")
+    statements.set("financial_data:TSLA", b"tsla")
+    statements.set("financial_data:F", b"f")
+    screens.set("screener:US:100:1:2", b"screen")
+
+    on_message = client.pubsub.return_value.subscribe.call_args.kwargs[
+        invalidation_bus.INVALIDATION_CHANNEL
+    ]
+    on_message(
+        {
+            "data": json.dumps(
+                {"keys": ["financial_data:TSLA"], "patterns": ["screener:*"]}
+            )
+        }
+    )
+
+    assert statements.get("financial_data:TSLA") is None
+    assert statements.get("financial_data:F") == b"f"
+    assert screens.get("screener:US:100:1:2") is None
+
+
+def test_invalidate_unlinks_and_publishes():
+    """Test that invalidate removes keys from redis and broadcasts them"""
+    client = subscribed_client()
+    client.pipeline.return_value.execute.return_value = [1]
+
+    assert invalidate(client, ["financial_data:GM"]) == 1
+
+    channel, message = client.publish.call_args.args
+    assert channel == invalidation_bus.INVALIDATION_CHANNEL
+    assert json.loads(message) == {"keys": ["financial_data:GM"], "patterns": []}
+
+
+def test_read_tickers_serves_local_tier():
+    """Test that a repeated read is answered locally, only misses go to MGET"""
+    client = subscribed_client()
+    client.mget.return_value = [b"tsla"]
+
+    assert statement_cache.read_tickers(client, ["TSLA"]) == {"TSLA": b"tsla"}
+    client.mget.return_value = [None]
+    assert statement_cache.read_tickers(client, ["TSLA", "F"]) == {
+        "TSLA": b"tsla",
+        "F": None,
+    }
+
+    assert client.mget.call_args_list[1].args == (["financial_data:F"],)
@@ -0,0 +1,43 @@
+"""Tests for the fused currency & million-scaling normalization pass"""
+
+import pandas as pd
+
+from backend.ingest.normalize import normalize_frames, scale_frame
+
+
+def statement(currency: str) -> pd.DataFrame:
+    df = pd.DataFrame(
+        {
+            "date": ["2024-12-31", "2023-12-31"],
+            "revenue": [4_000_000, 1_000_000],
+            "eps": [1.5, -0.5],
+        }
+    )
+    df.attrs["currency"] = currency
+    return df
+
+
+def test_conversion_and_millions_in_one_pass():
+    """Test that values are converted first, then large ones scaled to millions"""
+    eur, usd = statement("EUR"), statement("USD")
+
+    out_eur, out_usd = normalize_frames([eur, usd], {"EUR": 0.5})
+
+    assert out_eur["revenue"].tolist() == [8.0, 2.0]
+    assert out_eur["eps"].tolist() == [3.0, -1.0]
+    assert out_eur.attrs["currency"] == "USD"
+    assert out_usd["revenue"].tolist() == [4.0, 1.0]
+    assert out_usd["eps"].tolist() == [1.5, -0.5]
+    # the inputs are left untouched
+    assert eur["revenue"].tolist() == [4_000_000, 1_000_000]
+    assert eur.attrs["currency"] == "EUR"
+
+
+def test_inplace_and_noop_return_the_same_frame():
+    """Test that inplace mutates the frame and a no-op pass does not copy it"""
+    df = statement("USD")
+    assert scale_frame(df, millions=False) is df
+
+    out = normalize_frames([df], inplace=True)[0]
+    assert out is df
+    assert df["revenue"].tolist() == [4.0, 1.0]
@@ -0,0 +1,82 @@
+"""Tests for the export-boundary statement views"""
+
+import zipfile
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from backend.ingest import fetch
+from backend.ingest.presentation import prompt_csv, statement_view
+
+
+def typed_statement() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "date": ["2024-12-31", "2023-12-31"],
+            "symbol": ["TSLA", "TSLA"],
+            "revenue": [97.69, 96.77],
+            "netIncome": [7.09, 15.0],
+            "ticker": "TSLA",
+            "statement_type": "income-statement",
+        }
+    )
+
+
+def test_statement_view_keeps_numeric_periods():
+    """Test that the transposed view has numeric period columns, no strings"""
+    view = statement_view(typed_statement())
+
+    assert view["metric"].tolist() == ["revenue", "netIncome"]
+    assert list(view.columns) == ["metric", "2024-12-31", "2023-12-31"]
+    assert view["2024-12-31"].dtype == "float64"
+    assert "97.69" in prompt_csv(view)
+
+
+def test_excel_sheets_named_from_typed_frames():
+    """Test that the workbook gets one transposed sheet per typed statement"""
+    output = fetch.save_as_excel([typed_statement()])
+
+    with zipfile.ZipFile(output) as xlsx:
+        workbook = xlsx.read("xl/workbook.xml").decode()
+        cells = xlsx.read("xl/worksheets/sheet1.xml").decode()
+    assert 'name="TSLA_income"' in workbook
+    assert "<t>revenue</t>" in cells  # constant_memory writes inline strings
+    assert "<v>97.69</v>" in cells
+    assert "<t>symbol</t>" in cells
+
+
+def test_export_view_keeps_text_fields():
+    """Test that the export view keeps non-numeric fields as rows after the metrics"""
+    df = typed_statement().assign(reportedCurrency="USD", period="FY")
+    view = statement_view(df, text=True)
+
+    assert view["metric"].tolist() == [
+        "revenue",
+        "netIncome",
+        "symbol",
+        "reportedCurrency",
+        "period",
+    ]
+    row = view.set_index("metric").loc["reportedCurrency"]
+    assert row.tolist() == ["USD", "USD"]
+    assert view.set_index("metric").loc["revenue", "2024-12-31"] == 97.69
+
+
+def test_pipeline_workbook_keeps_text_fields():
+    """Test that the main pipeline's workbook still holds the text fields"""
+    output = BytesIO()
+    comparables = MagicMock(companies=[MagicMock(ticker="TSLA")])
+    statement = typed_statement().assign(reportedCurrency="USD", period="FY")
+
+    with (
+        patch.object(fetch, "ComparableSet", comparables),
+        patch.object(fetch, "create_financial_data", return_value=[statement]),
+        patch.object(fetch, "get_rates", return_value={}),
+    ):
+        result = fetch.run_financial_analysis(excel_path=output)
+
+    assert result["success"]
+    with zipfile.ZipFile(output) as xlsx:
+        cells = xlsx.read("xl/worksheets/sheet1.xml").decode()
+    assert "<t>reportedCurrency</t>" in cells and "<t>FY</t>" in cells
@@ -0,0 +1,142 @@
+"""Tests for the compact, budgeted AI prompt builder"""
+
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+import pytest
+
+from backend.ingest import fetch
+from backend.simplai.prompt_builder import (
+    aggregate,
+    build_prompt_data,
+    estimate_tokens,
+    relevant_metrics,
+)
+
+
+def combined(tickers):
+    """Combined statement view of a few income & balance sheet metrics"""
+    rows = []
+    for i, ticker in enumerate(tickers):
+        scale = i + 1
+        rows += [
+            [
+                ticker,
+                "income-statement",
+                "revenue",
+                121.0 * scale,
+                110.0 * scale,
+                100.0 * scale,
+            ],
+            [
+                ticker,
+                "income-statement",
+                "operatingIncome",
+                12.1 * scale,
+                10.0 * scale,
+                9.0 * scale,
+            ],
+            [ticker, "income-statement", "weightedAverageShsOut", 3.0, 3.0, 3.0],
+            [ticker, "balance-sheet-statement", "totalDebt", 50.0, 40.0, None],
+        ]
+    return pd.DataFrame(
+        rows,
+        columns=[
+            "ticker",
+            "statement_type",
+            "metric",
+            "2024-12-31",
+            "2023-12-31",
+            "2022-12-31",
+        ],
+    )
+
+
+def test_relevant_metrics_from_question():
+    """Test topic keywords and metric names select metrics, defaults otherwise"""
+    available = ["revenue", "operatingIncome", "totalDebt", "weightedAverageShsOut"]
+
+    assert relevant_metrics("How did operating income margins evolve?", available) == [
+        "operatingIncome",
+        "revenue",
+    ]
+    assert relevant_metrics("Tell me about debt", available) == ["totalDebt"]
+    assert relevant_metrics("Summarize", available) == [
+        "revenue",
+        "operatingIncome",
+        "totalDebt",
+    ]
+
+
+def test_relevant_metrics_match_whole_words():
+    """Test that names only match whole words: 'steps' is not eps, 'ebitda' not ebit"""
+    available = ["revenue", "eps", "operatingIncome", "ebitda", "totalDebt"]
+
+    assert relevant_metrics("What are the next steps?", available) == [
+        "revenue",
+        "operatingIncome",
+        "totalDebt",
+    ]
+    assert relevant_metrics("Compare EBITDA", available) == ["ebitda"]
+    assert relevant_metrics("Show EPS and EBIT", available) == [
+        "eps",
+        "operatingIncome",
+        "ebitda",
+    ]
+    assert relevant_metrics("Any debts?", available) == ["totalDebt"]
+
+
+def test_aggregate_growth_cagr_and_margin():
+    """Test the pre-aggregated latest value, growth rates and margin"""
+    summary = aggregate(combined(["TSLA"]), ["revenue", "operatingIncome", "totalDebt"])
+    by_metric = summary.set_index("metric")
+
+    assert by_metric.loc["revenue", "latest"] == 121.0
+    assert by_metric.loc["revenue", "yoy_growth_pct"] == pytest.approx(10.0)
+    assert by_metric.loc["revenue", "cagr_pct"] == pytest.approx(10.0)
+    assert by_metric.loc["operatingIncome", "margin_pct"] == pytest.approx(10.0)
+    assert by_metric.loc["totalDebt", "cagr_pct"] == pytest.approx(25.0)
+    assert pd.isna(by_metric.loc["totalDebt", "margin_pct"])
+
+
+def test_budget_keeps_target_and_reports_size():
+    """Test that the budget is enforced, the target kept first and the size reported"""
+    view = combined([f"P{i}" for i in range(100)])
+    full = build_prompt_data(view, "revenue growth", token_budget=10**6)
+    data = build_prompt_data(view, "revenue growth", token_budget=300)
+
+    assert full.dropped_rows == 0 and full.rows == 200
+    assert data.estimated_tokens == estimate_tokens(data.text) <= 300
+    assert data.rows + data.dropped_rows == 200
+    lines = data.text.splitlines()
+    assert lines[1].startswith("P0,revenue") and lines[2].startswith(
+        "P0,operatingIncome"
+    )
+    # peers come metric by metric, revenue of every kept peer first
+    assert all(",revenue," in line for line in lines[3:])
+
+
+def test_pipeline_ratios_use_unscaled_values():
+    """Test that growth crossing the million threshold is not mixed up by the
+    per-value million scaling of the exported frames"""
+    statement = pd.DataFrame(
+        {
+            "date": ["2024-12-31", "2023-12-31"],
+            "netIncome": [1_200_000.0, 800_000.0],
+            "ticker": "TSLA",
+            "statement_type": "income-statement",
+        }
+    )
+    comparables = MagicMock(companies=[MagicMock(ticker="TSLA")])
+
+    with (
+        patch.object(fetch, "ComparableSet", comparables),
+        patch.object(fetch, "create_financial_data", return_value=[statement]),
+        patch.object(fetch, "get_rates", return_value={}),
+        patch.object(fetch, "save_as_excel"),
+        patch.object(fetch, "extract_info_gemini") as extract,
+    ):
+        fetch.run_financial_analysis(user_prompt="net income growth?")
+
+    summary = aggregate(extract.call_args.args[0], ["netIncome"])
+    assert summary.loc[0, "yoy_growth_pct"] == pytest.approx(50.0)
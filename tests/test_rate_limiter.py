@@ -0,0 +1,56 @@
+"""Tests for the per-provider upstream quota governor (in-process fallback)"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from backend.utils import http_client, rate_limiter
+
+
+@pytest.fixture(autouse=True)
+def local_buckets(monkeypatch):
+    """Force the in-process buckets and start every test with a full quota"""
+    monkeypatch.setattr(rate_limiter, "_script", None)
+    rate_limiter.reset()
+    yield
+    rate_limiter.reset()
+
+
+def test_bucket_grants_up_to_quota(monkeypatch):
+    """Test that the bucket grants its capacity, then refuses within max_wait"""
+    monkeypatch.setenv("RATE_LIMIT_POLYGON", "2/60")
+
+    assert rate_limiter.acquire("polygon", max_wait=0) == 0
+    assert rate_limiter.acquire("polygon", max_wait=0) == 0
+    assert rate_limiter.remaining("polygon")["remaining"] == 0
+    with pytest.raises(rate_limiter.QuotaExceeded):
+        rate_limiter.acquire("polygon", max_wait=0)
+
+
+def test_parse_retry_after():
+    """Test delta-seconds, HTTP dates and garbage Retry-After values"""
+    assert rate_limiter.parse_retry_after("12") == 12
+    assert rate_limiter.parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+    assert rate_limiter.parse_retry_after("soon") is None
+    assert rate_limiter.parse_retry_after(None) is None
+
+
+def test_429_blocks_provider_for_retry_after():
+    """Test that a 429 pauses the provider and later calls fail fast"""
+    session = http_client.get_session("financialmodelingprep.com")
+    url = "https://financialmodelingprep.com/api/v3/income-statement/TSLA"
+
+    with (
+        patch.object(session, "request") as mock_request,
+        patch.object(rate_limiter, "MAX_WAIT_SECONDS", 0),
+    ):
+        mock_request.return_value = MagicMock(
+            status_code=429, headers={"Retry-After": "30"}
+        )
+        http_client.get(url)
+
+        assert rate_limiter.remaining("fmp")["blocked_seconds"] > 29
+        with pytest.raises(http_client.RateLimited):
+            http_client.get(url)
+
+    assert mock_request.call_count == 1
@@ -0,0 +1,86 @@
+"""Tests for the long-format statement store"""
+
+import numpy as np
+import pandas as pd
+
+from backend.ingest.statement_store import StatementStore
+from backend.simplai.ai import chunk_view
+
+
+def statements():
+    income = pd.DataFrame(
+        {
+            "date": ["2023-12-31", "2024-12-31"],
+            "symbol": "TSLA",
+            "revenue": [96.77, 97.69],
+            "netIncome": [15.0, np.nan],
+            "ticker": "TSLA",
+            "statement_type": "income-statement",
+        }
+    )
+    cash_flow = pd.DataFrame(
+        {
+            "date": ["2024-12-31"],
+            "netIncome": [7.09],
+            "ticker": "TSLA",
+            "statement_type": "cash-flow-statement",
+        }
+    )
+    return [income, cash_flow]
+
+
+def test_long_table_is_categorical_and_indexed():
+    """Test the categorical layout and the latest() lookups"""
+    store = StatementStore.from_frames(statements())
+
+    assert len(store) == 2
+    assert store.tickers == ["TSLA"]
+    assert all(
+        store.data[col].dtype == "category"
+        for col in ("ticker", "statement_type", "metric")
+    )
+    assert store.latest("TSLA", "revenue") == 97.69
+    # the newest non-null value wins, per statement when one is given
+    assert store.latest("TSLA", "netIncome", "income-statement") == 15.0
+    assert store.latest("TSLA", "netIncome", "cash-flow-statement") == 7.09
+    assert store.latest("TSLA", "ebit") is None
+    assert store.series("TSLA", "revenue").tolist() == [97.69, 96.77]
+
+
+def test_store_iterates_as_wide_frames():
+    """Test that iterating the store rebuilds one frame per ticker x statement"""
+    frames = list(StatementStore.from_frames(statements()))
+
+    assert [f["statement_type"].iloc[0] for f in frames] == [
+        "income-statement",
+        "cash-flow-statement",
+    ]
+    assert frames[0]["date"].tolist() == ["2024-12-31", "2023-12-31"]
+    assert frames[0]["revenue"].tolist() == [97.69, 96.77]
+
+
+def test_store_keeps_target_first():
+    """Test that a target that is not alphabetically first stays first in every view"""
+    tickers = ["TSLA", "F", "GM", "AAPL"]
+    store = StatementStore.from_frames(
+        [
+            pd.DataFrame(
+                {
+                    "date": ["2024-12-31"],
+                    "revenue": [float(i + 1)],
+                    "ticker": ticker,
+                    "statement_type": "income-statement",
+                }
+            )
+            for i, ticker in enumerate(tickers)
+        ]
+    )
+
+    assert store.tickers == tickers
+    assert [f["ticker"].iloc[0] for f in store] == tickers
+    view = store.combined_view()
+    assert list(dict.fromkeys(view["ticker"])) == tickers
+    assert [c["ticker"].iloc[0] for c in chunk_view(view, chunk_tickers=2)] == [
+        "TSLA",
+        "TSLA",
+    ]
@@ -0,0 +1,84 @@
+"""Tests for the request-scoped yfinance info provider"""
+
+from unittest.mock import patch
+
+from backend.ingest import ticker_info
+from backend.ingest.companies_fields import create_companies_fields
+from backend.ingest.ticker_info import TickerInfoProvider
+
+
+def test_each_ticker_fetched_once_per_run():
+    """Test that all consumers share one fetch per ticker"""
+    infos = TickerInfoProvider(max_workers=4, batch_size=2)
+
+    with (
+        patch.object(ticker_info, "redis_client", None),
+        patch.object(ticker_info, "fetch_info") as mock_fetch,
+    ):
+        mock_fetch.side_effect = lambda t: {"longName": f"{t} Inc.", "beta": 1.1}
+
+        infos.prefetch(["TSLA", "F", "GM", "F"])
+        assert infos.get("TSLA")["beta"] == 1.1
+        fields = create_companies_fields(["TSLA", "F", "GM"], infos=infos)
+
+    assert sorted(call.args[0] for call in mock_fetch.call_args_list) == [
+        "F",
+        "GM",
+        "TSLA",
+    ]
+    assert [f["name"] for f in fields] == ["TSLA Inc.", "F Inc.", "GM Inc."]
+
+
+def test_failed_info_is_empty_and_not_refetched():
+    """Test that a failing ticker yields {} and is not retried within the run"""
+    infos = TickerInfoProvider()
+
+    with (
+        patch.object(ticker_info, "redis_client", None),
+        patch.object(ticker_info.yf, "Ticker", side_effect=ValueError("bad")) as yf,
+        patch.object(ticker_info.rate_limiter, "acquire"),
+    ):
+        assert infos.get("XXXX") == {}
+        assert infos.get("XXXX") == {}
+
+    yf.assert_called_once_with("XXXX")
+
+
+class FakeRedis:
+    """dict-backed stand-in for the MGET / pipeline SET calls of the info cache"""
+
+    def __init__(self):
+        self.store, self.ttls = {}, {}
+
+    def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=False):  # pylint: disable=unused-argument
+        return self
+
+    def set(self, key, value, ex=None):
+        self.store[key], self.ttls[key] = value, ex
+
+    def execute(self):
+        return []
+
+
+def test_warm_cache_skips_yahoo():
+    """Test that a second run reads name & market fields from redis only"""
+    fake = FakeRedis()
+    info = {"longName": "Tesla, Inc.", "marketCap": 1e12, "beta": 2.0, "ebitda": 1}
+
+    with (
+        patch.object(ticker_info, "redis_client", fake),
+        patch.object(ticker_info.yf, "Ticker") as mock_ticker,
+        patch.object(ticker_info.rate_limiter, "acquire"),
+    ):
+        mock_ticker.return_value.info = info
+        cold = TickerInfoProvider().get("TSLA")
+        warm = TickerInfoProvider().get("TSLA")
+
+    mock_ticker.assert_called_once_with("TSLA")
+    assert cold == warm
+    assert warm["longName"] == "Tesla, Inc." and warm["marketCap"] == 1e12
+    assert "ebitda" not in warm
+    assert fake.ttls["ticker_info_slow:TSLA"] > fake.ttls["ticker_info_fast:TSLA"]
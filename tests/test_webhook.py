@@ -0,0 +1,79 @@
+"""Tests for the batched cache invalidation queue and bulk key removal"""
+
+import threading
+from unittest.mock import MagicMock, patch
+
+from backend.ingest import webhook
+from backend.ingest.webhook import InvalidationQueue
+from backend.utils.redis_keys import unlink_keys, unlink_pattern
+
+
+def test_queue_deduplicates_and_flushes_in_batches():
+    """Test that queued keys are sent once each, batch_size per POST"""
+    queue = InvalidationQueue(batch_size=2, flush_interval=60)
+
+    with (
+        patch.object(queue, "_run"),
+        patch.object(webhook, "send_invalidations", return_value=True) as send,
+    ):
+        for key in ["financial_data:TSLA", "financial_data:F", "financial_data:TSLA"]:
+            queue.put(key)
+        queue.put_pattern("screener:US:*")
+        queue.put_updated("financial_data:GM")
+        assert queue.pending() == 4
+
+        assert queue.flush() == [True, True]
+
+    assert send.call_args_list[0].args == (
+        ["financial_data:TSLA"],
+        ["screener:US:*"],
+        [],
+    )
+    assert send.call_args_list[1].args == (
+        ["financial_data:F"],
+        [],
+        ["financial_data:GM"],
+    )
+    assert queue.pending() == 0
+
+
+def test_background_flush_off_the_caller_path():
+    """Test that notify_cache_expiry only queues, the worker thread sends the batch"""
+    queue = InvalidationQueue(batch_size=100, flush_interval=0.01)
+    sent = threading.Event()
+
+    with (
+        patch.object(webhook, "invalidation_queue", queue),
+        patch.object(
+            webhook, "send_invalidations", side_effect=lambda *_: sent.set()
+        ) as send,
+    ):
+        assert webhook.notify_cache_expiry("financial_data:GM")
+        assert sent.wait(timeout=5)
+        queue.close()
+
+    send.assert_called_once_with(["financial_data:GM"], [], [])
+
+
+def test_unlink_keys_pipelines_batches():
+    """Test that many keys are removed by batched UNLINKs in one pipeline"""
+    client = MagicMock()
+    pipe = client.pipeline.return_value
+    pipe.execute.return_value = [2, 1]
+
+    with patch("backend.utils.redis_keys.UNLINK_BATCH_SIZE", 2):
+        assert unlink_keys(client, ["a", "b", "a", "c"]) == 3
+
+    assert [c.args for c in pipe.unlink.call_args_list] == [("a", "b"), ("c",)]
+    pipe.execute.assert_called_once()
+
+
+def test_unlink_pattern_scans_and_refuses_wildcards():
+    """Test SCAN based pattern removal, a bare wildcard removes nothing"""
+    client = MagicMock()
+    client.scan_iter.return_value = iter(["screener:US:1", "screener:US:2"])
+    client.unlink.return_value = 2
+
+    assert unlink_pattern(client, "screener:US:*") == 2
+    assert unlink_pattern(client, "*") == 0
+    client.scan_iter.assert_called_once()